@@ -0,0 +1,317 @@
+"""
+Offline stand-in for the Gemini web app.
+
+Serves a single page that honours the DOM contract in src.config.Config
+(textbox, temporary-chat button, model dropdown, Stop/Send buttons and
+`.markdown` responses). Generation is decided server-side so latency,
+streaming speed, failures and rate limiting can be injected.
+
+    python -m bench.mock_gemini --port 8765 --latency-ms 2000
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Optional
+
+RATE_LIMIT_MESSAGE = "You've reached your limit. Try again later."
+
+
+@dataclass
+class MockOptions:
+    latency_ms: int = 2000  # time to first token
+    latency_jitter_ms: int = 500
+    stream_chars_per_sec: int = 2000
+    response_chars: int = 600
+    failure_rate: float = 0.0  # generation ends without a response
+    hang_rate: float = 0.0  # generation never ends
+    rate_limit_per_minute: int = 0  # 0 disables rate limiting
+    new_chat_drops_temp_chat: bool = True
+
+
+@dataclass
+class MockStats:
+    pages_served: int = 0
+    generations: int = 0
+    failures: int = 0
+    hangs: int = 0
+    rate_limited: int = 0
+
+
+_PAGE = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Gemini (offline mock)</title>
+<style>
+  body { font-family: sans-serif; margin: 0; display: flex; }
+  mat-icon { display: inline-block; min-width: 24px; min-height: 24px; cursor: pointer; }
+  nav { width: 200px; padding: 8px; border-right: 1px solid #ccc; }
+  main { flex: 1; padding: 8px; }
+  .hidden { display: none !important; }
+  user-query { display: block; background: #eef; margin: 4px 0; white-space: pre-wrap; }
+  .markdown { background: #efe; margin: 4px 0; white-space: pre-wrap; }
+  [role='textbox'] { border: 1px solid #888; min-height: 40px; padding: 4px; }
+  [role='textbox']:empty::before { content: attr(data-placeholder); color: #888; }
+  #banner { color: #a00; }
+</style>
+</head>
+<body>
+<nav>
+  <mat-icon data-mat-icon-name="menu" id="menu-btn">&#9776;</mat-icon>
+  <div id="side-panel" class="hidden">
+    <mat-icon data-mat-icon-name="search">&#128269;</mat-icon>
+    <div><a href="#" data-test-id="new-chat-button" id="new-chat">New chat</a></div>
+  </div>
+</nav>
+<main>
+  <div id="toolbar">
+    <button data-test-id="temp-chat-button" id="temp-chat">Temporary chat</button>
+    <button data-test-id="bard-mode-menu-button" id="mode-btn">
+      <span id="mode-label">Fast</span>
+      <mat-icon data-mat-icon-name="keyboard_arrow_down">&#9662;</mat-icon>
+    </button>
+    <div id="mode-menu" class="hidden">
+      <button data-test-id="bard-mode-option-fast" id="opt-fast">Fast</button>
+      <button data-test-id="bard-mode-option-thinking" id="opt-thinking">Thinking</button>
+    </div>
+  </div>
+  <div id="conversation"></div>
+  <div id="banner" role="alert" class="hidden"></div>
+  <div id="input-row">
+    <div contenteditable="true" role="textbox" id="input" data-placeholder="Ask Gemini"></div>
+    <button aria-label="Send message" id="send">Send</button>
+    <button aria-label="Stop response" id="stop" class="hidden">Stop</button>
+  </div>
+</main>
+<script>
+(() => {
+  const OPTIONS = __OPTIONS__;
+  const $ = (id) => document.getElementById(id);
+  const input = $('input');
+  let tempChat = false;
+  let busy = false;
+
+  const setTempChat = (on) => {
+    tempChat = on;
+    input.setAttribute('data-placeholder', on ? 'Ask questions in a temporary chat' : 'Ask Gemini');
+  };
+
+  $('menu-btn').addEventListener('click', () => $('side-panel').classList.toggle('hidden'));
+  $('temp-chat').addEventListener('click', () => setTempChat(!tempChat));
+  $('mode-btn').addEventListener('click', () => $('mode-menu').classList.toggle('hidden'));
+  for (const [id, label] of [['opt-fast', 'Fast'], ['opt-thinking', 'Thinking']]) {
+    $(id).addEventListener('click', (event) => {
+      event.stopPropagation();
+      $('mode-label').textContent = label;
+      $('mode-menu').classList.add('hidden');
+    });
+  }
+  $('new-chat').addEventListener('click', (event) => {
+    event.preventDefault();
+    if (busy) return;
+    $('conversation').innerHTML = '';
+    $('banner').classList.add('hidden');
+    input.textContent = '';
+    if (OPTIONS.new_chat_drops_temp_chat) setTempChat(false);
+  });
+
+  const setGenerating = (on) => {
+    busy = on;
+    $('stop').classList.toggle('hidden', !on);
+    $('send').classList.toggle('hidden', on);
+  };
+
+  async function submit() {
+    const text = input.innerText;
+    if (busy || !text.trim()) return;
+    input.textContent = '';
+    const turn = document.createElement('user-query');
+    turn.textContent = text;
+    $('conversation').appendChild(turn);
+    setGenerating(true);
+
+    const reply = await (await fetch('/generate', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ prompt_chars: text.length, thinking: $('mode-label').textContent === 'Thinking' }),
+    })).json();
+
+    if (reply.outcome === 'rate_limited') {
+      $('banner').textContent = reply.message;
+      $('banner').classList.remove('hidden');
+      setGenerating(false);
+      return;
+    }
+    if (reply.outcome === 'hang') return;
+
+    await new Promise((resolve) => setTimeout(resolve, reply.delay_ms));
+    if (reply.outcome === 'failure') { setGenerating(false); return; }
+
+    const node = document.createElement('div');
+    node.className = 'markdown';
+    $('conversation').appendChild(node);
+    const perTick = Math.max(1, Math.round(reply.chars_per_sec / 20));
+    for (let i = 0; i < reply.text.length; i += perTick) {
+      node.textContent = reply.text.slice(0, i + perTick);
+      await new Promise((resolve) => setTimeout(resolve, 50));
+    }
+    setGenerating(false);
+  }
+
+  input.addEventListener('keydown', (event) => {
+    if (event.key === 'Enter' && !event.shiftKey) { event.preventDefault(); submit(); }
+  });
+  $('send').addEventListener('click', submit);
+})();
+</script>
+</body>
+</html>
+"""
+
+
+class MockGeminiServer:
+    """Threaded HTTP server hosting the mock app at /u/<n>/app."""
+
+    def __init__(self, options: Optional[MockOptions] = None, host: str = "127.0.0.1", port: int = 0):
+        self.options = options or MockOptions()
+        self.stats = MockStats()
+        self._lock = threading.Lock()
+        self._recent: Deque[float] = deque()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/u/1/app"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _decide(self) -> Dict:
+        opts = self.options
+        with self._lock:
+            now = time.monotonic()
+            if opts.rate_limit_per_minute:
+                while self._recent and now - self._recent[0] > 60:
+                    self._recent.popleft()
+                if len(self._recent) >= opts.rate_limit_per_minute:
+                    self.stats.rate_limited += 1
+                    return {"outcome": "rate_limited", "message": RATE_LIMIT_MESSAGE}
+                self._recent.append(now)
+
+            self.stats.generations += 1
+            roll = random.random()
+            if roll < opts.hang_rate:
+                self.stats.hangs += 1
+                return {"outcome": "hang"}
+            outcome = "ok"
+            if roll < opts.hang_rate + opts.failure_rate:
+                self.stats.failures += 1
+                outcome = "failure"
+
+        delay = max(0, opts.latency_ms + random.uniform(-1, 1) * opts.latency_jitter_ms)
+        return {
+            "outcome": outcome,
+            "delay_ms": int(delay),
+            "chars_per_sec": opts.stream_chars_per_sec,
+            "text": _response_text(opts.response_chars),
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if not self.path.split("?")[0].rstrip("/").endswith("/app"):
+                    self._send(404, "text/plain", b"not found")
+                    return
+                server.stats.pages_served += 1
+                page = _PAGE.replace("__OPTIONS__", json.dumps(asdict(server.options)))
+                self._send(200, "text/html; charset=utf-8", page.encode("utf-8"))
+
+            def do_POST(self):
+                if self.path != "/generate":
+                    self._send(404, "text/plain", b"not found")
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                body = json.dumps(server._decide()).encode("utf-8")
+                self._send(200, "application/json", body)
+
+            def _send(self, status: int, content_type: str, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep benchmark output readable
+
+        return Handler
+
+
+def _response_text(length: int) -> str:
+    """A well-formed answer in the shape the downstream parser expects."""
+    answer = {
+        "principle_id": "P1",
+        "justification_reasoning": "",
+        "evidence_quote": "mock quote",
+        "is_ableist": False,
+    }
+    filler = max(0, length - len(json.dumps(answer)))
+    answer["justification_reasoning"] = ("lorem ipsum " * (filler // 12 + 1))[:filler]
+    return json.dumps(answer, indent=2)
+
+
+def parse_options(args: argparse.Namespace) -> MockOptions:
+    return MockOptions(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        stream_chars_per_sec=args.stream_cps,
+        response_chars=args.response_chars,
+        failure_rate=args.failure_rate,
+        hang_rate=args.hang_rate,
+        rate_limit_per_minute=args.rate_limit_per_minute,
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    defaults = MockOptions()
+    parser.add_argument("--latency-ms", type=int, default=defaults.latency_ms)
+    parser.add_argument("--latency-jitter-ms", type=int, default=defaults.latency_jitter_ms)
+    parser.add_argument("--stream-cps", type=int, default=defaults.stream_chars_per_sec)
+    parser.add_argument("--response-chars", type=int, default=defaults.response_chars)
+    parser.add_argument("--failure-rate", type=float, default=defaults.failure_rate)
+    parser.add_argument("--hang-rate", type=float, default=defaults.hang_rate)
+    parser.add_argument("--rate-limit-per-minute", type=int, default=defaults.rate_limit_per_minute)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    cli_args = parser.parse_args()
+
+    mock = MockGeminiServer(parse_options(cli_args), port=cli_args.port)
+    print(f"Mock Gemini serving at {mock.base_url}")
+    try:
+        mock.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,193 @@
+"""
+End-to-end throughput benchmark against the offline Gemini mock.
+
+Starts bench.mock_gemini, launches a headless Chromium with a CDP port and
+drives the real Orchestrator/GeminiTabHandler against it. Reports
+prompts/sec, per-prompt latency percentiles and time spent per phase
+(taken from src.metrics).
+
+    python -m bench.run_benchmark --prompts 40 --concurrency 4 --latency-ms 1500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List
+
+from loguru import logger
+from playwright.async_api import async_playwright
+
+from bench.mock_gemini import MockGeminiServer, add_arguments, parse_options
+from src.config import Config
+from src.metrics import metrics
+from src.orchestrator import Orchestrator
+
+# Phases that only exist because of tab setup/reset, not the prompt itself.
+# initialize includes page_goto; ensure_ready includes the three setup steps.
+SETUP_PHASES = ["initialize", "adopt", "ensure_ready", "reset"]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def launch_chrome(workdir: str, port: int, headed: bool) -> subprocess.Popen:
+    """Starts Chromium with a remote-debugging port, like the README's manual setup."""
+    async with async_playwright() as p:
+        executable = p.chromium.executable_path
+
+    args = [
+        executable,
+        f"--remote-debugging-port={port}",
+        f"--user-data-dir={os.path.join(workdir, 'profile')}",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "about:blank",
+    ]
+    if not headed:
+        args.insert(1, "--headless=new")
+    process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            await asyncio.to_thread(
+                urllib.request.urlopen, f"http://127.0.0.1:{port}/json/version", timeout=1
+            )
+            return process
+        except OSError:
+            await asyncio.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Chromium did not open its debugging port in time.")
+
+
+def configure(workdir: str, base_url: str, cdp_url: str, args: argparse.Namespace):
+    """Points the scraper at the mock and keeps all output inside the workdir."""
+    Config.BASE_URL = base_url
+    Config.CDP_URL = cdp_url
+    Config.CDP_URLS = [cdp_url]
+    Config.OUTPUT_FILE = os.path.join(workdir, "outputs.json")
+    Config.RESULT_LOG_FILE = os.path.join(workdir, "outputs.jsonl")
+    Config.RESULT_INDEX_FILE = os.path.join(workdir, "outputs.idx")
+    Config.RESPONSE_CACHE_FILE = os.path.join(workdir, "response_cache.sqlite")
+    Config.DEAD_LETTER_FILE = os.path.join(workdir, "dead_letter.jsonl")
+    Config.METRICS_PORT = None
+    Config.METRICS_SUMMARY_FILE = os.path.join(workdir, "metrics.json")
+    Config.CONCURRENCY_LIMIT = args.concurrency
+    Config.CONCURRENCY_ADAPTIVE = args.adaptive
+
+
+def build_prompts(count: int, chars: int) -> List[Dict]:
+    body = ("Classify the target sentence. " * (chars // 30 + 1))[:chars]
+    return [{"id": f"B{i}", "prompt": f"[{i}] {body}"} for i in range(count)]
+
+
+def build_report(args, elapsed: float, mock: MockGeminiServer, saved: int) -> Dict:
+    summary = metrics.summary()
+    phases = summary["phases"]
+    tasks = summary["tasks"].get("success", {})
+    expected_generation = (
+        args.latency_ms / 1000 + args.response_chars / max(1, args.stream_cps)
+    )
+    prompts_done = max(1, tasks.get("count", 0))
+    setup_total = sum(phases.get(phase, {}).get("total_s", 0.0) for phase in SETUP_PHASES)
+    generation_mean = phases.get("generation", {}).get("mean_s", 0.0)
+
+    return {
+        "prompts": args.prompts,
+        "saved": saved,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "prompts_per_sec": round(saved / elapsed, 4) if elapsed else 0.0,
+        "latency_s": {
+            "p50": tasks.get("p50_s", 0.0),
+            "p90": tasks.get("p90_s", 0.0),
+            "p99": tasks.get("p99_s", 0.0),
+            "max": tasks.get("max_s", 0.0),
+        },
+        "expected_generation_s": round(expected_generation, 3),
+        "overhead_per_prompt_s": {
+            "setup_and_reset": round(setup_total / prompts_done, 3),
+            "fill": round(phases.get("fill", {}).get("total_s", 0.0) / prompts_done, 3),
+            "generation_wait": round(max(0.0, generation_mean - expected_generation), 3),
+        },
+        "phases": phases,
+        "mock": vars(mock.stats),
+    }
+
+
+def print_report(report: Dict):
+    print(f"\n=== Benchmark: {report['saved']}/{report['prompts']} prompts "
+          f"in {report['elapsed_s']}s @ concurrency {report['concurrency']} ===")
+    print(f"Throughput:  {report['prompts_per_sec']} prompts/sec")
+    lat = report["latency_s"]
+    print(f"Latency:     p50={lat['p50']}s p90={lat['p90']}s p99={lat['p99']}s max={lat['max']}s")
+    overhead = report["overhead_per_prompt_s"]
+    print(f"Overhead:    setup/reset={overhead['setup_and_reset']}s "
+          f"fill={overhead['fill']}s generation_wait={overhead['generation_wait']}s per prompt "
+          f"(generation ~{report['expected_generation_s']}s)")
+    print(f"{'phase':<24}{'calls':>7}{'total s':>10}{'mean s':>9}{'p90 s':>9}")
+    for phase, row in report["phases"].items():
+        print(f"{phase:<24}{row['count']:>7}{row['total_s']:>10}{row['mean_s']:>9}{row['p90_s']:>9}")
+    print(f"Mock:        {report['mock']}")
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict:
+    workdir = tempfile.mkdtemp(prefix="gemini-bench-")
+    mock = MockGeminiServer(parse_options(args))
+    base_url = mock.start()
+    cdp_port = _free_port()
+    chrome = await launch_chrome(workdir, cdp_port, args.headed)
+
+    try:
+        configure(workdir, base_url, f"http://127.0.0.1:{cdp_port}", args)
+        metrics.reset()
+
+        started = time.perf_counter()
+        await Orchestrator(build_prompts(args.prompts, args.prompt_chars)).run()
+        elapsed = time.perf_counter() - started
+
+        with open(Config.OUTPUT_FILE, "r", encoding="utf-8") as f:
+            saved = len(json.load(f))
+        return build_report(args, elapsed, mock, saved)
+    finally:
+        chrome.terminate()
+        mock.stop()
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=20)
+    parser.add_argument("--prompt-chars", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=Config.CONCURRENCY_LIMIT)
+    parser.add_argument("--adaptive", action="store_true", help="enable the AIMD controller")
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--keep-workdir", action="store_true")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--log-level", default="WARNING")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(lambda msg: print(msg, end=""), level=args.log_level)
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
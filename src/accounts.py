@@ -0,0 +1,136 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from loguru import logger
+
+from src.browser_core import BrowserCore
+from src.config import Config
+from src.pacer import TokenBucketPacer
+from src.tab_pool import TabPool
+
+
+@dataclass
+class Account:
+    """One signed-in account slot: its own tabs, concurrency cap and throttling state."""
+    name: str
+    base_url: str
+    concurrency: int
+    browser_core: BrowserCore
+    pacer: TokenBucketPacer
+    tab_pool: TabPool
+    workers: Set[int] = field(default_factory=set)
+
+    @property
+    def throttled(self) -> bool:
+        return self.pacer.paused
+
+    @property
+    def free_slots(self) -> int:
+        return self.concurrency - len(self.workers)
+
+
+def load_accounts(default_core: BrowserCore) -> List[Account]:
+    """
+    Builds the accounts from Config.ACCOUNTS. Accounts without their own
+    cdp_urls (e.g. /u/0 and /u/1 of one Chrome profile) share `default_core`.
+    """
+    specs = Config.ACCOUNTS or [
+        {"name": "default", "base_url": Config.BASE_URL, "concurrency": Config.CONCURRENCY_MAX}
+    ]
+    accounts = []
+    for index, spec in enumerate(specs):
+        name = spec.get("name") or f"account{index}"
+        base_url = spec.get("base_url", Config.BASE_URL)
+        core = BrowserCore(spec["cdp_urls"]) if spec.get("cdp_urls") else default_core
+        accounts.append(
+            Account(
+                name=name,
+                base_url=base_url,
+                concurrency=spec.get("concurrency", Config.CONCURRENCY_LIMIT),
+                browser_core=core,
+                pacer=TokenBucketPacer(spec.get("rate_per_minute"), name=name),
+                tab_pool=TabPool(core, base_url),
+            )
+        )
+    return accounts
+
+
+class AccountPool:
+    """
+    Places worker tabs on accounts by remaining capacity.
+
+    Each worker is bound to one account for its lifetime. New workers go to the
+    unthrottled account with the most free slots; a throttled account keeps its
+    tabs but they take no work until its pacer's cooldown ends (see
+    `Orchestrator._worker`), so the other accounts carry the load meanwhile.
+    """
+
+    def __init__(self, accounts: List[Account]):
+        self.accounts = accounts
+        self._by_worker: Dict[int, Account] = {}
+
+    @property
+    def capacity(self) -> int:
+        return sum(account.concurrency for account in self.accounts)
+
+    def assign(self, worker_id: int) -> Account:
+        account = max(
+            self.accounts, key=lambda a: (a.concurrency > 0, not a.throttled, a.free_slots)
+        )
+        account.workers.add(worker_id)
+        self._by_worker[worker_id] = account
+        logger.debug(
+            f"[Worker {worker_id}] Using account {account.name} "
+            f"({len(account.workers)}/{account.concurrency} tabs)."
+        )
+        return account
+
+    def release(self, worker_id: int):
+        account = self._by_worker.pop(worker_id, None)
+        if account is not None:
+            account.workers.discard(worker_id)
+
+    def account_of(self, worker_id: int) -> Optional[Account]:
+        return self._by_worker.get(worker_id)
+
+    def split(self, total: int) -> List[int]:
+        """How `total` tabs would be spread over the accounts (in order), by capacity."""
+        counts = [0] * len(self.accounts)
+        for _ in range(min(total, self.capacity)):
+            index = max(
+                range(len(self.accounts)), key=lambda i: self.accounts[i].concurrency - counts[i]
+            )
+            counts[index] += 1
+        return counts
+
+    async def start(self, total: int):
+        """Connects and warms each account's share of `total` tabs, all in parallel."""
+        results = await asyncio.gather(
+            *(
+                account.tab_pool.start(count)
+                for account, count in zip(self.accounts, self.split(total))
+            ),
+            return_exceptions=True,
+        )
+        failed = [a for a, r in zip(self.accounts, results) if isinstance(r, BaseException)]
+        for account, result in zip(self.accounts, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Account {account.name} unavailable: {result}")
+        if len(failed) == len(self.accounts):
+            raise RuntimeError("No account could connect to Chrome.")
+        # Nothing is placed on an account whose browser never came up
+        for account in failed:
+            account.concurrency = 0
+
+    def close_pacers(self):
+        for account in self.accounts:
+            account.pacer.close()
+
+    async def close(self):
+        """Closes the pools, then each distinct browser connection once."""
+        for account in self.accounts:
+            await account.tab_pool.close()
+        cores = {id(account.browser_core): account.browser_core for account in self.accounts}
+        for core in cores.values():
+            await core.close()
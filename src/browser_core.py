@@ -1,27 +1,145 @@
-from playwright.async_api import async_playwright, Browser, BrowserContext
+import asyncio
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from loguru import logger
 from src.config import Config
 
+
+@dataclass
+class BrowserEndpoint:
+    """One Chrome instance reachable over CDP, and the tabs we placed on it."""
+    url: str
+    browser: Optional[Browser] = None
+    context: Optional[BrowserContext] = None
+    pages: Set[Page] = field(default_factory=set)
+    healthy: bool = False
+
+
 class BrowserCore:
-    def __init__(self):
+    def __init__(self, cdp_urls: Optional[List[str]] = None):
         self.playwright = None
-        self.browser: Optional[Browser] = None
-        self.context: Optional[BrowserContext] = None
+        self.endpoints = [BrowserEndpoint(url) for url in (cdp_urls or Config.CDP_URLS)]
+        self._health_task: Optional[asyncio.Task] = None
+        # Several accounts can share one connection; only the first connect() does the work
+        self._connect_lock = asyncio.Lock()
+
+    @property
+    def context(self) -> Optional[BrowserContext]:
+        """Default context of the first healthy endpoint."""
+        for endpoint in self.endpoints:
+            if endpoint.healthy:
+                return endpoint.context
+        return None
 
     async def connect(self):
-        """Connects to the existing Chrome instance via CDP."""
+        """Connects to every configured Chrome instance via CDP (once)."""
+        async with self._connect_lock:
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+                await asyncio.gather(*(self._connect_endpoint(ep) for ep in self.endpoints))
+                if any(ep.healthy for ep in self.endpoints):
+                    self._health_task = asyncio.create_task(self._health_loop())
+
+        healthy = [ep for ep in self.endpoints if ep.healthy]
+        if not healthy:
+            raise RuntimeError("Failed to connect to any Chrome endpoint.")
+        logger.success(
+            f"Connected to {len(healthy)}/{len(self.endpoints)} Chrome endpoint(s)."
+        )
+
+    async def _connect_endpoint(self, endpoint: BrowserEndpoint):
         try:
-            self.playwright = await async_playwright().start()
-            logger.info(f"Connecting to Chrome at {Config.CDP_URL}...")
-            self.browser = await self.playwright.chromium.connect_over_cdp(Config.CDP_URL)
-            self.context = self.browser.contexts[0] # Use the default context
-            logger.success("Connected to Chrome successfully.")
+            logger.info(f"Connecting to Chrome at {endpoint.url}...")
+            endpoint.browser = await self.playwright.chromium.connect_over_cdp(endpoint.url)
+            contexts = endpoint.browser.contexts
+            # Use the default context (the signed-in profile)
+            endpoint.context = contexts[0] if contexts else await endpoint.browser.new_context()
+            endpoint.healthy = True
+            endpoint.browser.on(
+                "disconnected", lambda _: self._mark_unhealthy(endpoint, "disconnected")
+            )
+            logger.success(f"Connected to Chrome at {endpoint.url}.")
         except Exception as e:
-            logger.error(f"Failed to connect to Chrome: {e}")
-            raise
+            logger.error(f"Failed to connect to Chrome at {endpoint.url}: {e}")
+            endpoint.healthy = False
+
+    def _mark_unhealthy(self, endpoint: BrowserEndpoint, reason: str):
+        if endpoint.healthy:
+            logger.error(
+                f"Chrome endpoint {endpoint.url} {reason}; "
+                f"no new tabs will be placed on it ({len(endpoint.pages)} tabs affected)."
+            )
+        endpoint.healthy = False
+
+    async def new_page(self) -> Page:
+        """Opens a tab on the healthy endpoint with the fewest tabs."""
+        candidates = sorted(
+            (ep for ep in self.endpoints if ep.healthy), key=lambda ep: len(ep.pages)
+        )
+        for endpoint in candidates:
+            try:
+                page = await endpoint.context.new_page()
+            except Exception as e:
+                self._mark_unhealthy(endpoint, f"failed to open a tab ({e})")
+                continue
+            self._track(endpoint, page)
+            logger.debug(f"Placed tab on {endpoint.url} ({len(endpoint.pages)} open).")
+            return page
+        raise RuntimeError("No healthy Chrome endpoint available for a new tab.")
+
+    def adopt_pages(self, base_url: Optional[str] = None) -> List[Page]:
+        """
+        Claims the app tabs already open in the healthy endpoints' contexts
+        (e.g. left over from a previous run), so they count towards placement.
+        """
+        base_url = base_url or Config.BASE_URL
+        adopted = []
+        for endpoint in self.endpoints:
+            if not endpoint.healthy:
+                continue
+            for page in endpoint.context.pages:
+                if page in endpoint.pages or page.is_closed():
+                    continue
+                # Same account slot only (/u/N/ in the URL)
+                if page.url.startswith(base_url):
+                    self._track(endpoint, page)
+                    adopted.append(page)
+        return adopted
+
+    def _track(self, endpoint: BrowserEndpoint, page: Page):
+        endpoint.pages.add(page)
+        page.on("close", lambda p, ep=endpoint: ep.pages.discard(p))
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(Config.CDP_HEALTH_INTERVAL)
+            await asyncio.gather(*(self._check_endpoint(ep) for ep in self.endpoints))
+
+    async def _check_endpoint(self, endpoint: BrowserEndpoint):
+        if not endpoint.healthy:
+            # Dropped endpoints get a reconnect attempt on every round
+            if endpoint.browser is None or not endpoint.browser.is_connected():
+                await self._connect_endpoint(endpoint)
+            return
+
+        try:
+            session = await endpoint.browser.new_browser_cdp_session()
+            await asyncio.wait_for(
+                session.send("Browser.getVersion"), Config.CDP_HEALTH_TIMEOUT
+            )
+            await session.detach()
+        except Exception as e:
+            self._mark_unhealthy(endpoint, f"failed health check ({e!r})")
 
     async def close(self):
-        if self.browser:
-            await self.browser.close()
+        if self._health_task:
+            self._health_task.cancel()
+        for endpoint in self.endpoints:
+            if endpoint.browser and endpoint.browser.is_connected():
+                await endpoint.browser.close()
         if self.playwright:
-            await self.playwright.stop()
\ No newline at end of file
+            await self.playwright.stop()
+            self.playwright = None
+
@@ -0,0 +1,121 @@
+import statistics
+from dataclasses import dataclass
+from typing import List, Optional
+
+from loguru import logger
+
+from src.config import Config
+
+try:
+    import psutil
+except ImportError:  # optional; /proc/meminfo is used instead
+    psutil = None
+
+
+@dataclass
+class Observation:
+    latency: float
+    error: bool
+    rate_limited: bool
+
+
+class ConcurrencyController:
+    """
+    Additive-increase / multiplicative-decrease controller for the number of worker tabs.
+
+    Workers report every prompt through `record`. The orchestrator calls `evaluate`
+    periodically; it looks at the observations since the last decision and moves
+    `target` up by CONCURRENCY_INCREASE_STEP when everything is healthy, or
+    multiplies it by CONCURRENCY_DECREASE_FACTOR on rate limits, errors,
+    rising latency or memory pressure.
+    """
+
+    def __init__(
+        self,
+        initial: Optional[int] = None,
+        minimum: Optional[int] = None,
+        maximum: Optional[int] = None,
+    ):
+        self.minimum = minimum or Config.CONCURRENCY_MIN
+        self.maximum = maximum or Config.CONCURRENCY_MAX
+        initial = initial or Config.CONCURRENCY_LIMIT
+        self.target = max(self.minimum, min(initial, self.maximum))
+        self._window: List[Observation] = []
+        self._baseline_latency: Optional[float] = None
+
+    def record(self, latency: float, error: bool = False, rate_limited: bool = False):
+        self._window.append(Observation(latency, error, rate_limited))
+
+    def record_rate_limit(self):
+        """Rate-limit signals seen outside a prompt (e.g. before submitting)."""
+        self._window.append(Observation(0.0, False, True))
+
+    def evaluate(self) -> int:
+        """Makes one AIMD decision from the current window and returns the new target."""
+        window, self._window = self._window, []
+        free_mb = available_memory_mb()
+
+        latencies = [o.latency for o in window if not o.error and not o.rate_limited]
+        p50 = statistics.median(latencies) if latencies else None
+        error_rate = sum(o.error for o in window) / len(window) if window else 0.0
+        rate_limited = any(o.rate_limited for o in window)
+
+        if rate_limited:
+            decision, reason = "decrease", "rate limited"
+        elif free_mb is not None and free_mb < Config.CONCURRENCY_MIN_FREE_MEMORY_MB:
+            decision, reason = "decrease", "low memory"
+        elif len(window) < Config.CONCURRENCY_MIN_SAMPLES:
+            decision, reason = "hold", "not enough samples"
+            # Keep collecting towards the next decision
+            self._window = window
+        elif error_rate > Config.CONCURRENCY_MAX_ERROR_RATE:
+            decision, reason = "decrease", "error rate"
+        elif (
+            p50 is not None
+            and self._baseline_latency is not None
+            and p50 > self._baseline_latency * Config.CONCURRENCY_LATENCY_TOLERANCE
+        ):
+            decision, reason = "decrease", "latency"
+        else:
+            decision, reason = "increase", "healthy"
+
+        # The baseline tracks the best latency seen, drifting up slowly so it can recover
+        if p50 is not None and decision != "hold":
+            if self._baseline_latency is None or p50 < self._baseline_latency:
+                self._baseline_latency = p50
+            else:
+                self._baseline_latency = self._baseline_latency * 0.9 + p50 * 0.1
+
+        old = self.target
+        if decision == "increase":
+            self.target = min(self.maximum, self.target + Config.CONCURRENCY_INCREASE_STEP)
+        elif decision == "decrease":
+            self.target = max(
+                self.minimum, int(self.target * Config.CONCURRENCY_DECREASE_FACTOR)
+            )
+
+        logger.info(
+            f"[Concurrency] {decision} {old} -> {self.target} ({reason}; "
+            f"samples={len(window)}, p50={_fmt(p50)}s, "
+            f"baseline={_fmt(self._baseline_latency)}s, errors={error_rate:.0%}, "
+            f"free_mem={_fmt(free_mb, 0)}MB)"
+        )
+        return self.target
+
+
+def available_memory_mb() -> Optional[float]:
+    """Host memory available for new tabs, or None if it can't be determined."""
+    if psutil is not None:
+        return psutil.virtual_memory().available / (1024 * 1024)
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _fmt(value: Optional[float], digits: int = 1) -> str:
+    return "n/a" if value is None else f"{value:.{digits}f}"
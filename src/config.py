@@ -3,10 +3,112 @@ import os
 
 class Config:
     CDP_URL = "http://localhost:9222"
-    CONCURRENCY_LIMIT = 4
+    # Every Chrome instance in the pool (e.g. several --remote-debugging-port's);
+    # tabs are placed on the least-loaded healthy one
+    CDP_URLS = [CDP_URL]
+    CDP_HEALTH_INTERVAL = 15  # seconds
+    CDP_HEALTH_TIMEOUT = 5  # seconds
+    CONCURRENCY_LIMIT = 4  # initial number of worker tabs
     OUTPUT_FILE = "_2initial_prompts_outputs.json"
     BASE_URL = "https://gemini.google.com/u/1/app"
 
+    # --- ACCOUNTS ---
+    # Signed-in account slots to spread the prompts over, each with its own tabs,
+    # concurrency cap and pacer (a throttled account pauses while the others keep
+    # going). Accounts without "cdp_urls" use CDP_URLS, e.g. /u/0 and /u/1 of one
+    # profile; separate profiles get their own Chrome. None = BASE_URL only.
+    # ACCOUNTS = [
+    #     {"name": "u0", "base_url": "https://gemini.google.com/u/0/app", "concurrency": 4},
+    #     {"name": "u1", "base_url": "https://gemini.google.com/u/1/app", "concurrency": 4},
+    #     {"name": "other", "base_url": "https://gemini.google.com/app",
+    #      "cdp_urls": ["http://localhost:9223"], "concurrency": 2, "rate_per_minute": 10},
+    # ]
+    ACCOUNTS = None
+
+    # --- WORK QUEUE ---
+    # Prompts are streamed into a bounded queue in batches of PROMPT_READ_BATCH
+    QUEUE_MAXSIZE = 64
+    PROMPT_READ_BATCH = 256
+
+    # --- SCHEDULING ---
+    # The queued window is handed out longest-predicted-first, so long prompts
+    # don't end up last on one tab; a larger QUEUE_MAXSIZE gives it more to sort.
+    # Cost = base + per-char * prompt length, refitted to the run's latencies.
+    SCHEDULER_COST_ORDER = True  # False: plain FIFO
+    SCHEDULER_REPORT_INTERVAL = 60  # seconds between remaining-time reports
+    COST_MODEL_PRIOR_BASE = 20.0  # seconds per prompt before any observation
+    COST_MODEL_PRIOR_PER_KCHAR = 2.0
+    COST_MODEL_MIN_SAMPLES = 5
+    COST_MODEL_DECAY = 0.98  # weight kept by older observations per new one
+
+    # --- ADAPTIVE CONCURRENCY (AIMD) ---
+    # Worker tabs are added/removed at runtime within [CONCURRENCY_MIN, CONCURRENCY_MAX]
+    CONCURRENCY_ADAPTIVE = True
+    CONCURRENCY_MIN = 1
+    CONCURRENCY_MAX = 12
+    CONCURRENCY_INTERVAL = 30  # seconds between decisions
+    CONCURRENCY_MIN_SAMPLES = 4
+    CONCURRENCY_INCREASE_STEP = 1
+    CONCURRENCY_DECREASE_FACTOR = 0.5
+    CONCURRENCY_MAX_ERROR_RATE = 0.2
+    CONCURRENCY_LATENCY_TOLERANCE = 1.5  # decrease when p50 exceeds baseline by this factor
+    CONCURRENCY_MIN_FREE_MEMORY_MB = 1024
+
+    # --- TAB POOL ---
+    # Tabs are connected to, loaded and set up while prompts are still loading,
+    # and Gemini tabs already open in the browser are taken over instead of
+    # opening new ones, so workers start on tabs that are ready for a prompt.
+    TAB_POOL_PREWARM = True  # False: don't touch the browser until a prompt is pending
+    TAB_POOL_ADOPT_EXISTING = True
+    TAB_POOL_SPARES = 1  # extra ready tabs kept for respawns and scale-ups
+
+    # --- WORKER SUPERVISION ---
+    # Crashed/closed tabs are replaced after a delay that doubles with consecutive crashes
+    WORKER_RESPAWN_DELAY = 2  # seconds
+    WORKER_MAX_RESPAWN_DELAY = 60  # seconds
+
+    # --- HEDGING (opt-in) ---
+    # A prompt running past the HEDGE_PERCENTILE of recent successful durations is
+    # sent again on an idle tab; the first good reply is saved, the other cancelled
+    HEDGE_ENABLED = False
+    HEDGE_PERCENTILE = 95
+    HEDGE_MIN_DELAY = 30  # seconds; never hedge earlier than this
+    HEDGE_MIN_SAMPLES = 20
+    HEDGE_WINDOW = 200  # recent durations the percentile is taken over
+    HEDGE_MAX_EXTRA_LOAD = 0.05  # hedges per prompt started
+    HEDGE_CHECK_INTERVAL = 2  # seconds
+
+    # --- RESULT LOG ---
+    # Results are appended here during a run; OUTPUT_FILE is exported from it at the end
+    RESULT_LOG_FILE = "_2initial_prompts_outputs.jsonl"
+    RESULT_INDEX_FILE = "_2initial_prompts_outputs.idx"
+    RESULT_FLUSH_BATCH = 256
+
+    # --- RESPONSE CACHE ---
+    # Outputs keyed by a hash of mode + prompt text, so identical prompts are never
+    # generated twice (new ID schemes, re-filtered datasets, duplicate rows)
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_FILE = "_2response_cache.sqlite"
+    RESPONSE_CACHE_MAX_MB = 512
+    RESPONSE_CACHE_MAX_AGE_DAYS = 90
+
+    # --- PROMPT PACKING (opt-in) ---
+    # Several dataset rows (their "sample" fields) go into one prompt built from
+    # PACK_TEMPLATE_FILE; the JSON array in the reply is split back per ID.
+    # Rows missing from a reply are retried in packs of half the size.
+    PACK_PROMPTS = False
+    PACK_TEMPLATE_FILE = "_0initial_prompt_pack.txt"
+    PACK_SIZE = 4  # initial rows per prompt
+    PACK_ADAPTIVE = True
+    PACK_MAX_SIZE = 16
+    PACK_GROW_AFTER = 3  # fully answered packs in a row before growing by one
+
+    # --- PIPELINE (python -m src.pipeline) ---
+    # Input/output fingerprints of the last successful run of each stage
+    PIPELINE_STATE_FILE = "_pipeline_state.json"
+    # Parsed outputs handed from convert to join in memory, up to this many rows
+    PIPELINE_MAX_RECORDS_IN_MEMORY = 200_000
+
     # --- USER AGENT ---
     # We define a custom User Agent to be injected into the browser
     USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
@@ -29,10 +131,112 @@ class Config:
         "div[data-placeholder='Ask questions in a temporary chat']"
     )
 
+    # --- MODE / NEW CHAT ---
+    # The model picker label tells us whether Thinking mode is already active
+    SELECTOR_MODE_LABEL = "button[data-test-id='bard-mode-menu-button']"
+    TEXT_THINKING_MODE_LABEL = "Thinking"
+    SELECTOR_NEW_CHAT_BUTTON = "[data-test-id='new-chat-button']"
+
     # --- RESPONSE HANDLING ---
     SELECTOR_SEND_BUTTON = "button[aria-label*='Send']"
     SELECTOR_STOP_GENERATION = "button[aria-label*='Stop']"
+    SELECTOR_RESPONSE = ".markdown"
+    SELECTOR_USER_QUERY = "user-query"  # a sent prompt's turn in the conversation
+    # Fill, send, wait and extract in one evaluate call (src/page_driver.py); a prompt
+    # falls back to the step-by-step locators when the script reports DOM drift
+    PAGE_DRIVER_ENABLED = True
+    # Generation counts as finished once Stop is gone and the text is quiet this long (ms)
+    RESPONSE_SETTLE_MS = 800
+    # Replies must contain a JSON object with these keys; anything else is retried
+    VALIDATE_OUTPUT = True
+    RESPONSE_EXPECTED_KEYS = ["principle_id", "justification_reasoning", "evidence_quote", "is_ableist"]
+
+    # --- RETRIES ---
+    # Failed prompts are retried with jittered exponential backoff, preferably on another tab;
+    # after RETRY_MAX_ATTEMPTS they go to DEAD_LETTER_FILE instead of the results
+    RETRY_MAX_ATTEMPTS = 4
+    # Tab crashes don't use up attempts; only a prompt that keeps taking its tab
+    # down with it is dead-lettered, after this many
+    RETRY_MAX_TAB_LOSSES = 10
+    RETRY_BASE_DELAY = 5  # seconds
+    RETRY_RATE_LIMIT_DELAY = 60  # seconds
+    RETRY_MAX_DELAY = 300  # seconds
+    RETRYABLE_FAILURES = [
+        "timeout",
+        "empty_extraction",
+        "malformed_output",
+        "ui_drift",
+        "rate_limit",
+        "unknown",
+    ]
+    DEAD_LETTER_FILE = "_2dead_letter_prompts.jsonl"
+    # Page text that means the account is being throttled
+    RATE_LIMIT_TEXT_PATTERNS = [
+        "reached your limit",
+        "too many requests",
+        "try again later",
+        "quota",
+    ]
+    # Where throttling notices show up (banners, snackbars, error cards)
+    SELECTOR_RATE_LIMIT_CONTAINERS = [
+        "[role='alert']",
+        "mat-snack-bar-container",
+        "simple-snack-bar",
+        "error-message",
+    ]
+
+    # --- PACING ---
+    # Token bucket shared by all tabs; None = unpaced until the first throttle
+    PACER_RATE_PER_MINUTE = None
+    PACER_BURST = 4
+    PACER_MIN_RATE = 1.0  # prompts/min
+    PACER_BACKOFF_FACTOR = 0.5
+    PACER_RECOVERY_STEP = 0.25  # prompts/min added per success
+    PACER_COOLDOWN = 60  # seconds the whole pool pauses on the first throttle
+    PACER_MAX_COOLDOWN = 900
+
+    # --- RESOURCE BLOCKING (opt-in) ---
+    # Worker tabs abort requests we don't need and serve repeat static assets from memory.
+    # Add "font" to BLOCKED_RESOURCE_TYPES for more savings; icons then render as text.
+    BLOCK_RESOURCES = False
+    BLOCKED_RESOURCE_TYPES = ["image", "media"]
+    BLOCKED_URL_PATTERNS = [
+        r"google-analytics\.com",
+        r"googletagmanager\.com",
+        r"doubleclick\.net",
+        r"play\.google\.com/log",
+        r"/gen_204",
+        r"/log\?format=",
+        r"lh3\.googleusercontent\.com",  # avatars
+    ]
+    # Never blocked or cached (the chat backend itself)
+    ALLOWED_URL_PATTERNS = [r"BardChatUi", r"batchexecute", r"StreamGenerate"]
+    CACHED_RESOURCE_TYPES = ["script", "stylesheet", "font"]
+    RESOURCE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    # Also count bytes actually transferred (one extra CDP call per request)
+    RESOURCE_MEASURE_TRANSFER = False
+
+    # --- METRICS ---
+    # Prometheus text at http://127.0.0.1:METRICS_PORT/metrics (None disables the endpoint)
+    METRICS_PORT = 9464
+    METRICS_SUMMARY_FILE = "_2run_metrics.json"
+    METRICS_WINDOW = 2048  # samples kept per histogram for percentiles
+    METRICS_SLOWEST_TASKS = 20
 
     # Timeouts
     TIMEOUT_PAGE_LOAD = 30000
     TIMEOUT_GENERATION = 120000
+
+    # --- READINESS (ms) ---
+    # Upper bound per step; each step moves on as soon as its UI signal appears
+    READINESS_DEFAULT_TIMEOUT = 10000
+    READINESS_TIMEOUTS = {
+        "app_ready": 20000,
+        "expand_menu": 10000,
+        "temporary_chat": 10000,
+        "thinking_mode": 5000,
+        "prompt_input": 5000,
+        "generation_start": 5000,
+        "soft_reset": 5000,
+        "adopt": 3000,  # an already-open tab either has its input up or gets reloaded
+    }
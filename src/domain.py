@@ -1,14 +1,72 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+@dataclass
+class PackMember:
+    """One dataset row inside a packed prompt."""
+    unique_id: str
+    text: str  # its standalone prompt, used once a pack is split down to one row
+    sample: Dict[str, Any]
+    cache_key: Optional[str] = None
+    duplicates: List[str] = field(default_factory=list)
+    dead_lettered: bool = False
 
 @dataclass
 class PromptTask:
     unique_id: str
     text: str
+    attempts: int = 0
+    throttles: int = 0  # rate-limited tries; retried without using up attempts
+    losses: int = 0  # tries cut short by a crashed tab or worker; not attempts either
+    failed_workers: Set[int] = field(default_factory=set)
+    deferred: bool = False  # already handed back once to reach a different tab
+    cache_key: Optional[str] = None  # response_cache key of the prompt text
+    duplicates: List[str] = field(default_factory=list)  # other IDs with the same prompt text
+    dead_lettered: bool = False
+    members: List[PackMember] = field(default_factory=list)  # set when several rows share one prompt
+    predicted_cost: float = 0.0  # seconds of tab time, set by the scheduler when queued
+    race: Optional["HedgeRace"] = None  # set while a hedged twin runs the same prompt
+
+    def result_keys(self) -> List[str]:
+        """Every dataset ID this task answers."""
+        if self.members:
+            return [key for m in self.members for key in (m.unique_id, *m.duplicates)]
+        return [self.unique_id, *self.duplicates]
+
+@dataclass
+class HedgeRace:
+    """A straggling prompt and its twin on a second tab; the first good reply wins."""
+    primary: PromptTask
+    running: int = 2  # attempts not yet finished
+    won: bool = False
 
 @dataclass
 class ScrapeResult:
     unique_id: str
     prompt_text: str
     output: str
-    status: str = "success" # success or error
\ No newline at end of file
+    status: str = "success" # success or error
+    error_kind: Optional[str] = None  # a retry.FailureKind value when status is error
+
+@dataclass
+class TabState:
+    """UI settings last confirmed on a tab; repaired only when they drift."""
+    menu_expanded: bool = False
+    temporary_chat: bool = False
+    thinking_mode: bool = False
+
+    def is_ready(self) -> bool:
+        return self.menu_expanded and self.temporary_chat and self.thinking_mode
+
+    def invalidate(self):
+        self.menu_expanded = self.temporary_chat = self.thinking_mode = False
+
+@dataclass
+class ParsedOutput:
+    """A model reply reduced to its JSON payload; `error` says why it was rejected."""
+    value: Any = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
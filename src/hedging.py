@@ -0,0 +1,93 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.config import Config
+from src.domain import HedgeRace, PromptTask
+from src.metrics import metrics
+
+
+class Hedger:
+    """
+    Opt-in duplicate execution for straggling prompts (Config.HEDGE_ENABLED).
+
+    Workers register the prompt they are generating. A prompt running longer
+    than the observed HEDGE_PERCENTILE of successful durations gets a twin task
+    that the orchestrator queues for an idle tab; both then share a HedgeRace.
+    The first good reply wins and the other generation is cancelled. Hedges
+    are capped at HEDGE_MAX_EXTRA_LOAD times the number of prompts started.
+    """
+
+    def __init__(self):
+        self._durations: Deque[float] = deque(maxlen=Config.HEDGE_WINDOW)
+        self._running: Dict[int, Tuple[PromptTask, float, asyncio.Task]] = {}
+        self.started = 0
+        self.hedged = 0
+
+    def record(self, seconds: float):
+        """Duration of a successful prompt; the threshold is learned from these."""
+        self._durations.append(seconds)
+
+    def threshold(self) -> Optional[float]:
+        if len(self._durations) < Config.HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._durations)
+        index = min(len(ordered) - 1, int(len(ordered) * Config.HEDGE_PERCENTILE / 100))
+        return max(Config.HEDGE_MIN_DELAY, ordered[index])
+
+    # --- Called by workers ---
+
+    def track(self, worker_id: int, task: PromptTask, call: asyncio.Task):
+        self._running[worker_id] = (task, time.monotonic(), call)
+        self.started += 1
+
+    def untrack(self, worker_id: int):
+        self._running.pop(worker_id, None)
+
+    def cancel_twin(self, task: PromptTask):
+        """Stops the other generation of the task's race, if it is running."""
+        for worker_id, (other, _, call) in self._running.items():
+            if other is not task and other.race is task.race and not call.done():
+                logger.info(f"[Worker {worker_id}] {other.unique_id} answered by its twin; cancelling.")
+                metrics.inc("scraper_hedges_cancelled_total")
+                call.cancel()
+
+    # --- Called by the orchestrator's hedge loop ---
+
+    def stragglers(self) -> List[PromptTask]:
+        """Running prompts past the threshold that may still be hedged, slowest first."""
+        threshold = self.threshold()
+        if threshold is None:
+            return []
+        now = time.monotonic()
+        late = [
+            (now - started, task)
+            for task, started, _ in self._running.values()
+            if now - started > threshold and task.race is None and not task.members
+        ]
+        return [task for _, task in sorted(late, key=lambda t: t[0], reverse=True)]
+
+    def within_budget(self) -> bool:
+        return self.hedged < Config.HEDGE_MAX_EXTRA_LOAD * self.started
+
+    def hedge(self, task: PromptTask) -> PromptTask:
+        """Starts a race for `task` and returns the twin to queue."""
+        race = HedgeRace(primary=task)
+        task.race = race
+        twin = PromptTask(
+            unique_id=task.unique_id,
+            text=task.text,
+            cache_key=task.cache_key,
+            duplicates=task.duplicates,
+            race=race,
+        )
+        self.hedged += 1
+        metrics.inc("scraper_hedges_total")
+        logger.info(
+            f"Hedging {task.unique_id} on another tab (running past {self.threshold():.0f}s; "
+            f"{self.hedged}/{self.started} prompts hedged)."
+        )
+        return twin
@@ -1,40 +1,29 @@
 import asyncio
-import json
 import os
 import sys
+from typing import Dict, Iterator
+
 from loguru import logger
 from src.orchestrator import Orchestrator
+from src.prompt_source import iter_prompts
 
-# File path for prompts
-PROMPTS_FILE = "_1prompts.json"
+# File path for prompts (a JSON list or JSONL, read lazily)
+PROMPTS_FILE = "_1prompts.jsonl"
 
-def load_prompts(file_path: str):
+def load_prompts(file_path: str) -> Iterator[Dict]:
     if not os.path.exists(file_path):
         logger.error(f"File '{file_path}' not found. Please create it.")
         sys.exit(1)
 
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-            if not isinstance(data, list):
-                logger.error(f"Invalid format in '{file_path}'. Expected a JSON list.")
-                sys.exit(1)
-                
-            logger.info(f"Successfully loaded {len(data)} prompts from {file_path}.")
-            return data
-
-    except json.JSONDecodeError:
-        logger.error(f"Could not decode JSON in '{file_path}'. Check syntax.")
-        sys.exit(1)
-    except Exception as e:
-        logger.error(f"Unexpected error reading prompts: {e}")
-        sys.exit(1)
+    # Rows are parsed on demand by the orchestrator's producer,
+    # so decoding errors surface there instead of up front.
+    logger.info(f"Streaming prompts from {file_path}.")
+    return iter_prompts(file_path)
 
-async def main():
-    PROMPT_LIST = load_prompts(PROMPTS_FILE)
+async def main(prompts_file: str = PROMPTS_FILE):
+    PROMPT_SOURCE = load_prompts(prompts_file)
     
-    orchestrator = Orchestrator(PROMPT_LIST)
+    orchestrator = Orchestrator(PROMPT_SOURCE)
     
     await orchestrator.run()
 
@@ -42,4 +31,4 @@ if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        logger.warning("Scraper stopped by user.")
\ No newline at end of file
+        logger.warning("Scraper stopped by user.")
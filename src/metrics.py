@@ -0,0 +1,301 @@
+import asyncio
+import contextvars
+import json
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.config import Config
+
+# Prometheus histogram buckets, in seconds
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+# The prompt a worker is currently processing, so handler phases land on its trace
+_current_trace: contextvars.ContextVar[Optional["TaskTrace"]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+
+
+class Histogram:
+    """Cumulative buckets for export plus a rolling window for percentiles."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.window: Deque[float] = deque(maxlen=Config.METRICS_WINDOW)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.window.append(value)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def percentile(self, pct: float) -> float:
+        if not self.window:
+            return 0.0
+        ordered = sorted(self.window)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 3),
+            "mean_s": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_s": round(self.percentile(50), 3),
+            "p90_s": round(self.percentile(90), 3),
+            "p99_s": round(self.percentile(99), 3),
+            "max_s": round(max(self.window, default=0.0), 3),
+        }
+
+
+@dataclass
+class TaskTrace:
+    """Phase timings of one prompt on one worker."""
+    task_id: str
+    worker_id: int
+    started: float = field(default_factory=time.monotonic)
+    phases: Dict[str, float] = field(default_factory=dict)
+    status: str = "running"
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+
+class Metrics:
+    """
+    In-process metrics registry: counters, callback gauges and per-phase
+    latency histograms, exported as Prometheus text and a JSON run summary.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.counters: Dict[Tuple[str, LabelSet], float] = defaultdict(float)
+        self.histograms: Dict[Tuple[str, LabelSet], Histogram] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+        self.completions: Deque[float] = deque(maxlen=Config.METRICS_WINDOW)
+        self.slowest: List[TaskTrace] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # --- Recording ---
+
+    def inc(self, name: str, value: float = 1, **labels):
+        self.counters[(name, _labels(labels))] += value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _labels(labels))
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        self.histograms[key].observe(value)
+
+    def register_gauge(self, name: str, read: Callable[[], float]):
+        """Gauges are read lazily at export time."""
+        self.gauges[name] = read
+
+    @contextmanager
+    def phase(self, name: str, worker_id: int):
+        """Times a block as one phase of the current prompt on this worker."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase(name, worker_id, time.monotonic() - started)
+
+    def add_phase(self, name: str, worker_id: int, elapsed: float):
+        """Records a phase timed elsewhere, e.g. inside the page."""
+        self.observe("scraper_phase_seconds", elapsed, phase=name, worker=str(worker_id))
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.phases[name] = trace.phases.get(name, 0.0) + elapsed
+
+    def timed(self, name: str):
+        """Decorator form of `phase` for handler coroutines (uses self.worker_id)."""
+
+        def decorator(method):
+            @wraps(method)
+            async def wrapper(handler, *args, **kwargs):
+                with self.phase(name, handler.worker_id):
+                    return await method(handler, *args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def begin_task(self, task_id: str, worker_id: int) -> TaskTrace:
+        trace = TaskTrace(task_id, worker_id)
+        _current_trace.set(trace)
+        return trace
+
+    def end_task(self, trace: TaskTrace, status: str):
+        _current_trace.set(None)
+        trace.status = status
+        elapsed = time.monotonic() - trace.started
+        self.observe("scraper_task_seconds", elapsed, status=status)
+        self.inc("scraper_prompts_total", status=status)
+        if status == "success":
+            self.completions.append(time.monotonic())
+
+        # Keep only the slowest traces around for the summary
+        self.slowest.append(trace)
+        self.slowest.sort(key=lambda t: t.total, reverse=True)
+        del self.slowest[Config.METRICS_SLOWEST_TASKS :]
+
+    # --- Export ---
+
+    def throughput(self) -> Dict[str, float]:
+        elapsed = time.monotonic() - self.started
+        done = self.counters.get(("scraper_prompts_total", (("status", "success"),)), 0)
+        recent = [t for t in self.completions if time.monotonic() - t <= 60]
+        return {
+            "overall_per_min": round(done / elapsed * 60, 3) if elapsed else 0.0,
+            "last_minute": len(recent),
+        }
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for (name, labels), value in sorted(self.counters.items()):
+            lines.append(f"{name}{_fmt_labels(labels)} {value}")
+        for name, read in sorted(self.gauges.items()):
+            try:
+                lines.append(f"{name} {float(read())}")
+            except Exception:
+                continue
+        for (name, labels), hist in sorted(self.histograms.items()):
+            for bound, count in zip(BUCKETS, hist.counts):
+                bucket_labels = labels + (("le", str(bound)),)
+                lines.append(f"{name}_bucket{_fmt_labels(bucket_labels)} {count}")
+            inf_labels = labels + (("le", "+Inf"),)
+            lines.append(f"{name}_bucket{_fmt_labels(inf_labels)} {hist.count}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {hist.total}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {hist.count}")
+        throughput = self.throughput()
+        lines.append(f"scraper_throughput_per_minute {throughput['overall_per_min']}")
+        return "\n".join(lines) + "\n"
+
+    def phase_summary(self) -> Dict[str, Dict]:
+        """Per-phase latency across all workers."""
+        merged: Dict[str, Histogram] = {}
+        for (name, labels), hist in self.histograms.items():
+            if name != "scraper_phase_seconds":
+                continue
+            phase = dict(labels)["phase"]
+            target = merged.setdefault(phase, Histogram())
+            for value in hist.window:
+                target.window.append(value)
+            target.count += hist.count
+            target.total += hist.total
+        return {phase: hist.summary() for phase, hist in sorted(merged.items())}
+
+    def summary(self) -> Dict:
+        workers: Dict[str, Dict[str, float]] = defaultdict(dict)
+        for (name, labels), hist in self.histograms.items():
+            if name == "scraper_phase_seconds":
+                label_map = dict(labels)
+                workers[label_map["worker"]][label_map["phase"]] = round(hist.total, 3)
+
+        return {
+            "elapsed_s": round(time.monotonic() - self.started, 3),
+            "throughput": self.throughput(),
+            "counters": {
+                f"{name}{_fmt_labels(labels)}": value
+                for (name, labels), value in sorted(self.counters.items())
+            },
+            "gauges": {name: _safe_read(read) for name, read in sorted(self.gauges.items())},
+            "tasks": {
+                dict(labels)["status"]: hist.summary()
+                for (name, labels), hist in self.histograms.items()
+                if name == "scraper_task_seconds"
+            },
+            "phases": self.phase_summary(),
+            "phase_seconds_by_worker": dict(sorted(workers.items())),
+            "slowest_tasks": [
+                {
+                    "id": t.task_id,
+                    "worker": t.worker_id,
+                    "status": t.status,
+                    "phases": {k: round(v, 3) for k, v in t.phases.items()},
+                }
+                for t in self.slowest
+            ],
+        }
+
+    def write_summary(self, file_path: Optional[str] = None):
+        file_path = file_path or Config.METRICS_SUMMARY_FILE
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=4)
+        logger.info(f"Run metrics written to {file_path}.")
+
+    # --- Prometheus endpoint ---
+
+    async def serve(self, host: str = "127.0.0.1", port: Optional[int] = None):
+        port = port if port is not None else Config.METRICS_PORT
+        if not port:
+            return
+        try:
+            self._server = await asyncio.start_server(self._handle_scrape, host, port)
+            logger.info(f"Metrics available at http://{host}:{port}/metrics")
+        except OSError as e:
+            logger.warning(f"Could not start metrics endpoint on port {port}: {e}")
+
+    async def stop_serving(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_scrape(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readline()
+            # Drain headers; the body of a GET is empty
+            while (await reader.readline()).strip():
+                pass
+            path = request.split()[1].decode() if len(request.split()) > 1 else "/"
+            if path.startswith("/summary"):
+                body, content_type = json.dumps(self.summary()), "application/json"
+            else:
+                body, content_type = self.render_prometheus(), "text/plain; version=0.0.4"
+            payload = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode()
+                + payload
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.debug(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+
+
+def _labels(labels: Dict[str, str]) -> LabelSet:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def _safe_read(read: Callable[[], float]) -> Optional[float]:
+    try:
+        return float(read())
+    except Exception:
+        return None
+
+
+metrics = Metrics()
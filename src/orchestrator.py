@@ -1,159 +1,589 @@
 import asyncio
-import json
-import os
-from typing import Dict, List, Set
+import time
+from typing import Dict, Iterable, List, Optional, Set, Union
 
 from loguru import logger
 
+from src.accounts import AccountPool, load_accounts
 from src.browser_core import BrowserCore
+from src.concurrency import ConcurrencyController
 from src.config import Config
-from src.domain import PromptTask
+from src import packing
+from src.domain import PackMember, PromptTask, ScrapeResult
+from src.hedging import Hedger
+from src.metrics import metrics
 from src.page_handler import GeminiTabHandler
+from src.resource_blocker import ResourceBlocker
+from src.prompt_source import take
+from src.response_cache import ResponseCache, cache_key
+from src.response_parser import parse_response
+from src.result_store import ResultStore
+from src.retry import FailureKind, RetryScheduler, classify_result
+from src.scheduler import CompletionForecast, CostModel, CostQueue
+from src.supervisor import WorkerSupervisor
 
 
 class Orchestrator:
-    def __init__(self, prompts: List[Dict]):
-        self.queue = asyncio.Queue()
+    def __init__(self, prompts: Iterable[Dict]):
+        # Bounded so the producer only ever holds a small window of the dataset;
+        # within it the most expensive prompts go first
+        self.cost_model = CostModel()
+        self.queue = CostQueue(self.cost_model, maxsize=Config.QUEUE_MAXSIZE)
+        self.forecast = CompletionForecast(self.queue)
+        self.hedger = Hedger() if Config.HEDGE_ENABLED else None
         self.raw_prompts = prompts
+        self.has_work = asyncio.Event()
         self.browser_core = BrowserCore()
-        self.file_lock = asyncio.Lock()
+        # Each account slot has its own tabs, concurrency cap and pacer
+        self.accounts = AccountPool(load_accounts(self.browser_core))
+        self.result_store = ResultStore()
+        if Config.ACCOUNTS:
+            capacity = self.accounts.capacity
+            self.controller = ConcurrencyController(initial=capacity, maximum=capacity)
+        else:
+            self.controller = ConcurrencyController()
+        # With one account a throttle means the whole pool is too fast;
+        # with several, only that account backs off
+        self._shared_quota = len(self.accounts.accounts) == 1
+        self.retry = RetryScheduler(self.queue)
+        self.supervisor = WorkerSupervisor(self.queue, self.retry, self._worker)
+        self.response_cache = ResponseCache() if Config.RESPONSE_CACHE_ENABLED else None
+        # Queued/running task (or pack row) per prompt-text hash, so duplicates ride along with it
+        self._pending_by_key: Dict[str, Union[PromptTask, PackMember]] = {}
+        self.pack_template = packing.PackTemplate() if Config.PACK_PROMPTS else None
+        self.pack_sizer = packing.PackSizer()
 
     async def _get_existing_completed_ids(self) -> Set[str]:
         """
-        Reads the output file to find which IDs have already been processed.
-        Returns a set of IDs to allow O(1) lookup.
+        Opens the result log and returns the IDs already processed.
+        Only the sidecar index is read, so this stays cheap for large logs.
         """
-        if not os.path.exists(Config.OUTPUT_FILE):
-            # If file doesn't exist, create it as an empty list and return empty set
-            logger.info(f"{Config.OUTPUT_FILE} not found. Creating new file.")
-            with open(Config.OUTPUT_FILE, "w", encoding="utf-8") as f:
-                json.dump([], f)
-            return set()
+        return await self.result_store.open()
 
+    async def _append_result_to_file(self, result_entry: Dict):
+        """Queues the entry for the result log's writer task."""
         try:
-            with open(Config.OUTPUT_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                # Handle case where file is empty or not a list
-                if not isinstance(data, list):
-                    return set()
-
-                # Extract IDs
-                existing_ids = {item.get("key") for item in data if "key" in item}
-                logger.info(
-                    f"Found {len(existing_ids)} completed prompts in {Config.OUTPUT_FILE}."
-                )
-                return existing_ids
-        except json.JSONDecodeError:
-            logger.warning(
-                f"{Config.OUTPUT_FILE} is corrupted or empty. Starting fresh."
-            )
-            with open(Config.OUTPUT_FILE, "w", encoding="utf-8") as f:
-                json.dump([], f)
-            return set()
+            await self.result_store.append(result_entry)
+        except Exception as e:
+            logger.error(f"Failed to write result to file: {e}")
 
-    async def _append_result_to_file(self, result_entry: Dict):
+    async def _produce(self, completed_ids: Set[str]):
         """
-        Thread-safe append. Reads the file, adds item, writes back.
+        Streams prompts into the bounded queue, skipping completed IDs as it goes.
+        Parsing happens in a thread, one batch at a time.
         """
-        async with self.file_lock:
+        prompts = iter(self.raw_prompts)
+        total = pending = cached = 0
+        pack: List[PackMember] = []
+
+        while True:
             try:
-                current_data = []
-                # Read
-                if os.path.exists(Config.OUTPUT_FILE):
-                    with open(Config.OUTPUT_FILE, "r", encoding="utf-8") as f:
-                        try:
-                            current_data = json.load(f)
-                        except json.JSONDecodeError:
-                            current_data = []
-
-                # Append
-                current_data.append(result_entry)
-
-                # Write
-                with open(Config.OUTPUT_FILE, "w", encoding="utf-8") as f:
-                    json.dump(current_data, f, ensure_ascii=False, indent=4)
+                batch = await asyncio.to_thread(take, prompts, Config.PROMPT_READ_BATCH)
+            except ValueError as e:  # includes json.JSONDecodeError
+                logger.error(f"Could not read prompts ({e}). Check syntax.")
+                raise
+            if not batch:
+                break
+            total += len(batch)
+            fresh = [p for p in batch if p["id"] not in completed_ids]
+            keys = [cache_key(p["prompt"]) for p in fresh]
+            hits = await self._cached_outputs(keys)
 
-            except Exception as e:
-                logger.error(f"Failed to write result to file: {e}")
+            for p, key in zip(fresh, keys):
+                if key in hits:
+                    self.response_cache.record_lookup(True)
+                    await self._append_result_to_file({"key": p["id"], "value": hits[key]})
+                    cached += 1
+                    continue
+
+                leader = self._pending_by_key.get(key)
+                if leader is not None and not leader.dead_lettered:
+                    # Same text already queued in this run; it gets the leader's answer
+                    leader.duplicates.append(p["id"])
+                    if self.response_cache is not None:
+                        self.response_cache.record_lookup(True, source="in_flight")
+                    cached += 1
+                    continue
+
+                if self.response_cache is not None:
+                    self.response_cache.record_lookup(False)
+                pending += 1
+
+                if self.pack_template is not None and "sample" in p:
+                    member = PackMember(p["id"], p["prompt"], p["sample"], cache_key=key)
+                    self._pending_by_key[key] = member
+                    pack.append(member)
+                    if len(pack) >= self.pack_sizer.size:
+                        await self._enqueue(packing.build_task(pack, self.pack_template))
+                        pack = []
+                    continue
+
+                task = PromptTask(unique_id=p["id"], text=p["prompt"], cache_key=key)
+                self._pending_by_key[key] = task
+                await self._enqueue(task)
+
+        if pack:
+            await self._enqueue(packing.build_task(pack, self.pack_template))
+        if cached:
+            logger.info(f"{cached} prompts answered from the response cache.")
+        if pending:
+            logger.info(
+                f"All prompts queued. {pending} prompts remaining out of {total} total."
+            )
+        else:
+            logger.success("All prompts are already scraped! Exiting.")
+
+    async def _enqueue(self, task: PromptTask):
+        await self.queue.put(task)
+        self.has_work.set()
 
     async def _worker(self, worker_id: int):
-        """The lifecycle of a single tab."""
-        page = await self.browser_core.context.new_page()
-        handler = GeminiTabHandler(page, worker_id)
+        """
+        The lifecycle of a single tab. Exceptions are left to the supervisor,
+        which requeues the in-flight prompt and replaces the tab.
+        """
+        supervisor = self.supervisor
+        account = self.accounts.assign(worker_id)
+        page = None
+        handler = None
+        current: Optional[PromptTask] = None  # taken from the queue, task_done() not yet called
+        try:
+            while supervisor.should_run(worker_id):
+                # A throttled account takes no new work until its cooldown ends;
+                # the other accounts' workers keep draining the queue meanwhile
+                await account.pacer.wait_resumed()
+                supervisor.idle.add(worker_id)
+                try:
+                    task: PromptTask = await self.queue.get()
+                finally:
+                    supervisor.idle.discard(worker_id)
 
-        await handler.initialize()
+                if account.throttled:
+                    # Never wait for room on the queue this worker drains
+                    self.retry.requeue(task)
+                    self.queue.task_done()
+                    continue
 
-        while not self.queue.empty():
-            task: PromptTask = await self.queue.get()
-            try:
-                if await handler.check_rate_limit():
+                if task.race is not None and task.race.won:
+                    # Hedge twin whose prompt was answered before it started
+                    task.race.running -= 1
+                    self.queue.task_done()
+                    continue
+
+                if self._should_defer(task, worker_id):
+                    # Hand a retry to a different tab once, if another one can take it
+                    task.deferred = True
+                    self.queue.put_nowait(task)
+                    self.queue.task_done()
+                    continue
+
+                trace = metrics.begin_task(task.unique_id, worker_id)
+
+                # The tab is only taken from the pool once there is work for it
+                if page is None:
+                    try:
+                        handler = await account.tab_pool.acquire(worker_id)
+                    except BaseException:
+                        # Nothing was sent; the prompt goes back without using an attempt
+                        self.retry.requeue(task)
+                        self.queue.task_done()
+                        metrics.end_task(trace, "no_tab")
+                        raise
+                    page = handler.page
+                    supervisor.watch_page(worker_id, page)
+
+                supervisor.begin(worker_id, task, trace)
+                current = task
+
+                try:
+                    # Cheap state check; menu/temp-chat/thinking are only re-applied if they drifted
+                    await handler.ensure_ready()
+                    logger.debug(
+                        f"[Worker {handler.worker_id}] Tab ready with Temporary Chat with thinking mode."
+                    )
+                except Exception as e:
+                    logger.error(f"[Worker {handler.worker_id}] Init failed: {e}")
+
+                # Pacing shared by the account's tabs; blocks while the account is paused
+                with metrics.phase("pacing", worker_id):
+                    await account.pacer.acquire()
+
+                try:
+                    if await handler.check_rate_limit():
+                        logger.warning(
+                            f"[Worker {handler.worker_id}] reached rate limit, slowing the pool down."
+                        )
+                        self._on_rate_limit(worker_id)
+                        # Keep the tab; the task goes back on the queue for after the pause
+                        self.retry.requeue(task)
+                        supervisor.finish(worker_id)
+                        self.queue.task_done()
+                        current = None
+                        metrics.end_task(trace, "rate_limited")
+                        # Reload so a stale notice isn't detected again
+                        await handler.start_new_chat(hard=True)
+                        continue
+                except Exception as e:
                     logger.error(
-                        f"[Worker {handler.worker_id}] reached rate limit, quiting ... ."
+                        f"[Worker {handler.worker_id}] failed to check reaching rate limit: {e}"
                     )
-                    break
-            except Exception as e:
-                logger.error(
-                    f"[Worker {handler.worker_id}] failed to check reaching rate limit"
-                )
 
-            try:
-                await handler.expand_menu()
-                await handler.ensure_temporary_chat()
-                await handler.enable_thinking_mode()
-                logger.info(
-                    f"[Worker {handler.worker_id}] Tab initialized with Temporary Chat with thinking mode."
+                started = time.monotonic()
+                self.forecast.start(worker_id, task)
+                result = await self._generate(handler, task, worker_id)
+                self.forecast.finish(worker_id)
+                if result.status == "success":
+                    self.cost_model.observe(task, time.monotonic() - started)
+                    if self.hedger is not None:
+                        self.hedger.record(time.monotonic() - started)
+                if result.status == "success" and len(task.members) <= 1:
+                    self._check_output(result, worker_id)
+                failure = None
+
+                if task.race is not None:
+                    failure = await self._finish_race(task, result, worker_id)
+                elif task.members:
+                    failure = await self._handle_pack_result(task, result, worker_id)
+                elif result.status == "success":
+                    with metrics.phase("save", worker_id):
+                        await self._save_output(task, task.unique_id, result.output)
+                    logger.success(f"Saved result for ID {task.unique_id}")
+                    account.pacer.report_success()
+                else:
+                    # Failures are never saved as results; they are retried or dead-lettered
+                    metrics.inc("scraper_errors_total")
+                    failure = self.retry.handle_failure(task, result, worker_id)
+                    if failure == FailureKind.RATE_LIMIT:
+                        self._on_rate_limit(worker_id)
+
+                self.controller.record(
+                    time.monotonic() - started,
+                    error=failure is not None,
+                    rate_limited=self._shared_quota and failure == FailureKind.RATE_LIMIT,
                 )
-            except Exception as e:
-                logger.error(f"[Worker {handler.worker_id}] Init failed: {e}")
 
-            result = await handler.process_prompt(task)
+                supervisor.finish(worker_id)
+                self.queue.task_done()
+                current = None
+
+                try:
+                    # A stuck generation, drifted UI or throttling notice is cleared faster
+                    # by a reload, as is a generation cancelled because its twin won
+                    await handler.start_new_chat(
+                        hard=result.status == "cancelled"
+                        or failure
+                        in (FailureKind.TIMEOUT, FailureKind.UI_DRIFT, FailureKind.RATE_LIMIT)
+                    )
+                finally:
+                    metrics.end_task(trace, result.status)
+        finally:
+            self.forecast.finish(worker_id)
+            if current is not None and current.race is not None:
+                self._abandon_race(worker_id, current)
+            if page is not None:
+                supervisor.release_page(worker_id)
+                await account.tab_pool.release(page)
+            self.accounts.release(worker_id)
+
+    async def _generate(
+        self, handler: GeminiTabHandler, task: PromptTask, worker_id: int
+    ) -> ScrapeResult:
+        """Runs the prompt as its own task, so a winning hedge twin can cancel it."""
+        if self.hedger is None:
+            return await handler.process_prompt(task)
 
-            output_entry = {"key": result.unique_id, "value": result.output}
+        call = asyncio.create_task(handler.process_prompt(task))
+        self.hedger.track(worker_id, task, call)
+        try:
+            await asyncio.wait({call})
+        except asyncio.CancelledError:
+            call.cancel()  # the worker itself is being stopped
+            raise
+        finally:
+            self.hedger.untrack(worker_id)
+        if call.cancelled():
+            return ScrapeResult(
+                unique_id=task.unique_id,
+                prompt_text=task.text,
+                output="Cancelled; answered on another tab",
+                status="cancelled",
+            )
+        return call.result()
 
-            await self._append_result_to_file(output_entry)
+    async def _finish_race(
+        self, task: PromptTask, result: ScrapeResult, worker_id: int
+    ) -> Optional[FailureKind]:
+        """
+        Result handling for a hedged prompt or its twin: the first good reply is
+        saved, later ones dropped. A failure is only retried once both failed.
+        """
+        race = task.race
+        race.running -= 1
+        if race.won:
+            metrics.inc("scraper_hedge_losses_total")
+            return None
+
+        if result.status == "success":
+            race.won = True
+            self.hedger.cancel_twin(task)
+            if task is not race.primary:
+                metrics.inc("scraper_hedge_wins_total")
+            with metrics.phase("save", worker_id):
+                await self._save_output(race.primary, task.unique_id, result.output)
             logger.success(f"Saved result for ID {task.unique_id}")
+            self.accounts.account_of(worker_id).pacer.report_success()
+            return None
 
-            await handler.start_new_chat()
-            self.queue.task_done()
+        metrics.inc("scraper_errors_total")
+        if race.running > 0:
+            logger.warning(
+                f"[Worker {worker_id}] {task.unique_id} failed ({result.error_kind}); "
+                f"its hedge twin is still running."
+            )
+            return classify_result(result)
 
-        await page.close()
+        # Both attempts failed; the prompt goes through the regular retry path
+        race.primary.race = None
+        failure = self.retry.handle_failure(race.primary, result, worker_id)
+        if failure == FailureKind.RATE_LIMIT:
+            self._on_rate_limit(worker_id)
+        return failure
 
-    async def run(self):
-        # 1. Check what is already done
-        completed_ids = await self._get_existing_completed_ids()
+    def _abandon_race(self, worker_id: int, task: PromptTask):
+        """
+        A worker died during a hedged prompt. The race settles it instead of a
+        supervisor retry: the prompt is only requeued if no attempt is left.
+        """
+        race = task.race
+        race.running -= 1
+        self.supervisor.finish(worker_id)
+        self.queue.task_done()
+        if not race.won and race.running == 0:
+            race.primary.race = None
+            self.retry.requeue(race.primary)
 
-        # 2. Filter prompts (Exclude ones that are in completed_ids)
-        pending_prompts = [p for p in self.raw_prompts if p["id"] not in completed_ids]
+    async def _hedge_loop(self):
+        """Sends stragglers to idle tabs, within the extra-load budget."""
+        while True:
+            await asyncio.sleep(Config.HEDGE_CHECK_INTERVAL)
+            # Idle tabs mean the queue is empty, so the twins go straight to them
+            idle = len(self.supervisor.idle)
+            if not idle or not self.queue.empty():
+                continue
+            for task in self.hedger.stragglers()[:idle]:
+                if not self.hedger.within_budget():
+                    break
+                self.queue.put_nowait(self.hedger.hedge(task))
 
-        if not pending_prompts:
-            logger.success("All prompts are already scraped! Exiting.")
+    def _check_output(self, result: ScrapeResult, worker_id: int):
+        """Turns a reply without the expected JSON into a retryable failure."""
+        if not Config.VALIDATE_OUTPUT:
             return
+        parsed = parse_response(result.output)
+        if parsed.ok:
+            return
+        logger.warning(f"[Worker {worker_id}] Malformed output for {result.unique_id}: {parsed.error}")
+        metrics.inc("scraper_malformed_outputs_total")
+        result.status = "error"
+        result.error_kind = FailureKind.MALFORMED_OUTPUT.value
+
+    async def _cached_outputs(self, keys: List[str]) -> Dict[str, str]:
+        if self.response_cache is None or not keys:
+            return {}
+        try:
+            return await asyncio.to_thread(self.response_cache.get_many, keys)
+        except Exception as e:
+            logger.error(f"Response cache lookup failed: {e}")
+            return {}
+
+    async def _save_output(
+        self, owner: Union[PromptTask, PackMember], unique_id: str, output: str
+    ):
+        """Saves an answer for its ID and every duplicate, and caches it."""
+        for key in (unique_id, *owner.duplicates):
+            await self._append_result_to_file({"key": key, "value": output})
+
+        if self.response_cache is not None:
+            try:
+                await asyncio.to_thread(self.response_cache.put, owner.cache_key, output)
+            except Exception as e:
+                logger.error(f"Failed to cache output for {unique_id}: {e}")
+        if self._pending_by_key.get(owner.cache_key) is owner:
+            del self._pending_by_key[owner.cache_key]
+
+    async def _handle_pack_result(
+        self, task: PromptTask, result: ScrapeResult, worker_id: int
+    ) -> Optional[FailureKind]:
+        """
+        Saves the rows a packed reply answered. Missing rows, or the whole pack
+        when generation failed, are requeued in packs of half the size; a pack
+        of one goes through the regular retry path.
+        """
+        members = task.members
+        failure = None if result.status == "success" else classify_result(result)
+        if len(members) == 1 or failure == FailureKind.RATE_LIMIT:
+            if failure is None:
+                with metrics.phase("save", worker_id):
+                    await self._save_output(members[0], members[0].unique_id, result.output)
+                logger.success(f"Saved result for ID {task.unique_id}")
+                self.accounts.account_of(worker_id).pacer.report_success()
+            else:
+                metrics.inc("scraper_errors_total")
+                failure = self.retry.handle_failure(task, result, worker_id)
+                if failure == FailureKind.RATE_LIMIT:
+                    self._on_rate_limit(worker_id)
+            return failure
 
-        logger.info(
-            f"Resuming scrape. {len(pending_prompts)} prompts remaining out of {len(self.raw_prompts)} total."
+        answers = {}
+        if failure is None:
+            answers = packing.split_packed_output(result.output, [m.unique_id for m in members])
+            with metrics.phase("save", worker_id):
+                for m in members:
+                    if m.unique_id in answers:
+                        await self._save_output(m, m.unique_id, answers[m.unique_id])
+        self.pack_sizer.record(len(members), len(answers))
+
+        missing = [m for m in members if m.unique_id not in answers]
+        if not missing:
+            logger.success(f"Saved {len(members)} results from {task.unique_id}")
+            self.accounts.account_of(worker_id).pacer.report_success()
+            return None
+
+        reason = failure.value if failure else "rows missing from the reply"
+        logger.warning(
+            f"[Worker {worker_id}] {task.unique_id}: {len(answers)}/{len(members)} answered "
+            f"({reason}); retrying the rest in smaller packs."
+        )
+        metrics.inc("scraper_pack_splits_total")
+        for group in packing.split(missing, len(members) // 2):
+            self.retry.requeue(packing.build_task(group, self.pack_template))
+        return failure
+
+    def _on_rate_limit(self, worker_id: int):
+        if self._shared_quota:
+            self.controller.record_rate_limit()
+        self.accounts.account_of(worker_id).pacer.report_throttled(worker_id)
+        metrics.inc("scraper_rate_limits_total")
+
+    def _should_defer(self, task: PromptTask, worker_id: int) -> bool:
+        if worker_id not in task.failed_workers or task.deferred or self.queue.full():
+            return False
+        # Only worth it when some other worker is alive to pick it up
+        return any(
+            wid != worker_id and not t.done() and wid not in task.failed_workers
+            for wid, t in self.supervisor.workers.items()
         )
 
-        # 3. Populate Queue with ONLY pending prompts
-        for p in pending_prompts:
-            await self.queue.put(PromptTask(unique_id=p["id"], text=p["prompt"]))
+    async def _control_loop(self):
+        while True:
+            await asyncio.sleep(Config.CONCURRENCY_INTERVAL)
+            self.controller.evaluate()
+            self.supervisor.scale(self.controller.target)
+
+    async def _report_loop(self):
+        """Remaining-time forecasts, once every prompt is queued and the total is known."""
+        while True:
+            self.forecast.report(len(self.supervisor.alive()))
+            await asyncio.sleep(Config.SCHEDULER_REPORT_INTERVAL)
+
+    def _register_gauges(self):
+        metrics.register_gauge("scraper_queue_depth", self.queue.qsize)
+        metrics.register_gauge("scraper_workers", lambda: len(self.supervisor.alive()))
+        metrics.register_gauge("scraper_idle_workers", lambda: len(self.supervisor.idle))
+        metrics.register_gauge("scraper_concurrency_target", lambda: self.controller.target)
+
+    async def run(self):
+        self._register_gauges()
+        await metrics.serve()
+        try:
+            await self._run()
+        finally:
+            # Flush the result log and refresh the JSON list for the downstream tools
+            await self.result_store.close()
+            await asyncio.to_thread(self.result_store.export)
+            if self.response_cache is not None:
+                await asyncio.to_thread(self.response_cache.close)
+                self.response_cache.log_summary()
+            if Config.BLOCK_RESOURCES:
+                ResourceBlocker.log_summary()
+            metrics.write_summary()
+            await metrics.stop_serving()
+
+    async def _run(self):
+        # 1. Check what is already done
+        completed_ids = await self._get_existing_completed_ids()
+        if self.response_cache is not None:
+            await asyncio.to_thread(self.response_cache.open)
 
-        # 4. Connect Browser
-        await self.browser_core.connect()
+        # 2. Start streaming pending prompts into the queue
+        producer = asyncio.create_task(self._produce(completed_ids))
+
+        # 3. Connect and warm up tabs while prompts load (or, without pre-warming,
+        # don't touch the browser until the first pending prompt shows up)
+        warm_up = None
+        if Config.TAB_POOL_PREWARM:
+            warm_up = asyncio.create_task(self.accounts.start(self.controller.target))
+        has_work = asyncio.create_task(self.has_work.wait())
+        await asyncio.wait({producer, has_work}, return_when=asyncio.FIRST_COMPLETED)
+        has_work.cancel()
+        if not self.has_work.is_set():
+            try:
+                await producer  # re-raises loading errors
+            finally:
+                if warm_up is not None:
+                    warm_up.cancel()
+                    await asyncio.gather(warm_up, return_exceptions=True)
+                    await self.accounts.close()
+            return
+        if warm_up is None:
+            warm_up = asyncio.create_task(self.accounts.start(self.controller.target))
 
-        # 5. Spawn Workers
-        workers = []
-        # Don't open more tabs than pending prompts
-        num_workers = min(Config.CONCURRENCY_LIMIT, len(pending_prompts))
+        control = report = hedge = None
+        try:
+            await warm_up  # connection errors surface here
+            # Accounts whose browser didn't come up take no tabs
+            self.controller.maximum = min(self.controller.maximum, self.accounts.capacity)
+            self.controller.target = min(self.controller.target, self.controller.maximum)
 
-        logger.info(f"Spawning {num_workers} worker tabs...")
+            # 4. Spawn Workers (each one takes a ready tab from the pool when it receives a task)
+            logger.info(f"Spawning {self.controller.target} workers...")
+            self.supervisor.scale(self.controller.target)
+            if self.hedger is not None:
+                hedge = asyncio.create_task(self._hedge_loop())
+            if Config.CONCURRENCY_ADAPTIVE:
+                control = asyncio.create_task(self._control_loop())
 
-        for i in range(num_workers):
-            workers.append(asyncio.create_task(self._worker(i + 1)))
+            # 5. Wait until everything is queued and processed, including retries
+            await producer
+            report = asyncio.create_task(self._report_loop())
+            while True:
+                await self.queue.join()
+                if not self.retry.pending:
+                    break
+                await self.retry.wait_pending()
+        finally:
+            self.retry.cancel()
+            self.accounts.close_pacers()
+            await self.supervisor.stop()
+            background = [producer, warm_up]
+            if report is not None:
+                background.append(report)
+            if hedge is not None:
+                background.append(hedge)
+            if control is not None:
+                background.append(control)
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
 
-        # 6. Wait for completion
-        await self.queue.join()
-        await asyncio.gather(*workers)
+            # 6. Close Connection
+            await self.accounts.close()
 
-        # 7. Close Connection
-        await self.browser_core.close()
+        self.forecast.summary()
+        if self.supervisor.crashes:
+            logger.warning(f"{self.supervisor.crashes} worker tabs crashed and were replaced.")
+        if self.retry.dead_lettered:
+            logger.warning(
+                f"{self.retry.dead_lettered} prompts moved to {self.retry.dead_letter_file}."
+            )
         logger.success("Batch completed.")
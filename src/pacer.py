@@ -0,0 +1,113 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from loguru import logger
+
+from src.config import Config
+from src.metrics import metrics
+
+
+class TokenBucketPacer:
+    """
+    Token bucket shared by every worker of one account that regulates how often prompts are submitted.
+
+    When any tab detects throttling the whole pool pauses for a cooldown (growing
+    with consecutive throttles) and resumes at a reduced rate, which then creeps
+    back up with every successful prompt. A rate of None means "unpaced" until the
+    first throttle, at which point the observed submit rate is used as the base.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: Optional[float] = None,
+        burst: Optional[int] = None,
+        name: Optional[str] = None,
+    ):
+        self.label = f"[Pacer {name}]" if name else "[Pacer]"
+        self.max_rate = rate_per_minute if rate_per_minute is not None else Config.PACER_RATE_PER_MINUTE
+        self.rate = self.max_rate
+        self.burst = burst or Config.PACER_BURST
+        self.tokens = float(self.burst)
+        self.consecutive_throttles = 0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._resume = asyncio.Event()
+        self._resume.set()
+        self._resume_handle: Optional[asyncio.TimerHandle] = None
+        self._submits: Deque[float] = deque()
+
+    @property
+    def paused(self) -> bool:
+        return not self._resume.is_set()
+
+    async def wait_resumed(self):
+        """Returns once the pool is not paused (without taking a token)."""
+        await self._resume.wait()
+
+    async def acquire(self):
+        """Waits for the pool to be unpaused and for a submit token."""
+        async with self._lock:
+            while True:
+                await self._resume.wait()
+                if not self.rate:
+                    break
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    break
+                await asyncio.sleep((1 - self.tokens) * 60 / self.rate)
+        self._record_submit()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate / 60)
+        self._updated = now
+
+    def _record_submit(self):
+        now = time.monotonic()
+        self._submits.append(now)
+        while self._submits and now - self._submits[0] > 60:
+            self._submits.popleft()
+
+    def report_success(self):
+        self.consecutive_throttles = 0
+        if self.rate and (self.max_rate is None or self.rate < self.max_rate):
+            self.rate += Config.PACER_RECOVERY_STEP
+            if self.max_rate is not None:
+                self.rate = min(self.rate, self.max_rate)
+
+    def report_throttled(self, worker_id: int):
+        """Slows the whole pool down and pauses it until the cooldown expires."""
+        if self.paused:
+            return  # already handling this throttle episode
+
+        self.consecutive_throttles += 1
+        observed = len(self._submits) or 1
+        base = self.rate or observed
+        self.rate = max(Config.PACER_MIN_RATE, base * Config.PACER_BACKOFF_FACTOR)
+        self.tokens = 0.0
+        cooldown = min(
+            Config.PACER_MAX_COOLDOWN,
+            Config.PACER_COOLDOWN * 2 ** (self.consecutive_throttles - 1),
+        )
+        metrics.inc("scraper_throttle_pauses_total")
+        logger.warning(
+            f"{self.label} Throttling detected by worker {worker_id}; pausing all tabs for "
+            f"{cooldown:.0f}s, then resuming at {self.rate:.1f} prompts/min."
+        )
+
+        self._resume.clear()
+        loop = asyncio.get_running_loop()
+        self._resume_handle = loop.call_later(cooldown, self._unpause)
+
+    def _unpause(self):
+        self._updated = time.monotonic()
+        self._resume.set()
+        logger.info(f"{self.label} Resuming submissions at {self.rate:.1f} prompts/min.")
+
+    def close(self):
+        if self._resume_handle is not None:
+            self._resume_handle.cancel()
+        self._resume.set()
@@ -0,0 +1,125 @@
+import json
+from typing import Dict, Iterator, List, Optional
+
+from loguru import logger
+
+from src.config import Config
+from src.domain import PackMember, PromptTask
+from src.metrics import metrics
+from src.response_parser import iter_json, validate
+
+# Appended to every packed prompt; split_packed_output depends on this contract
+OUTPUT_INSTRUCTIONS = """
+You are given {count} samples, each inside a <sample id="..."> tag.
+Answer every sample independently. Reply with a single JSON array containing
+one object per sample, in the same order, and nothing else. Each object must
+have an "id" field with the sample's id, followed by the fields you would
+return for a single sample.
+"""
+
+SAMPLE_BLOCK = '<sample id="{id}">\n{body}\n</sample>'
+
+
+class PackTemplate:
+    """
+    Instruction text shared by every row of a pack, read once from
+    Config.PACK_TEMPLATE_FILE. The samples replace a `{samples}` placeholder,
+    or are appended at the end when the template has none.
+    """
+
+    def __init__(self, file_path: Optional[str] = None):
+        self.file_path = file_path or Config.PACK_TEMPLATE_FILE
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            self.text = f.read()
+
+    def render(self, members: List[PackMember]) -> str:
+        samples = "\n\n".join(
+            SAMPLE_BLOCK.format(
+                id=m.unique_id, body=json.dumps(m.sample, ensure_ascii=False, indent=2)
+            )
+            for m in members
+        )
+        instructions = OUTPUT_INSTRUCTIONS.format(count=len(members)).strip()
+        if "{samples}" in self.text:
+            body = self.text.replace("{samples}", samples)
+        else:
+            body = f"{self.text.rstrip()}\n\n{samples}"
+        return f"{body}\n\n{instructions}"
+
+
+class PackSizer:
+    """Grows the pack size after a streak of fully answered packs and halves it on a partial one."""
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = max(1, min(size or Config.PACK_SIZE, Config.PACK_MAX_SIZE))
+        self._streak = 0
+
+    def record(self, packed: int, answered: int):
+        if not Config.PACK_ADAPTIVE or packed < 2:
+            return
+        if answered < packed:
+            self._streak = 0
+            new_size = max(1, min(self.size, packed) // 2)
+            if new_size < self.size:
+                logger.info(
+                    f"[Packing] {answered}/{packed} answered; pack size {self.size} -> {new_size}."
+                )
+                self.size = new_size
+            return
+        self._streak += 1
+        if self._streak >= Config.PACK_GROW_AFTER and self.size < Config.PACK_MAX_SIZE:
+            self._streak = 0
+            self.size += 1
+            logger.info(f"[Packing] Pack size -> {self.size}.")
+
+
+def build_task(members: List[PackMember], template: PackTemplate) -> PromptTask:
+    """A pack of one is sent as the row's own prompt."""
+    if len(members) == 1:
+        m = members[0]
+        return PromptTask(unique_id=m.unique_id, text=m.text, members=members)
+    return PromptTask(
+        unique_id=f"pack[{members[0].unique_id}+{len(members) - 1}]",
+        text=template.render(members),
+        members=members,
+    )
+
+
+def split(members: List[PackMember], size: int) -> List[List[PackMember]]:
+    size = max(1, size)
+    return [members[i : i + size] for i in range(0, len(members), size)]
+
+
+def split_packed_output(output: str, ids: List[str]) -> Dict[str, str]:
+    """
+    Maps each answered ID to its own output (the object minus "id", as JSON text,
+    the same shape a single-sample reply has). Unknown or repeated IDs, and
+    answers failing response_parser.validate, are left out (and so retried).
+    """
+    wanted = {str(i): i for i in ids}
+    answers: Dict[str, str] = {}
+    for item in _iter_json_objects(output):
+        key = wanted.get(str(item.get("id")))
+        if key is None or key in answers:
+            continue
+        answer = {k: v for k, v in item.items() if k != "id"}
+        if Config.VALIDATE_OUTPUT and not validate(answer).ok:
+            continue
+        answers[key] = json.dumps(answer, ensure_ascii=False, indent=2)
+
+    metrics.inc("scraper_pack_rows_total", len(answers), outcome="answered")
+    metrics.inc("scraper_pack_rows_total", len(ids) - len(answers), outcome="missing")
+    return answers
+
+
+def _iter_json_objects(text: str) -> Iterator[Dict]:
+    """
+    Yields every JSON object in the reply: the items of arrays and standalone
+    objects alike, so code fences, chatter or a truncated tail don't lose the
+    rows that did come through.
+    """
+    for value in iter_json(text):
+        items = value if isinstance(value, list) else [value]
+        for item in items:
+            if isinstance(item, dict):
+                yield item
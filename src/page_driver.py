@@ -0,0 +1,210 @@
+import time
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+from playwright.async_api import Page
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+
+from src.config import Config
+from src.metrics import metrics
+from src.response_observer import (
+    CAPTURE_RESPONSE_JS,
+    DETECT_RATE_LIMIT_JS,
+    ResponseObserver,
+    rate_limit_args,
+)
+
+DRIVER_GLOBAL = "__geminiScraperDriver"
+# Bump whenever _INSTALL_JS changes, so tabs running an older copy get the new one
+DRIVER_VERSION = 3
+
+# Defines window.__geminiScraperDriver.run(args): fills the editor, sends, waits for
+# the reply (same logic as CAPTURE_RESPONSE_JS) and checks for a throttling notice,
+# all in the page. A missing element is reported as drift before anything is sent,
+# so the locator-based path can take over. A Send click with no visible effect is
+# reported as unconfirmed: the prompt may still have been sent, so it is never
+# sent again from here.
+_INSTALL_JS = """
+({ name, version }) => {
+    const capture = __CAPTURE__;
+    const detectRateLimit = __DETECT_RATE_LIMIT__;
+    const isVisible = (el) => !!el && el.getClientRects().length > 0;
+    const squash = (text) => (text || '').replace(/\\s+/g, '');
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+    const waitFor = async (find, timeout) => {
+        const end = performance.now() + timeout;
+        while (true) {
+            const found = find();
+            if (found || performance.now() > end) return found;
+            await sleep(50);
+        }
+    };
+
+    const run = async ({ inputSelector, sendSelector, stopSelector, responseSelector, userSelector,
+                         text, inputTimeout, startTimeout, capture: captureArgs, rateLimit }) => {
+        const started = performance.now();
+        const input = await waitFor(() => {
+            const el = document.querySelector(inputSelector);
+            return isVisible(el) ? el : null;
+        }, inputTimeout);
+        if (!input) return { status: 'drift', reason: 'prompt input not found' };
+        const previousCount = document.querySelectorAll(responseSelector).length;
+        const previousTurns = document.querySelectorAll(userSelector).length;
+
+        // Replace the editor's content the way a paste would, so its own input
+        // handling (and the Send button state) sees the text
+        input.focus();
+        const range = document.createRange();
+        range.selectNodeContents(input);
+        const selection = window.getSelection();
+        selection.removeAllRanges();
+        selection.addRange(range);
+        if (!document.execCommand('insertText', false, text)) {
+            input.textContent = text;
+            input.dispatchEvent(new InputEvent('input', { bubbles: true, inputType: 'insertText', data: text }));
+        }
+        const expected = squash(text).slice(0, 200);
+        if (!await waitFor(() => squash(input.innerText).startsWith(expected), inputTimeout)) {
+            return { status: 'drift', reason: 'editor did not take the text' };
+        }
+
+        const send = await waitFor(() => Array.from(document.querySelectorAll(sendSelector)).find(
+            (el) => isVisible(el) && !el.disabled && el.getAttribute('aria-disabled') !== 'true'
+        ), inputTimeout);
+        if (!send) return { status: 'drift', reason: 'send button not found' };
+        send.click();
+
+        // A sent prompt leaves the editor and shows up as a new turn
+        const generating = () => Array.from(document.querySelectorAll(stopSelector)).some(isVisible);
+        const accepted = await waitFor(() => !squash(input.innerText).startsWith(expected)
+            || generating()
+            || document.querySelectorAll(userSelector).length > previousTurns
+            || document.querySelectorAll(responseSelector).length > previousCount, startTimeout);
+        if (!accepted) return { status: 'unconfirmed', previousCount, previousTurns };
+        const submitMs = performance.now() - started;
+
+        const result = await capture({ ...captureArgs, previousCount });
+        return { ...result, submitMs, rateLimited: detectRateLimit(rateLimit) };
+    };
+
+    window[name] = { version, run };
+}
+""".replace("__CAPTURE__", CAPTURE_RESPONSE_JS.strip()).replace(
+    "__DETECT_RATE_LIMIT__", DETECT_RATE_LIMIT_JS.strip()
+)
+
+# True once the prompt has evidently been sent: a new user turn, a new reply or a Stop button
+_SEND_STARTED_JS = """
+({ userSelector, stopSelector, responseSelector, previousCount, previousTurns }) =>
+    document.querySelectorAll(userSelector).length > previousTurns
+    || document.querySelectorAll(responseSelector).length > previousCount
+    || Array.from(document.querySelectorAll(stopSelector)).some((el) => el.getClientRects().length > 0)
+"""
+
+# Runs the installed driver, or reports that this document doesn't have the current one
+_RUN_JS = """
+({ name, version, args }) => {
+    const driver = window[name];
+    if (!driver || driver.version !== version) return { status: 'not_installed' };
+    return driver.run(args);
+}
+"""
+
+
+class PageDriver:
+    """
+    Sends a prompt and collects its reply in a single evaluate call.
+
+    The locator-based path in `GeminiTabHandler` costs a CDP round trip per
+    step (wait for the input, count replies, click, fill, check, Enter,
+    capture, rate-limit check). The driver script is injected once per
+    document and does all of it in the page. `run` returns None when the
+    script reports DOM drift, and the caller falls back to the locators.
+    """
+
+    def __init__(self, page: Page, worker_id: int, observer: ResponseObserver):
+        self.page = page
+        self.worker_id = worker_id
+        self.observer = observer
+
+    async def install(self):
+        await self.page.evaluate(_INSTALL_JS, {"name": DRIVER_GLOBAL, "version": DRIVER_VERSION})
+
+    async def run(self, text: str) -> Optional[Tuple[Optional[str], bool]]:
+        """
+        Returns (reply text or None, rate limited), or None if the page no longer
+        matches the selectors and nothing was sent. Raises on a generation timeout,
+        like `capture`, and when a send can't be confirmed.
+        """
+        self.observer.begin()
+        args = {
+            "name": DRIVER_GLOBAL,
+            "version": DRIVER_VERSION,
+            "args": {
+                "inputSelector": Config.SELECTOR_TEXT_AREA,
+                "sendSelector": Config.SELECTOR_SEND_BUTTON,
+                "stopSelector": Config.SELECTOR_STOP_GENERATION,
+                "responseSelector": Config.SELECTOR_RESPONSE,
+                "userSelector": Config.SELECTOR_USER_QUERY,
+                "text": text,
+                "inputTimeout": Config.READINESS_TIMEOUTS["prompt_input"],
+                "startTimeout": Config.READINESS_TIMEOUTS["generation_start"],
+                "capture": self.observer.capture_args(0),
+                "rateLimit": rate_limit_args(),
+            },
+        }
+        started = time.monotonic()
+        result = await self.page.evaluate(_RUN_JS, args)
+        if result["status"] == "not_installed":
+            # First prompt on this document (new tab, reload or navigation)
+            await self.install()
+            started = time.monotonic()
+            result = await self.page.evaluate(_RUN_JS, args)
+
+        if result["status"] == "drift":
+            logger.warning(
+                f"[Worker {self.worker_id}] In-page driver: {result['reason']}; "
+                f"using locators for this prompt."
+            )
+            metrics.inc("scraper_driver_fallbacks_total")
+            return None
+
+        if result["status"] == "unconfirmed":
+            return await self._confirm_sent(result, started)
+
+        elapsed = time.monotonic() - started
+        submitted = min(elapsed, result["submitMs"] / 1000)
+        metrics.add_phase("fill", self.worker_id, submitted)
+        metrics.add_phase("generation", self.worker_id, elapsed - submitted)
+        return self.observer.text_of(result), result["rateLimited"]
+
+    async def _confirm_sent(self, result: Dict, started: float) -> Tuple[Optional[str], bool]:
+        """
+        The Send click showed no effect within the start timeout. A slow start still
+        counts: if the prompt shows up now, its reply is captured as usual. Otherwise
+        the attempt fails as UI drift, so the tab is reset before a retry instead of
+        the prompt being typed into the same chat a second time.
+        """
+        started_now = await self.page.evaluate(
+            _SEND_STARTED_JS,
+            {
+                "userSelector": Config.SELECTOR_USER_QUERY,
+                "stopSelector": Config.SELECTOR_STOP_GENERATION,
+                "responseSelector": Config.SELECTOR_RESPONSE,
+                "previousCount": result["previousCount"],
+                "previousTurns": result["previousTurns"],
+            },
+        )
+        if not started_now:
+            metrics.inc("scraper_driver_unconfirmed_sends_total")
+            raise PlaywrightTimeout(
+                f"Step 'send' not ready after "
+                f"{Config.READINESS_TIMEOUTS['generation_start']}ms (prompt not accepted)"
+            )
+
+        logger.debug(f"[Worker {self.worker_id}] Prompt started late; capturing its reply.")
+        metrics.add_phase("fill", self.worker_id, time.monotonic() - started)
+        with metrics.phase("generation", self.worker_id):
+            text = await self.observer.capture(result["previousCount"])
+        rate_limited = await self.page.evaluate(DETECT_RATE_LIMIT_JS, rate_limit_args())
+        return text, rate_limited
@@ -1,65 +1,142 @@
-import asyncio
-from ast import BoolOp, Return
-from asyncio import sleep
+from typing import Optional, Tuple
 
 from loguru import logger
 from playwright.async_api import Page
 from playwright.async_api import TimeoutError as PlaywrightTimeout
 
 from src.config import Config
-from src.domain import PromptTask, ScrapeResult
+from src.domain import PromptTask, ScrapeResult, TabState
+from src.metrics import metrics
+from src.page_driver import PageDriver
+from src.readiness import PageReadiness
+from src.resource_blocker import ResourceBlocker
+from src.response_observer import DETECT_RATE_LIMIT_JS, ResponseObserver, rate_limit_args
+from src.retry import FailureKind, classify_error
+
+# Reads the settings we care about in a single round trip.
+# thinking_mode is null when the mode label is not rendered.
+_PROBE_STATE_JS = """
+({ searchSelector, tempChatSelector, modeSelector, thinkingText }) => {
+    const visible = (selector) => Array.from(document.querySelectorAll(selector))
+        .some((el) => el.getClientRects().length > 0);
+    const mode = document.querySelector(modeSelector);
+    return {
+        menu_expanded: visible(searchSelector),
+        temporary_chat: visible(tempChatSelector),
+        thinking_mode: mode ? mode.innerText.includes(thinkingText) : null,
+    };
+}
+"""
 
 
 class GeminiTabHandler:
-    def __init__(self, page: Page, worker_id: int):
+    def __init__(self, page: Page, worker_id: int, base_url: Optional[str] = None):
         self.page = page
         self.worker_id = worker_id
+        self.base_url = base_url or Config.BASE_URL  # account slot the tab belongs to
+        self.readiness = PageReadiness(page, worker_id)
+        self.state = TabState()
+        self.observer = ResponseObserver(page, worker_id)
+        self.driver = PageDriver(page, worker_id, self.observer)
+
+    def assign(self, worker_id: int):
+        """Hands a pre-warmed tab to a worker (log prefixes follow it)."""
+        self.worker_id = worker_id
+        self.readiness.worker_id = worker_id
+        self.observer.worker_id = worker_id
+        self.driver.worker_id = worker_id
 
+    @metrics.timed("initialize")
     async def initialize(self):
         """Initial startup: Override UA and Go to URL"""
         try:
-            # --- UA Override Logic ---
-            if hasattr(Config, "USER_AGENT") and Config.USER_AGENT:
-                try:
-                    # Establish a CDP session for this specific page
-                    client = await self.page.context.new_cdp_session(self.page)
-                    # Override the User Agent at the protocol level
-                    await client.send(
-                        "Network.setUserAgentOverride", {"userAgent": Config.USER_AGENT}
-                    )
-                    logger.debug(
-                        f"[Worker {self.worker_id}] User Agent spoofed successfully."
-                    )
-                except Exception as e:
-                    logger.warning(
-                        f"[Worker {self.worker_id}] Failed to override User Agent via CDP: {e}"
-                    )
-            # -------------------------
-
-            await self.page.goto(Config.BASE_URL)
+            await self._attach()
+            await self._load_app()
             logger.info(f"[Worker {self.worker_id}] Tab initialized.")
         except Exception as e:
             logger.error(f"[Worker {self.worker_id}] Init failed: {e}")
 
+    @metrics.timed("adopt")
+    async def adopt(self):
+        """Takes over a Gemini tab that is already open, reloading only if the app isn't usable."""
+        await self._attach()
+        try:
+            await self.readiness.visible(Config.SELECTOR_TEXT_AREA, "adopt")
+        except Exception:
+            logger.debug(f"[Worker {self.worker_id}] Adopted tab not ready, reloading.")
+            await self._load_app()
+        logger.info(f"[Worker {self.worker_id}] Adopted open tab {self.page.url}.")
+
+    async def _attach(self):
+        """Per-tab hooks that don't need a navigation: UA override, resource blocking, progress binding."""
+        # --- UA Override Logic ---
+        if hasattr(Config, "USER_AGENT") and Config.USER_AGENT:
+            try:
+                # Establish a CDP session for this specific page
+                client = await self.page.context.new_cdp_session(self.page)
+                # Override the User Agent at the protocol level
+                await client.send(
+                    "Network.setUserAgentOverride", {"userAgent": Config.USER_AGENT}
+                )
+                logger.debug(
+                    f"[Worker {self.worker_id}] User Agent spoofed successfully."
+                )
+            except Exception as e:
+                logger.warning(
+                    f"[Worker {self.worker_id}] Failed to override User Agent via CDP: {e}"
+                )
+        # -------------------------
+
+        if Config.BLOCK_RESOURCES:
+            try:
+                await ResourceBlocker(self.worker_id).attach(self.page)
+            except Exception as e:
+                logger.warning(
+                    f"[Worker {self.worker_id}] Failed to enable resource blocking: {e}"
+                )
+
+        try:
+            await self.observer.install()
+        except Exception as e:
+            logger.debug(
+                f"[Worker {self.worker_id}] Progress binding unavailable: {e}"
+            )
+
+    @metrics.timed("page_goto")
+    async def _load_app(self):
+        """Navigates to the app and returns once the chat input is usable."""
+        await self.page.goto(
+            self.base_url,
+            wait_until="domcontentloaded",
+            timeout=Config.TIMEOUT_PAGE_LOAD,
+        )
+        await self.readiness.visible(Config.SELECTOR_TEXT_AREA, "app_ready")
+
+    @metrics.timed("expand_menu")
     async def expand_menu(self):
         """Expands the side menu to access more options."""
         try:
-            await sleep(3)
-            is_already_expanded = await self.page.locator(
-                Config.HISTORY_SEARCH_BUTTON
-            ).is_visible()
+            # Whichever renders first tells us the menu state
+            index = await self.readiness.any_visible(
+                [Config.HISTORY_SEARCH_BUTTON, Config.EXPAND_MENUE_SELECTOR],
+                "expand_menu",
+            )
+            is_already_expanded = index == 0
 
             if is_already_expanded:
                 logger.debug(f"[Worker {self.worker_id}] Already Expanded.")
+                self.state.menu_expanded = True
                 return
 
             menu_button = self.page.locator(Config.EXPAND_MENUE_SELECTOR)
-            await menu_button.wait_for(state="visible")
             await menu_button.click()
+            await self.readiness.visible(Config.HISTORY_SEARCH_BUTTON, "expand_menu")
+            self.state.menu_expanded = True
             logger.debug(f"[Worker {self.worker_id}] Side menu expanded.")
         except Exception as e:
             logger.error(f"[Worker {self.worker_id}] Failed to expand menu:\n{e}")
 
+    @metrics.timed("ensure_temporary_chat")
     async def ensure_temporary_chat(self):
         """
         Logic to switch the current session to Temporary Chat.
@@ -67,11 +144,7 @@ class GeminiTabHandler:
         """
         try:
             # 1. Wait for the chat input to be visible (confirms page loaded)
-            await sleep(3)
-
-            await self.page.wait_for_selector(
-                Config.SELECTOR_TEXT_AREA, state="visible"
-            )
+            await self.readiness.visible(Config.SELECTOR_TEXT_AREA, "temporary_chat")
 
             # 2. Check if we are ALREADY in temporary chat to avoid toggling it OFF.
             is_already_temp = await self.page.locator(
@@ -80,22 +153,28 @@ class GeminiTabHandler:
 
             if is_already_temp:
                 logger.debug(f"[Worker {self.worker_id}] Already in Temporary Chat.")
+                self.state.temporary_chat = True
                 return
 
             # 3. Open the "Conversation Options" menu (Three dots)
             menu_btn = self.page.locator(Config.SELECTOR_CHAT_OPTIONS_BTN)
-            await menu_btn.wait_for(state="visible")
+            await menu_btn.wait_for(
+                state="visible", timeout=self.readiness.timeout("temporary_chat")
+            )
             await menu_btn.click()
 
             # 4. Click "Temporary chat" in the dropdown
             temp_chat_toggle = self.page.locator(Config.TEXT_TEMP_CHAT_TOGGLE)
-            await temp_chat_toggle.wait_for(state="visible")
+            await temp_chat_toggle.wait_for(
+                state="visible", timeout=self.readiness.timeout("temporary_chat")
+            )
             await temp_chat_toggle.click()
 
             # 5. Wait for the UI to refresh/confirm
-            await self.page.wait_for_selector(
-                Config.TEXT_TEMP_CHAT_TOGGLE, timeout=5000
+            await self.readiness.visible(
+                Config.SELECTOR_TEMP_CHAT_INDICATOR, "temporary_chat"
             )
+            self.state.temporary_chat = True
 
         except PlaywrightTimeout as pe:
             logger.warning(
@@ -113,31 +192,25 @@ class GeminiTabHandler:
         try:
             logger.info(f"[Worker {self.worker_id}] Processing: {task.unique_id}")
 
-            textarea = self.page.locator(Config.SELECTOR_TEXT_AREA)
-            await textarea.wait_for(state="visible")
-
-            # Focus and Fill
-            await textarea.click()
-            await textarea.fill(task.text)
-            await asyncio.sleep(0.5)
-            await self.page.keyboard.press("Enter")
+            outcome = None
+            if Config.PAGE_DRIVER_ENABLED:
+                outcome = await self.driver.run(task.text)
+            if outcome is None:
+                outcome = await self._submit_with_locators(task)
+            final_text, rate_limited = outcome
 
-            # Wait for generation to Start and then Finish
-            try:
-                stop_btn = self.page.locator(Config.SELECTOR_STOP_GENERATION)
-                # Wait for start
-                await stop_btn.wait_for(state="visible", timeout=5000)
-                # Wait for finish
-                await stop_btn.wait_for(
-                    state="hidden", timeout=Config.TIMEOUT_GENERATION
+            if final_text is None or rate_limited:
+                if rate_limited:
+                    kind, output = FailureKind.RATE_LIMIT, "Rate limit reached"
+                else:
+                    kind, output = FailureKind.EMPTY_EXTRACTION, "No output extracted"
+                return ScrapeResult(
+                    unique_id=task.unique_id,
+                    prompt_text=task.text,
+                    output=output,
+                    status="error",
+                    error_kind=kind.value,
                 )
-            except PlaywrightTimeout:
-                pass  # Proceed to extraction
-
-            # Extract Output
-            await self.page.wait_for_selector(".markdown", timeout=5000)
-            responses = await self.page.locator(".markdown").all_inner_texts()
-            final_text = responses[-1] if responses else "No output extracted"
 
             return ScrapeResult(
                 unique_id=task.unique_id, prompt_text=task.text, output=final_text
@@ -150,22 +223,108 @@ class GeminiTabHandler:
                 prompt_text=task.text,
                 output=str(e),
                 status="error",
+                error_kind=classify_error(e).value,
             )
 
-    async def start_new_chat(self):
+    async def _submit_with_locators(self, task: PromptTask) -> Tuple[Optional[str], bool]:
+        """Step-by-step submit and capture; used when the in-page driver is off or doesn't fit the DOM."""
+        textarea = self.page.locator(Config.SELECTOR_TEXT_AREA)
+        await textarea.wait_for(
+            state="visible", timeout=self.readiness.timeout("prompt_input")
+        )
+
+        # Only responses after the ones already on the page belong to this prompt
+        previous_responses = await self.observer.response_count()
+
+        # Focus and Fill
+        with metrics.phase("fill", self.worker_id):
+            await textarea.click()
+            await textarea.fill(task.text)
+            # Submit once the editor has actually taken the text
+            await self.readiness.has_text(Config.SELECTOR_TEXT_AREA, "prompt_input")
+            await self.page.keyboard.press("Enter")
+
+        # The in-page observer resolves as soon as generation ends
+        # and sends back only the final response's text
+        with metrics.phase("generation", self.worker_id):
+            final_text = await self.observer.capture(previous_responses)
+
+        # An empty answer often comes with a throttling banner
+        return final_text, await self.check_rate_limit()
+
+    async def probe_state(self) -> TabState:
+        """Refreshes the cached tab state from the page in one evaluate call."""
+        observed = await self.page.evaluate(
+            _PROBE_STATE_JS,
+            {
+                "searchSelector": Config.HISTORY_SEARCH_BUTTON,
+                "tempChatSelector": Config.SELECTOR_TEMP_CHAT_INDICATOR,
+                "modeSelector": Config.SELECTOR_MODE_LABEL,
+                "thinkingText": Config.TEXT_THINKING_MODE_LABEL,
+            },
+        )
+        self.state.menu_expanded = observed["menu_expanded"]
+        self.state.temporary_chat = observed["temporary_chat"]
+        # Without a visible label, trust what we last set on this tab
+        if observed["thinking_mode"] is not None:
+            self.state.thinking_mode = observed["thinking_mode"]
+        return self.state
+
+    @metrics.timed("ensure_ready")
+    async def ensure_ready(self):
+        """Checks the tab's UI state and repairs only the settings that drifted."""
+        try:
+            await self.probe_state()
+        except Exception as e:
+            logger.debug(f"[Worker {self.worker_id}] State probe failed: {e}")
+            self.state.invalidate()
+
+        if self.state.is_ready():
+            return
+
+        logger.debug(f"[Worker {self.worker_id}] Repairing tab state: {self.state}")
+        if not self.state.menu_expanded:
+            await self.expand_menu()
+        if not self.state.temporary_chat:
+            await self.ensure_temporary_chat()
+        if not self.state.thinking_mode:
+            await self.enable_thinking_mode()
+
+    @metrics.timed("reset")
+    async def start_new_chat(self, hard: bool = False):
         """
         Resets for the next prompt.
         Requirement: Must open Temporary Chat again (effectively resetting context).
+        `hard` skips the soft reset, e.g. after a timeout or UI drift.
         """
         try:
-            # Reloading the page is the cleanest way to ensure a fresh state
-            # Then we re-run the ensure_temporary_chat logic
-            await self.page.goto(Config.BASE_URL)
-            await self.expand_menu()
-            await self.ensure_temporary_chat()
+            # Start a new chat inside the loaded app; reload only if that fails
+            if not hard and await self._soft_reset():
+                await self.ensure_ready()
+                return
+
+            if not hard:
+                logger.warning(f"[Worker {self.worker_id}] Soft reset failed, reloading.")
+            self.state.invalidate()
+            await self._load_app()
+            await self.ensure_ready()
         except Exception as e:
             logger.error(f"[Worker {self.worker_id}] Failed to reset chat: {e}")
 
+    async def _soft_reset(self) -> bool:
+        try:
+            new_chat = self.page.locator(Config.SELECTOR_NEW_CHAT_BUTTON).first
+            await new_chat.click(timeout=self.readiness.timeout("soft_reset"))
+
+            # A fresh conversation has no responses and an empty input
+            await self.readiness.hidden(Config.SELECTOR_RESPONSE, "soft_reset")
+            await self.readiness.visible(Config.SELECTOR_TEXT_AREA, "soft_reset")
+            return True
+        except Exception as e:
+            logger.debug(f"[Worker {self.worker_id}] Soft reset error: {e}")
+            return False
+
+    @metrics.timed("enable_thinking_mode")
     async def enable_thinking_mode(self):
         """
         Attempts to enable thinking mode.
@@ -176,20 +335,27 @@ class GeminiTabHandler:
             )
 
             model_selector = self.page.locator(Config.SELECTOR_MODEL_DROPDOWN)
-            await model_selector.wait_for(state="visible")
+            await self.readiness.visible(Config.SELECTOR_MODEL_DROPDOWN, "thinking_mode")
             await model_selector.click()
 
             model_mode_selector = self.page.locator(
                 Config.SELECTOR_THINKING_MODEL_OPTION
             )
-            await model_mode_selector.wait_for(state="visible")
+            await self.readiness.visible(
+                Config.SELECTOR_THINKING_MODEL_OPTION, "thinking_mode"
+            )
             await model_mode_selector.click()
 
-            await asyncio.sleep(0.5)
+            # The option list closes once the mode switch is applied
+            await self.readiness.hidden(
+                Config.SELECTOR_THINKING_MODEL_OPTION, "thinking_mode"
+            )
+            self.state.thinking_mode = True
         except Exception as e:
             logger.warning(
                 f"[Worker {self.worker_id}] Could not explicitly set Thinking Mode: {e}"
             )
 
     async def check_rate_limit(self) -> bool:
-        return False
+        """Looks for a quota/throttling notice in the page's banners and error cards."""
+        return await self.page.evaluate(DETECT_RATE_LIMIT_JS, rate_limit_args())
@@ -0,0 +1,336 @@
+"""
+Pipeline runner: CSV -> dataset -> prompts -> scrape -> parsed outputs -> review dataset.
+
+The dataset stages (utils/_0c.._3) and the scraper are declared as stages
+with their input and output files; the run order follows from which stage
+writes what. A stage is skipped when its inputs, code and outputs are the
+same as after its last successful run (size + mtime first, content hash only
+when those differ, so re-written but identical files don't trigger a re-run).
+Stages run in this process: convert streams the result log directly instead
+of its exported JSON, and hands the parsed rows to join in memory.
+
+    python -m src.pipeline [--dry-run] [--force [STAGE ...]] [--only STAGE ...] [--until STAGE]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from loguru import logger
+
+from src.config import Config
+from src.prompt_source import iter_prompts
+from src.result_store import ResultStore
+from utils import _1create_prompts as create_prompts
+from utils import _2convert_output as convert_output
+from utils import _3map_promptoutput_dataset as map_dataset
+
+# utils._0c_simple_db needs pandas, so it is only imported when the stage runs
+DATASET_CSV = "utils/AUTALIC.csv"
+DATASET_FILE = "_0initial_filtered_dataset.jsonl"
+
+WORKERS = os.cpu_count() or 1
+HASH_CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class Stage:
+    name: str
+    inputs: List[str]
+    outputs: List[str]
+    run: Callable[["PipelineContext"], Optional[str]]  # returns a one-line summary
+    code: List[str] = field(default_factory=list)  # source files whose changes invalidate outputs
+    # Extra check beyond fingerprints; the scrape stage is only done once every prompt has a result
+    is_complete: Optional[Callable[[], bool]] = None
+
+
+class RecordBuffer(list):
+    """Collects records for the next stage, and stops once it would hold too many."""
+
+    def __init__(self, limit: int):
+        super().__init__()
+        self.limit = limit
+        self.overflowed = False
+
+    def append(self, item: Any):
+        if self.overflowed:
+            return
+        if len(self) >= self.limit:
+            self.overflowed = True
+            self.clear()
+            return
+        super().append(item)
+
+
+class PipelineContext:
+    """Records passed between stages of one run, keyed by the file they stand for."""
+
+    def __init__(self):
+        self.records: Dict[str, List[Any]] = {}
+
+    def publish(self, path: str, records: RecordBuffer):
+        if records.overflowed:
+            logger.info(f"More than {records.limit} records for {path}; the next stage reads the file.")
+            return
+        self.records[path] = records
+
+    def get(self, path: str) -> Optional[List[Any]]:
+        return self.records.get(path)
+
+
+# --- Fingerprints ---
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(path: str, previous: Optional[Dict[str, str]] = None) -> Optional[Dict[str, str]]:
+    """{"stat", "sha256"} of a file, or None if it is missing. Only hashes when the stat changed."""
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    stat_key = f"{stat.st_size}:{stat.st_mtime_ns}"
+    if previous and previous.get("stat") == stat_key:
+        return previous
+    return {"stat": stat_key, "sha256": _file_hash(path)}
+
+
+def _same(recorded: Optional[Dict[str, str]], current: Optional[Dict[str, str]]) -> bool:
+    if recorded is None or current is None:
+        return recorded is current
+    return recorded["sha256"] == current["sha256"]
+
+
+class PipelineState:
+    def __init__(self, file_path: Optional[str] = None):
+        self.file_path = file_path or Config.PIPELINE_STATE_FILE
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, "r", encoding="utf-8") as f:
+                    self.stages = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Could not read {self.file_path} ({e}). Running every stage.")
+
+    def stale_reason(self, stage: Stage) -> Optional[str]:
+        """Why the stage has to run, or None if it is up to date."""
+        recorded = self.stages.get(stage.name)
+        if recorded is None:
+            return "never run"
+        for kind, paths in (("code", stage.code), ("input", stage.inputs), ("output", stage.outputs)):
+            previous = recorded.get(kind, {})
+            for path in paths:
+                if path not in previous:
+                    return f"new {kind} {path}"
+                if not _same(previous[path], fingerprint(path, previous[path])):
+                    return f"{kind} {path} changed" if os.path.exists(path) else f"{path} missing"
+        if stage.is_complete is not None and not stage.is_complete():
+            return "incomplete"
+        return None
+
+    def record(self, stage: Stage):
+        previous = self.stages.get(stage.name, {})
+        self.stages[stage.name] = {
+            kind: {path: fingerprint(path, previous.get(kind, {}).get(path)) for path in paths}
+            for kind, paths in (("code", stage.code), ("input", stage.inputs), ("output", stage.outputs))
+        }
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.stages, f, indent=2)
+        os.replace(tmp_path, self.file_path)
+
+
+# --- Stages ---
+
+def _prepare(ctx: PipelineContext) -> str:
+    from utils import _0c_simple_db as simple_db
+
+    rows = simple_db.write_jsonl(simple_db.prepare_chunks(DATASET_CSV), DATASET_FILE)
+    return f"{rows} rows"
+
+
+def _prompts(ctx: PipelineContext) -> str:
+    _, stats = create_prompts.create_prompts(dataset_file=DATASET_FILE, workers=WORKERS)
+    return (
+        f"{stats['rendered']} rendered, {stats['reused']} unchanged, "
+        f"{len(stats['changed_ids'])} changed"
+    )
+
+
+def _scrape(ctx: PipelineContext) -> str:
+    from src.main import main as scrape
+
+    asyncio.run(scrape(create_prompts.OUTPUT_FILE))
+    return f"{_pending_prompts()} prompts still pending"
+
+
+def _pending_prompts() -> int:
+    if not os.path.exists(create_prompts.OUTPUT_FILE):
+        return 0
+    completed: Set[str] = set()
+    if os.path.exists(Config.RESULT_INDEX_FILE):
+        with open(Config.RESULT_INDEX_FILE, "r", encoding="utf-8") as f:
+            completed = {line.rstrip("\n") for line in f if line.strip()}
+    return sum(1 for p in iter_prompts(create_prompts.OUTPUT_FILE) if p["id"] not in completed)
+
+
+def _convert(ctx: PipelineContext) -> str:
+    parsed = RecordBuffer(Config.PIPELINE_MAX_RECORDS_IN_MEMORY)
+    good, bad = convert_output.convert(
+        Config.RESULT_LOG_FILE,
+        convert_output.OUTPUT_FILE,
+        convert_output.BAD_OUTPUT_FILE,
+        WORKERS,
+        items=ResultStore().iter_results(),
+        keep=parsed,
+    )
+    ctx.publish(convert_output.OUTPUT_FILE, parsed)
+    return f"{good} parsed, {bad} unparseable"
+
+
+def _join(ctx: PipelineContext) -> str:
+    stats = map_dataset.join(
+        DATASET_FILE,
+        map_dataset.OUTPUTS_FILE,
+        map_dataset.OUTPUT_FILE,
+        map_dataset.INDEX_FILE,
+        full=False,
+        outputs=ctx.get(map_dataset.OUTPUTS_FILE),
+    )
+    return f"{stats['merged']} merged, {stats['pending_rows']} rows without output"
+
+
+STAGES = [
+    Stage("prepare", [DATASET_CSV], [DATASET_FILE], _prepare, code=["utils/_0c_simple_db.py"]),
+    Stage(
+        "prompts",
+        [create_prompts.TEMPLATE_FILE, DATASET_FILE],
+        [create_prompts.OUTPUT_FILE, create_prompts.MANIFEST_FILE],
+        _prompts,
+        code=["utils/_1create_prompts.py", "src/prompt_template.py"],
+    ),
+    # Scraper code changes don't invalidate results already scraped, so no code files here
+    Stage(
+        "scrape",
+        [create_prompts.OUTPUT_FILE],
+        [Config.RESULT_LOG_FILE],
+        _scrape,
+        is_complete=lambda: _pending_prompts() == 0,
+    ),
+    Stage(
+        "convert",
+        [Config.RESULT_LOG_FILE],
+        [convert_output.OUTPUT_FILE, convert_output.BAD_OUTPUT_FILE],
+        _convert,
+        code=["utils/_2convert_output.py", "src/response_parser.py", "src/config.py"],
+    ),
+    Stage(
+        "join",
+        [DATASET_FILE, map_dataset.OUTPUTS_FILE],
+        [map_dataset.OUTPUT_FILE],
+        _join,
+        code=["utils/_3map_promptoutput_dataset.py"],
+    ),
+]
+
+
+def ordered(stages: List[Stage]) -> List[Stage]:
+    """Topological order: every stage after the stages producing its inputs."""
+    producer = {path: stage.name for stage in stages for path in stage.outputs}
+    by_name = {stage.name: stage for stage in stages}
+    result: List[Stage] = []
+    state: Dict[str, str] = {}
+
+    def visit(stage: Stage):
+        if state.get(stage.name) == "done":
+            return
+        if state.get(stage.name) == "visiting":
+            raise ValueError(f"Pipeline has a cycle through stage '{stage.name}'.")
+        state[stage.name] = "visiting"
+        for path in stage.inputs:
+            if path in producer and producer[path] != stage.name:
+                visit(by_name[producer[path]])
+        state[stage.name] = "done"
+        result.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return result
+
+
+def run(
+    stages: List[Stage],
+    state: PipelineState,
+    force: Optional[Set[str]] = None,
+    dry_run: bool = False,
+) -> bool:
+    """Runs the stale stages in order. Returns False if a stage failed or can't run."""
+    ctx = PipelineContext()
+
+    for stage in stages:
+        forced = force is not None and (not force or stage.name in force)
+        reason = "forced" if forced else state.stale_reason(stage)
+        if reason is None:
+            logger.info(f"[{stage.name}] up to date, skipped.")
+            continue
+
+        if dry_run:
+            logger.info(f"[{stage.name}] would run ({reason}).")
+            continue
+
+        # Inputs of earlier stages exist by now unless those were skipped for lack of input
+        missing = [p for p in stage.inputs if not os.path.exists(p)]
+        if missing:
+            if all(os.path.exists(p) for p in stage.outputs):
+                logger.warning(f"[{stage.name}] {', '.join(missing)} not found; keeping existing outputs.")
+                continue
+            logger.error(f"[{stage.name}] missing inputs: {', '.join(missing)}")
+            return False
+
+        logger.info(f"[{stage.name}] running ({reason})...")
+        try:
+            summary = stage.run(ctx)
+        except Exception as e:
+            logger.error(f"[{stage.name}] failed: {e}")
+            return False
+        state.record(stage)
+        logger.success(f"[{stage.name}] done: {summary}")
+    return True
+
+
+def main():
+    names = [stage.name for stage in STAGES]
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="only show which stages would run")
+    parser.add_argument(
+        "--force", nargs="*", choices=names, metavar="STAGE",
+        help="run these stages (all if none given) even if up to date",
+    )
+    parser.add_argument("--only", nargs="+", choices=names, metavar="STAGE")
+    parser.add_argument("--until", choices=names, metavar="STAGE", help="stop after this stage")
+    args = parser.parse_args()
+
+    stages = ordered(STAGES)
+    if args.until:
+        stages = stages[: [s.name for s in stages].index(args.until) + 1]
+    if args.only:
+        stages = [s for s in stages if s.name in args.only]
+
+    force = set(args.force) if args.force is not None else None
+    ok = run(stages, PipelineState(), force=force, dry_run=args.dry_run)
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logger.warning("Pipeline stopped by user.")
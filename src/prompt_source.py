@@ -0,0 +1,84 @@
+import json
+from typing import Any, Dict, Iterator, List
+
+from loguru import logger
+
+READ_CHUNK_SIZE = 1 << 16
+
+
+def iter_json_records(file_path: str) -> Iterator[Any]:
+    """
+    Lazily yields the records of a JSONL file or a top-level JSON list.
+    Only one chunk of the file (plus the record being decoded) is held in memory.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        if file_path.endswith(".jsonl"):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(f)
+
+
+def _iter_json_array(f) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+    started = False
+
+    while True:
+        # Skip whitespace and the separators between records
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+
+        if pos >= len(buf):
+            if eof:
+                raise json.JSONDecodeError("Unexpected end of JSON list", buf, pos)
+            chunk = f.read(READ_CHUNK_SIZE)
+            buf, pos, eof = chunk, 0, not chunk
+            continue
+
+        if not started:
+            if buf[pos] != "[":
+                raise ValueError("Expected a JSON list.")
+            started = True
+            pos += 1
+            continue
+
+        if buf[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+            # A scalar cut at the chunk boundary decodes "successfully",
+            # so only accept a record once its separator is in the buffer
+            if not eof and buf[end:].lstrip()[:1] not in (",", "]"):
+                raise json.JSONDecodeError("Record may continue", buf, end)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(READ_CHUNK_SIZE)
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+            continue
+
+        yield item
+        pos = end
+
+
+def iter_prompts(file_path: str) -> Iterator[Dict]:
+    """Yields prompt rows ({"id", "prompt"}), skipping malformed ones."""
+    for index, record in enumerate(iter_json_records(file_path)):
+        if not isinstance(record, dict) or "id" not in record or "prompt" not in record:
+            logger.warning(f"Skipping malformed prompt #{index} in '{file_path}'.")
+            continue
+        yield record
+
+
+def take(iterator: Iterator[Dict], count: int) -> List[Dict]:
+    """Pulls up to `count` items from the iterator (run in a thread by the producer)."""
+    batch = []
+    for item in iterator:
+        batch.append(item)
+        if len(batch) >= count:
+            break
+    return batch
@@ -0,0 +1,101 @@
+import hashlib
+import re
+import string
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+_FORMATTER = string.Formatter()
+
+
+class PromptTemplate:
+    """
+    A prompt template parsed once into literal segments and placeholder names.
+
+    Keeps the semantics of the old str.format-with-fallback rendering: a template
+    that str.format accepts with only `format_fields` is rendered exactly like
+    str.format (`{{`/`}}` become single braces). Any other template has only the
+    `{name}` placeholders in `fields` that are not `format_fields` substituted,
+    and every other brace (JSON examples in the instructions, a literal
+    `{target}`, etc.) is kept verbatim. Rendering is a single join over the
+    segments.
+    """
+
+    def __init__(self, text: str, fields: Iterable[str], format_fields: Iterable[str] = ()):
+        self.text = text
+        self.format_fields = set(format_fields)
+        # Names the placeholder engine substitutes; str.format-only names stay literal
+        self.fields = set(fields) - self.format_fields
+        # literals[i] comes before names[i]; there is always one more literal than names
+        self.literals: List[str] = []
+        self.names: List[str] = []
+        # (conversion, format spec) per name; only used by str.format-style templates
+        self._specs: List[Tuple[Optional[str], str]] = []
+
+        self.format_style = self._parse_format(text, self.format_fields)
+        if not self.format_style:
+            self._parse_placeholders(text)
+
+        fingerprint = text
+        escaped = "{{" in text or "}}" in text
+        if self.format_style and (escaped or any(spec != (None, "") for spec in self._specs)):
+            # Rendered differently than by the placeholder-only engine this replaced,
+            # so rows rendered by it are redone
+            fingerprint = "str.format\0" + text
+        elif not self.format_style and any(f"{{{name}}}" in text for name in self.format_fields):
+            # Earlier renderings substituted these in the placeholder engine as well
+            fingerprint = "placeholders\0" + text
+        self.fingerprint = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+    def _parse_format(self, text: str, format_fields: set) -> bool:
+        if not format_fields:
+            return False
+        try:
+            parsed = list(_FORMATTER.parse(text))
+        except ValueError:
+            return False  # unbalanced braces, e.g. a JSON example
+        literals, names, specs = [""], [], []
+        for literal, name, spec, conversion in parsed:
+            literals[-1] += literal
+            if name is None:
+                continue
+            if name not in format_fields or (spec and "{" in spec):
+                return False  # str.format would fail on it; use the placeholder engine
+            names.append(name)
+            specs.append((conversion, spec or ""))
+            literals.append("")
+        self.literals, self.names, self._specs = literals, names, specs
+        return True
+
+    def _parse_placeholders(self, text: str):
+        position = 0
+        for match in _PLACEHOLDER.finditer(text):
+            name = match.group(1)
+            if name not in self.fields:
+                continue
+            self.literals.append(text[position : match.start()])
+            self.names.append(name)
+            position = match.end()
+        self.literals.append(text[position:])
+
+    @classmethod
+    def from_file(
+        cls, file_path: str, fields: Iterable[str], format_fields: Iterable[str] = ()
+    ) -> "PromptTemplate":
+        with open(file_path, "r", encoding="utf-8") as f:
+            return cls(f.read(), fields, format_fields)
+
+    @property
+    def placeholders(self) -> List[str]:
+        """Placeholder names in the order they appear (repeats included)."""
+        return list(self.names)
+
+    def render(self, values: Mapping[str, str]) -> str:
+        parts = [self.literals[0]]
+        for index, (name, literal) in enumerate(zip(self.names, self.literals[1:])):
+            value = values[name]
+            if self._specs:
+                conversion, spec = self._specs[index]
+                value = _FORMATTER.format_field(_FORMATTER.convert_field(value, conversion), spec)
+            parts.append(value)
+            parts.append(literal)
+        return "".join(parts)
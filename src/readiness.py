@@ -0,0 +1,102 @@
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import Page
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+
+from src.config import Config
+
+# Resolves as soon as the named predicate holds, re-checking on every DOM mutation.
+# Resolves to null on timeout so the Python side can raise a proper TimeoutError.
+_WAIT_FOR_STATE_JS = """
+({ predicate, args, timeout }) => new Promise((resolve) => {
+    const isVisible = (el) => {
+        if (!el) return false;
+        const style = getComputedStyle(el);
+        return style.visibility !== 'hidden' && style.display !== 'none'
+            && !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    };
+    const anyVisible = (selector) => Array.from(document.querySelectorAll(selector)).some(isVisible);
+    const checks = {
+        anyVisible: () => {
+            const index = args.selectors.findIndex(anyVisible);
+            return index >= 0 ? { index } : null;
+        },
+        hidden: () => (anyVisible(args.selector) ? null : {}),
+        hasText: () => {
+            const el = document.querySelector(args.selector);
+            return el && el.innerText.trim().length > 0 ? {} : null;
+        },
+    };
+    const check = checks[predicate];
+    const initial = check();
+    if (initial) return resolve(initial);
+
+    const observer = new MutationObserver(() => {
+        const result = check();
+        if (result) { cleanup(); resolve(result); }
+    });
+    const timer = setTimeout(() => { cleanup(); resolve(null); }, timeout);
+    function cleanup() { observer.disconnect(); clearTimeout(timer); }
+    observer.observe(document.documentElement, {
+        childList: true, subtree: true, attributes: true, characterData: true,
+    });
+})
+"""
+
+
+class PageReadiness:
+    """
+    Waits on concrete page signals (DOM selectors and app state)
+    instead of fixed sleeps. Every wait is bounded by the step's timeout
+    from Config.READINESS_TIMEOUTS.
+    """
+
+    def __init__(self, page: Page, worker_id: int):
+        self.page = page
+        self.worker_id = worker_id
+
+    @staticmethod
+    def timeout(step: str) -> int:
+        return Config.READINESS_TIMEOUTS.get(step, Config.READINESS_DEFAULT_TIMEOUT)
+
+    async def visible(self, selector: str, step: str):
+        await self.page.locator(selector).first.wait_for(
+            state="visible", timeout=self.timeout(step)
+        )
+
+    async def any_visible(self, selectors: List[str], step: str) -> int:
+        """Waits until one of the selectors is visible and returns its index."""
+        result = await self._wait_for_state(step, "anyVisible", {"selectors": selectors})
+        return result["index"]
+
+    async def hidden(self, selector: str, step: str):
+        await self._wait_for_state(step, "hidden", {"selector": selector})
+
+    async def has_text(self, selector: str, step: str):
+        await self._wait_for_state(step, "hasText", {"selector": selector})
+
+    async def _wait_for_state(
+        self, step: str, predicate: str, args: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        timeout = self.timeout(step)
+        result: Optional[Dict[str, Any]] = None
+
+        # A navigation can destroy the context mid-wait; retry once in the new document
+        for attempt in range(2):
+            try:
+                result = await self.page.evaluate(
+                    _WAIT_FOR_STATE_JS,
+                    {"predicate": predicate, "args": args, "timeout": timeout},
+                )
+                break
+            except PlaywrightError as e:
+                if attempt or "context was destroyed" not in str(e):
+                    raise
+                await self.page.wait_for_load_state("domcontentloaded", timeout=timeout)
+
+        if result is None:
+            raise PlaywrightTimeout(
+                f"Step '{step}' not ready after {timeout}ms ({predicate}: {args})"
+            )
+        return result
@@ -0,0 +1,117 @@
+import re
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from loguru import logger
+from playwright.async_api import Page, Request, Route
+
+from src.config import Config
+from src.metrics import metrics
+
+CachedResponse = Tuple[int, Dict[str, str], bytes]
+
+
+class ResourceBlocker:
+    """
+    Opt-in request routing for worker tabs.
+
+    Requests matching Config.BLOCKED_RESOURCE_TYPES / BLOCKED_URL_PATTERNS are
+    aborted, and static assets (CACHED_RESOURCE_TYPES) are fetched once and then
+    served to every tab from an in-memory LRU. ALLOWED_URL_PATTERNS always pass
+    through untouched. Savings are reported through src.metrics.
+    """
+
+    # Shared by all tabs: the assets are the same for every worker
+    _cache: "OrderedDict[str, CachedResponse]" = OrderedDict()
+    _cache_bytes = 0
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self._allowed = [re.compile(p) for p in Config.ALLOWED_URL_PATTERNS]
+        self._blocked = [re.compile(p) for p in Config.BLOCKED_URL_PATTERNS]
+
+    async def attach(self, page: Page):
+        await page.route("**/*", self._handle)
+        if Config.RESOURCE_MEASURE_TRANSFER:
+            page.on("requestfinished", self._on_request_finished)
+        logger.debug(f"[Worker {self.worker_id}] Resource blocking enabled.")
+
+    async def _handle(self, route: Route):
+        request = route.request
+        url = request.url
+        resource_type = request.resource_type
+
+        if any(p.search(url) for p in self._allowed):
+            await route.continue_()
+            return
+
+        if resource_type in Config.BLOCKED_RESOURCE_TYPES or any(
+            p.search(url) for p in self._blocked
+        ):
+            metrics.inc("scraper_requests_blocked_total", type=resource_type)
+            await route.abort("blockedbyclient")
+            return
+
+        if request.method == "GET" and resource_type in Config.CACHED_RESOURCE_TYPES:
+            await self._serve_cached(route, url, resource_type)
+            return
+
+        await route.continue_()
+
+    async def _serve_cached(self, route: Route, url: str, resource_type: str):
+        cached = self._cache.get(url)
+        if cached is not None:
+            self._cache.move_to_end(url)
+            status, headers, body = cached
+            metrics.inc("scraper_cache_hits_total", type=resource_type)
+            metrics.inc("scraper_bytes_saved_total", len(body))
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+
+        response = await route.fetch()
+        body = await response.body()
+        if response.status == 200 and "no-store" not in response.headers.get("cache-control", ""):
+            self._store(url, (response.status, response.headers, body))
+        await route.fulfill(response=response, body=body)
+
+    @classmethod
+    def _store(cls, url: str, entry: CachedResponse):
+        size = len(entry[2])
+        if size > Config.RESOURCE_CACHE_MAX_BYTES:
+            return
+        # Several tabs can miss the same asset at once; count a replaced entry only once
+        old = cls._cache.pop(url, None)
+        if old is not None:
+            cls._cache_bytes -= len(old[2])
+        cls._cache[url] = entry
+        cls._cache_bytes += size
+        while cls._cache_bytes > Config.RESOURCE_CACHE_MAX_BYTES:
+            _, (_, _, evicted) = cls._cache.popitem(last=False)
+            cls._cache_bytes -= len(evicted)
+
+    async def _on_request_finished(self, request: Request):
+        try:
+            sizes = await request.sizes()
+            metrics.inc(
+                "scraper_bytes_transferred_total",
+                sizes["responseBodySize"] + sizes["responseHeadersSize"],
+            )
+        except Exception:
+            pass  # the page may already be gone
+
+    @staticmethod
+    def log_summary():
+        counters = metrics.counters
+        blocked = sum(
+            v for (name, _), v in counters.items() if name == "scraper_requests_blocked_total"
+        )
+        hits = sum(v for (name, _), v in counters.items() if name == "scraper_cache_hits_total")
+        saved = counters.get(("scraper_bytes_saved_total", ()), 0)
+        transferred = counters.get(("scraper_bytes_transferred_total", ()), None)
+        message = (
+            f"Resource blocking: {int(blocked)} requests blocked, {int(hits)} served from cache "
+            f"({saved / 1024 / 1024:.1f} MB not downloaded)"
+        )
+        if transferred is not None:
+            message += f", {transferred / 1024 / 1024:.1f} MB transferred"
+        logger.info(message + ".")
@@ -0,0 +1,130 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from loguru import logger
+
+from src.config import Config
+from src.metrics import metrics
+
+
+def cache_key(text: str, mode: Optional[str] = None) -> str:
+    """Content address of a prompt: the mode it runs in plus its exact final text."""
+    mode = mode if mode is not None else Config.TEXT_THINKING_MODE_LABEL
+    return hashlib.sha256(f"{mode.lower()}\0{text}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of successful outputs, keyed by `cache_key`.
+
+    Lookups and inserts are blocking and meant to run through asyncio.to_thread;
+    a lock serialises them on the shared connection. Entries older than
+    RESPONSE_CACHE_MAX_AGE_DAYS are dropped and the least recently used ones are
+    evicted once the stored outputs exceed RESPONSE_CACHE_MAX_MB.
+    """
+
+    def __init__(self, file_path: Optional[str] = None):
+        self.file_path = file_path or Config.RESPONSE_CACHE_FILE
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def open(self):
+        self._db = sqlite3.connect(self.file_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, output TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+        self._db.commit()
+        self.evict()
+
+    def close(self):
+        if self._db is None:
+            return
+        self.evict()
+        with self._lock:
+            self._db.close()
+            self._db = None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Returns the cached outputs for whichever keys are present."""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, str] = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT key, output FROM responses WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._db.executemany(
+                    "UPDATE responses SET last_used = ? WHERE key = ?",
+                    [(time.time(), key) for key in found],
+                )
+                self._db.commit()
+        return found
+
+    def put(self, key: str, output: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, output, size, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, output, len(output.encode("utf-8")), now, now),
+            )
+            self._db.commit()
+
+    def record_lookup(self, hit: bool, source: str = "cache"):
+        if hit:
+            self.hits += 1
+            metrics.inc("scraper_response_cache_hits_total", source=source)
+        else:
+            self.misses += 1
+            metrics.inc("scraper_response_cache_misses_total")
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def evict(self):
+        cutoff = time.time() - Config.RESPONSE_CACHE_MAX_AGE_DAYS * 86400
+        max_bytes = Config.RESPONSE_CACHE_MAX_MB * 1024 * 1024
+        with self._lock:
+            expired = self._db.execute("DELETE FROM responses WHERE created < ?", (cutoff,)).rowcount
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            evicted = 0
+            if total > max_bytes:
+                # Walk from least recently used until enough has been freed
+                excess = total - max_bytes
+                stale = []
+                for key, size in self._db.execute(
+                    "SELECT key, size FROM responses ORDER BY last_used"
+                ):
+                    if excess <= 0:
+                        break
+                    stale.append((key,))
+                    excess -= size
+                self._db.executemany("DELETE FROM responses WHERE key = ?", stale)
+                evicted = len(stale)
+            self._db.commit()
+        if expired or evicted:
+            logger.info(
+                f"Response cache: dropped {expired} expired and {evicted} least recently used entries."
+            )
+
+    def log_summary(self):
+        logger.info(
+            f"Response cache: {self.hits} hits / {self.hits + self.misses} lookups "
+            f"({self.hit_rate:.1%} hit rate)."
+        )
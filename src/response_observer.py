@@ -0,0 +1,167 @@
+import time
+from typing import Dict, Optional
+
+from loguru import logger
+from playwright.async_api import Page
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+
+from src.config import Config
+
+PROGRESS_BINDING = "__geminiScraperProgress"
+
+# Watches the newest response node with a MutationObserver, streams its length to
+# the exposed binding and resolves with that node's text once generation has ended:
+# the Stop button is gone and the text has not changed for `settleMs`.
+CAPTURE_RESPONSE_JS = """
+({ responseSelector, stopSelector, previousCount, startTimeout, totalTimeout,
+   settleMs, progressBinding }) => new Promise((resolve) => {
+    const isVisible = (el) => !!el && el.getClientRects().length > 0;
+    const responses = () => document.querySelectorAll(responseSelector);
+    const started = performance.now();
+    let lastText = null;
+    let lastChange = started;
+    let lastReport = 0;
+    let settleTimer = null;
+
+    const latest = () => {
+        const nodes = responses();
+        return nodes.length > previousCount ? nodes[nodes.length - 1] : null;
+    };
+    const generating = () => Array.from(document.querySelectorAll(stopSelector)).some(isVisible);
+    const finish = (status) => {
+        observer.disconnect();
+        clearInterval(ticker);
+        clearTimeout(settleTimer);
+        const node = latest();
+        resolve({ status, text: node ? node.innerText : '' });
+    };
+    const check = () => {
+        const now = performance.now();
+        const node = latest();
+        if (!node) {
+            if (!generating() && now - started > startTimeout) finish('no_response');
+            return;
+        }
+        const text = node.innerText;
+        if (text !== lastText) {
+            lastText = text;
+            lastChange = now;
+            if (window[progressBinding] && now - lastReport > 250) {
+                lastReport = now;
+                window[progressBinding](text.length);
+            }
+        }
+        if (!generating() && text.trim().length > 0) {
+            const quietFor = now - lastChange;
+            if (quietFor >= settleMs) return finish('done');
+            clearTimeout(settleTimer);
+            settleTimer = setTimeout(check, settleMs - quietFor);
+        }
+    };
+
+    const observer = new MutationObserver(check);
+    observer.observe(document.body, {
+        childList: true, subtree: true, characterData: true, attributes: true,
+    });
+    // Covers the start timeout and the total timeout when the DOM is quiet
+    const ticker = setInterval(() => {
+        if (performance.now() - started > totalTimeout) return finish('timeout');
+        check();
+    }, 500);
+    check();
+})
+"""
+
+# True when a visible banner, snackbar or error card contains a throttling phrase.
+# Reply text is never matched: a short answer may well mention "quota".
+DETECT_RATE_LIMIT_JS = """
+({ containers, patterns }) => {
+    const matches = (text) => {
+        const lower = (text || '').toLowerCase();
+        return patterns.some((p) => lower.includes(p));
+    };
+    return containers.some((selector) => Array.from(document.querySelectorAll(selector))
+        .some((el) => el.getClientRects().length > 0 && matches(el.innerText)));
+}
+"""
+
+
+class ResponseObserver:
+    """
+    Captures a prompt's response from inside the page.
+    Progress is streamed over an exposed binding; only the final
+    response node's text is transferred back over CDP.
+    """
+
+    def __init__(self, page: Page, worker_id: int):
+        self.page = page
+        self.worker_id = worker_id
+        self.chars_received = 0
+        self.last_progress: Optional[float] = None
+        self._installed = False
+
+    async def install(self):
+        """Registers the progress binding; it survives navigations."""
+        if self._installed:
+            return
+        await self.page.expose_binding(PROGRESS_BINDING, self._on_progress)
+        self._installed = True
+
+    def _on_progress(self, source, length: int):
+        self.chars_received = length
+        self.last_progress = time.monotonic()
+
+    async def response_count(self) -> int:
+        return await self.page.locator(Config.SELECTOR_RESPONSE).count()
+
+    def begin(self):
+        """Resets the progress of the previous prompt."""
+        self.chars_received = 0
+        self.last_progress = None
+
+    def capture_args(self, previous_count: int) -> Dict:
+        """Arguments of CAPTURE_RESPONSE_JS for the response after `previous_count` ones."""
+        return {
+            "responseSelector": Config.SELECTOR_RESPONSE,
+            "stopSelector": Config.SELECTOR_STOP_GENERATION,
+            "previousCount": previous_count,
+            "startTimeout": Config.READINESS_TIMEOUTS["generation_start"],
+            "totalTimeout": Config.TIMEOUT_GENERATION,
+            "settleMs": Config.RESPONSE_SETTLE_MS,
+            "progressBinding": PROGRESS_BINDING,
+        }
+
+    async def capture(self, previous_count: int) -> Optional[str]:
+        """
+        Waits for the response that follows `previous_count` existing ones.
+        Returns its text, or None if generation never produced a response.
+        """
+        self.begin()
+        try:
+            await self.install()
+        except Exception as e:
+            logger.debug(f"[Worker {self.worker_id}] Progress binding unavailable: {e}")
+
+        result = await self.page.evaluate(CAPTURE_RESPONSE_JS, self.capture_args(previous_count))
+        return self.text_of(result)
+
+    @staticmethod
+    def text_of(result: Dict) -> Optional[str]:
+        """The reply text of a capture result; raises on a generation timeout."""
+        if result["status"] == "timeout":
+            # A cut-off answer is not usable; let the caller report it as a timeout
+            raise PlaywrightTimeout(
+                f"Generation still running after {Config.TIMEOUT_GENERATION}ms "
+                f"({len(result['text'])} chars received)"
+            )
+        if result["status"] == "no_response" or not result["text"].strip():
+            return None
+        return result["text"]
+
+
+def rate_limit_args() -> Dict:
+    """Arguments of DETECT_RATE_LIMIT_JS."""
+    return {
+        "containers": Config.SELECTOR_RATE_LIMIT_CONTAINERS,
+        "patterns": [p.lower() for p in Config.RATE_LIMIT_TEXT_PATTERNS],
+    }
@@ -0,0 +1,108 @@
+import json
+import re
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+from src.config import Config
+from src.domain import ParsedOutput
+
+# Only these characters matter when matching brackets; everything else is skipped by the regex engine
+_SIGNIFICANT = re.compile(r'[{}\[\]"\\]')
+_OPENERS = re.compile(r"[{\[]")
+_CLOSERS = {"}": "{", "]": "["}
+
+
+def _balanced_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    Yields (start, end) of every top-level bracket-balanced span, in one pass.
+    Brackets inside JSON strings are ignored; quotes only count inside a span,
+    so apostrophes and quotes in the surrounding prose don't derail the scan.
+    """
+    stack = []
+    start = 0
+    in_string = False
+    escaped_at = -1
+
+    for match in _SIGNIFICANT.finditer(text):
+        ch, pos = match.group(), match.start()
+        if in_string:
+            if pos == escaped_at:
+                continue
+            if ch == "\\":
+                escaped_at = pos + 1
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch in "{[":
+            if not stack:
+                start = pos
+            stack.append(ch)
+        elif ch in "}]":
+            if not stack:
+                continue
+            if stack[-1] != _CLOSERS[ch]:
+                stack.clear()  # mismatched; not JSON, look for the next opener
+                continue
+            stack.pop()
+            if not stack:
+                yield start, pos + 1
+        elif ch == '"' and stack:
+            in_string = True
+
+
+def iter_json(text: str) -> Iterator[Any]:
+    """Yields the well-formed JSON objects/arrays found in noisy model text, in order."""
+    decoder = json.JSONDecoder()
+    for start, end in _balanced_spans(text):
+        span = text[start:end]
+        try:
+            yield json.loads(span)
+            continue
+        except ValueError:
+            pass
+
+        # A valid value nested inside a balanced but invalid span, e.g. "[see {...}]".
+        # Only such spans are searched, and scanning resumes after each decoded value.
+        pos = 1
+        while True:
+            match = _OPENERS.search(span, pos)
+            if match is None:
+                break
+            try:
+                value, pos = decoder.raw_decode(span, match.start())
+            except ValueError:
+                pos = match.start() + 1
+                continue
+            yield value
+
+
+def find_json(text: str) -> Optional[Any]:
+    """Returns the first well-formed JSON object or array in the text, or None."""
+    return next(iter_json(text), None)
+
+
+def validate(value: Any, expected_keys: Optional[Iterable[str]] = None) -> ParsedOutput:
+    """Checks the payload is one object carrying every expected key."""
+    expected_keys = Config.RESPONSE_EXPECTED_KEYS if expected_keys is None else expected_keys
+    # A single answer wrapped in an array is accepted as that answer
+    if isinstance(value, list) and len(value) == 1:
+        value = value[0]
+    if not isinstance(value, dict):
+        return ParsedOutput(value, f"expected a JSON object, got {type(value).__name__}")
+    missing = [key for key in expected_keys if key not in value]
+    if missing:
+        return ParsedOutput(value, f"missing keys: {', '.join(missing)}")
+    return ParsedOutput(value)
+
+
+def parse_response(text: Optional[str], expected_keys: Optional[Iterable[str]] = None) -> ParsedOutput:
+    """The first JSON value in the reply that passes `validate`, else the first one's error."""
+    if not text:
+        return ParsedOutput(None, "empty output")
+    first_error = None
+    for value in iter_json(text):
+        parsed = validate(value, expected_keys)
+        if parsed.ok:
+            return parsed
+        first_error = first_error or parsed
+    return first_error or ParsedOutput(None, "no JSON object or array found")
@@ -0,0 +1,235 @@
+import asyncio
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from loguru import logger
+
+from src.config import Config
+
+
+class ResultStore:
+    """
+    Append-only JSONL result log with a sidecar index of completed keys.
+
+    Results are queued by the workers and written by a single writer task that
+    group-commits whatever has accumulated and fsyncs each batch in a thread,
+    so the event loop never blocks on file I/O. The legacy JSON list is only
+    produced on demand by `export`.
+    """
+
+    def __init__(
+        self,
+        log_file: Optional[str] = None,
+        index_file: Optional[str] = None,
+        export_file: Optional[str] = None,
+    ):
+        self.log_file = log_file or Config.RESULT_LOG_FILE
+        self.index_file = index_file or Config.RESULT_INDEX_FILE
+        self.export_file = export_file or Config.OUTPUT_FILE
+        self._completed: Set[str] = set()
+        self._pending: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    # --- Lifecycle ---
+
+    async def open(self) -> Set[str]:
+        """Loads the completed-key index and starts the writer task."""
+        await asyncio.to_thread(self._load_index)
+        self._pending = asyncio.Queue()
+        self._writer = asyncio.create_task(self._writer_loop())
+        return set(self._completed)
+
+    async def close(self):
+        """Flushes everything queued so far and stops the writer task."""
+        if self._writer is None:
+            return
+        await self._pending.put(None)
+        await self._writer
+        self._writer = None
+
+    # --- Writing ---
+
+    async def append(self, result_entry: Dict) -> bool:
+        """Queues a result entry for the next group commit; a key already recorded is skipped."""
+        if result_entry["key"] in self._completed:
+            logger.debug(f"Result for {result_entry['key']} already recorded; skipping.")
+            return False
+        self._completed.add(result_entry["key"])
+        await self._pending.put(result_entry)
+        return True
+
+    def is_completed(self, key: str) -> bool:
+        return key in self._completed
+
+    async def _writer_loop(self):
+        stopping = False
+        while not stopping:
+            batch: List[Dict] = [await self._pending.get()]
+            # Group commit: take everything that queued up while the last batch was syncing
+            while len(batch) < Config.RESULT_FLUSH_BATCH and not self._pending.empty():
+                batch.append(self._pending.get_nowait())
+
+            if None in batch:
+                stopping = True
+                batch = [entry for entry in batch if entry is not None]
+
+            if batch:
+                try:
+                    await asyncio.to_thread(self._commit, batch)
+                except Exception as e:
+                    logger.error(f"Failed to write {len(batch)} results to log: {e}")
+
+    def _commit(self, batch: List[Dict]):
+        with open(self.log_file, "a", encoding="utf-8") as f:
+            for entry in batch:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        # The index is written after the log, so it can only ever lag behind it.
+        with open(self.index_file, "a", encoding="utf-8") as f:
+            for entry in batch:
+                f.write(entry["key"] + "\n")
+
+    # --- Reading ---
+
+    def iter_entries(self) -> Iterator[Dict]:
+        """Streams entries from the log, skipping a torn trailing line."""
+        if not os.path.exists(self.log_file):
+            return
+        with open(self.log_file, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(
+                        f"Skipping unreadable line {line_no} in {self.log_file}."
+                    )
+
+    def iter_results(self) -> Iterator[Dict]:
+        """Entries de-duplicated by key, keeping the first result recorded (as `export` does)."""
+        seen: Set[str] = set()
+        for entry in self.iter_entries():
+            key = entry.get("key")
+            if key in seen:
+                continue
+            seen.add(key)
+            yield entry
+
+    def _load_index(self):
+        if not os.path.exists(self.log_file) and os.path.exists(self.export_file):
+            self._migrate_legacy_output()
+
+        if os.path.exists(self.index_file):
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                self._completed = {line.rstrip("\n") for line in f if line.strip()}
+        elif os.path.exists(self.log_file):
+            logger.info(f"{self.index_file} not found. Rebuilding it from the log.")
+            self._rebuild_index()
+        else:
+            logger.info(f"{self.log_file} not found. Starting a new result log.")
+            self._completed = set()
+
+        logger.info(f"Found {len(self._completed)} completed prompts in {self.log_file}.")
+
+    def _rebuild_index(self):
+        self._completed = {e["key"] for e in self.iter_entries() if "key" in e}
+        with open(self.index_file, "w", encoding="utf-8") as f:
+            for key in self._completed:
+                f.write(key + "\n")
+
+    def _migrate_legacy_output(self):
+        """Seeds the log from an existing JSON list output (one-time)."""
+        try:
+            with open(self.export_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            logger.warning(f"{self.export_file} is corrupted or empty. Not migrating it.")
+            return
+        if not isinstance(data, list):
+            return
+
+        entries = [item for item in data if isinstance(item, dict) and "key" in item]
+        with open(self.log_file, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        logger.info(f"Migrated {len(entries)} results from {self.export_file} to {self.log_file}.")
+
+    def invalidate(self, keys: Iterable[str]) -> int:
+        """
+        Drops every result recorded for `keys` so the next run scrapes them again,
+        and refreshes the exported JSON. Rewrites the log, so only use it while no
+        run is writing to it. Returns the number of entries removed.
+        """
+        keys = set(keys)
+        if not keys or not os.path.exists(self.log_file):
+            return 0
+
+        removed = 0
+        kept: Set[str] = set()
+        tmp_path = self.log_file + ".tmp"
+        with open(self.log_file, "r", encoding="utf-8") as src, open(
+            tmp_path, "w", encoding="utf-8"
+        ) as dst:
+            for line in src:
+                try:
+                    key = json.loads(line).get("key")
+                except json.JSONDecodeError:
+                    continue  # torn line; dropped by the rewrite
+                if key in keys:
+                    removed += 1
+                    continue
+                dst.write(line if line.endswith("\n") else line + "\n")
+                if key is not None:
+                    kept.add(key)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, self.log_file)
+
+        with open(self.index_file + ".tmp", "w", encoding="utf-8") as f:
+            for key in kept:
+                f.write(f"{key}\n")
+        os.replace(self.index_file + ".tmp", self.index_file)
+        self._completed = kept
+
+        logger.info(f"Invalidated {removed} results in {self.log_file}.")
+        if removed:
+            self.export()
+        return removed
+
+    # --- Export ---
+
+    def export(self, file_path: Optional[str] = None) -> int:
+        """
+        Writes the log as the JSON list format used by the downstream tools.
+        Keys are de-duplicated, keeping the first result recorded for each.
+        """
+        file_path = file_path or self.export_file
+        count = 0
+        tmp_path = file_path + ".tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for entry in self.iter_results():
+                body = json.dumps(entry, ensure_ascii=False, indent=4)
+                f.write(("\n" if not count else ",\n") + _indent(body))
+                count += 1
+            f.write("\n]" if count else "]")
+        os.replace(tmp_path, file_path)
+
+        logger.info(f"Exported {count} results to {file_path}.")
+        return count
+
+
+def _indent(text: str, prefix: str = "    ") -> str:
+    return "\n".join(prefix + line for line in text.split("\n"))
+
+
+if __name__ == "__main__":
+    ResultStore().export()
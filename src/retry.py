@@ -0,0 +1,175 @@
+import asyncio
+import json
+import random
+from enum import Enum
+from typing import Optional, Set
+
+from loguru import logger
+
+from src.config import Config
+from src.domain import PromptTask, ScrapeResult
+from src.metrics import metrics
+
+
+class FailureKind(str, Enum):
+    TIMEOUT = "timeout"
+    EMPTY_EXTRACTION = "empty_extraction"
+    MALFORMED_OUTPUT = "malformed_output"
+    UI_DRIFT = "ui_drift"
+    RATE_LIMIT = "rate_limit"
+    UNKNOWN = "unknown"
+
+
+# Message fragments, checked in order; the first match wins
+_UI_DRIFT_MARKERS = (
+    "waiting for locator",
+    "waiting for selector",
+    "not ready after",
+    "strict mode violation",
+    "not attached",
+    "not visible",
+)
+
+
+def classify_error(error: Exception) -> FailureKind:
+    message = str(error).lower()
+    if "generation still running" in message:
+        return FailureKind.TIMEOUT
+    if any(marker.lower() in message for marker in Config.RATE_LIMIT_TEXT_PATTERNS):
+        return FailureKind.RATE_LIMIT
+    if any(marker in message for marker in _UI_DRIFT_MARKERS):
+        return FailureKind.UI_DRIFT
+    if "timeout" in message or "timed out" in message:
+        return FailureKind.TIMEOUT
+    return FailureKind.UNKNOWN
+
+
+def classify_result(result: ScrapeResult) -> FailureKind:
+    if result.error_kind:
+        return FailureKind(result.error_kind)
+    return classify_error(Exception(result.output))
+
+
+class RetryScheduler:
+    """
+    Requeues failed tasks with jittered exponential backoff and sends tasks
+    that keep failing (or fail in a non-retryable way) to a dead-letter file.
+    """
+
+    def __init__(self, queue: asyncio.Queue, dead_letter_file: Optional[str] = None):
+        self.queue = queue
+        self.dead_letter_file = dead_letter_file or Config.DEAD_LETTER_FILE
+        self.dead_lettered = 0
+        self._timers: Set[asyncio.Task] = set()
+
+    def handle_failure(self, task: PromptTask, result: ScrapeResult, worker_id: int) -> FailureKind:
+        """Schedules a retry or dead-letters the task. Must be called before task_done()."""
+        kind = classify_result(result)
+        task.failed_workers.add(worker_id)
+        metrics.inc("scraper_failures_total", kind=kind.value)
+
+        if kind == FailureKind.RATE_LIMIT:
+            # Throttling says nothing about the prompt; it waits out the account's
+            # cooldown as often as needed and is never dead-lettered for it
+            task.throttles += 1
+            delay = self.backoff(task.throttles, kind)
+            logger.warning(
+                f"[Worker {worker_id}] {task.unique_id} rate limited, "
+                f"requeued in {delay:.1f}s (not counted as an attempt)."
+            )
+            metrics.inc("scraper_retries_total", kind=kind.value)
+            self.requeue(task, delay)
+            return kind
+
+        task.attempts += 1
+        if kind.value not in Config.RETRYABLE_FAILURES or task.attempts >= Config.RETRY_MAX_ATTEMPTS:
+            self._dead_letter(task, kind, result.output)
+            return kind
+
+        delay = self.backoff(task.attempts, kind)
+        logger.warning(
+            f"[Worker {worker_id}] {task.unique_id} failed ({kind.value}), "
+            f"retry {task.attempts}/{Config.RETRY_MAX_ATTEMPTS - 1} in {delay:.1f}s."
+        )
+        metrics.inc("scraper_retries_total", kind=kind.value)
+        self.requeue(task, delay)
+        return kind
+
+    def handle_loss(self, task: PromptTask, worker_id: int, error: Exception):
+        """
+        Requeues a prompt whose tab or worker died under it. Must be called before
+        task_done(). No attempt is used: the browser failed, not the prompt.
+        """
+        kind = classify_error(error)
+        task.losses += 1
+        task.failed_workers.add(worker_id)
+        metrics.inc("scraper_tasks_lost_total", kind=kind.value)
+
+        if task.losses >= Config.RETRY_MAX_TAB_LOSSES:
+            self._dead_letter(task, kind, f"Worker crashed: {error}")
+            return
+
+        delay = self.backoff(task.losses, FailureKind.UNKNOWN)
+        logger.warning(
+            f"[Worker {worker_id}] {task.unique_id} lost with its tab, requeued in {delay:.1f}s."
+        )
+        self.requeue(task, delay)
+
+    @staticmethod
+    def backoff(attempt: int, kind: FailureKind) -> float:
+        base = Config.RETRY_RATE_LIMIT_DELAY if kind == FailureKind.RATE_LIMIT else Config.RETRY_BASE_DELAY
+        delay = min(Config.RETRY_MAX_DELAY, base * 2 ** (attempt - 1))
+        # Jitter keeps retries from several tabs from landing at the same moment
+        return delay * random.uniform(0.5, 1.0)
+
+    def requeue(self, task: PromptTask, delay: float = 0.0):
+        """Puts a task back on the queue without counting a failure. Call before task_done()."""
+        timer = asyncio.create_task(self._requeue_after(task, delay))
+        self._timers.add(timer)
+        timer.add_done_callback(self._timers.discard)
+
+    async def _requeue_after(self, task: PromptTask, delay: float):
+        await asyncio.sleep(delay)
+        task.deferred = False
+        await self.queue.put(task)
+
+    @property
+    def pending(self) -> int:
+        return len(self._timers)
+
+    async def wait_pending(self):
+        """Waits until every scheduled retry is back on the queue."""
+        if self._timers:
+            await asyncio.gather(*self._timers, return_exceptions=True)
+
+    def cancel(self):
+        for timer in self._timers:
+            timer.cancel()
+
+    def _dead_letter(self, task: PromptTask, kind: FailureKind, error: str):
+        task.dead_lettered = True
+        for member in task.members:
+            member.dead_lettered = True
+        keys = task.result_keys()
+        self.dead_lettered += len(keys)
+        metrics.inc("scraper_dead_letters_total", kind=kind.value)
+        logger.error(
+            f"{task.unique_id} dead-lettered after {task.attempts} attempt(s) ({kind.value})."
+        )
+        # IDs sharing the same prompt (duplicates, pack members) fail with it
+        entries = [
+            {
+                "key": key,
+                "failure": kind.value,
+                "attempts": task.attempts,
+                "workers": sorted(task.failed_workers),
+                "error": error,
+            }
+            for key in keys
+        ]
+        try:
+            with open(self.dead_letter_file, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Failed to write dead letter for {task.unique_id}: {e}")
@@ -0,0 +1,147 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import List, Optional, Tuple
+
+from loguru import logger
+
+from src.config import Config
+from src.domain import PromptTask
+from src.metrics import metrics
+
+
+class CostModel:
+    """
+    Predicts how long a prompt keeps a tab busy: a + b * prompt length.
+
+    Starts from the configured prior and is refitted (weighted least squares,
+    older observations decaying) from every successful prompt of the run, so
+    it follows the account's current speed.
+    """
+
+    def __init__(self):
+        self.base = Config.COST_MODEL_PRIOR_BASE
+        self.per_char = Config.COST_MODEL_PRIOR_PER_KCHAR / 1000
+        self.samples = 0
+        # Decayed sums for the regression
+        self._w = self._x = self._y = self._xx = self._xy = 0.0
+        self._abs_error = 0.0
+
+    def predict(self, task: PromptTask) -> float:
+        return max(0.0, self.base + self.per_char * len(task.text))
+
+    def observe(self, task: PromptTask, seconds: float):
+        """Records a finished prompt's duration and refits the model."""
+        error = seconds - task.predicted_cost
+        metrics.observe("scraper_task_cost_error_seconds", error)
+        self._abs_error += abs(error)
+
+        decay = Config.COST_MODEL_DECAY
+        x = float(len(task.text))
+        self._w = self._w * decay + 1
+        self._x = self._x * decay + x
+        self._y = self._y * decay + seconds
+        self._xx = self._xx * decay + x * x
+        self._xy = self._xy * decay + x * seconds
+        self.samples += 1
+        if self.samples < Config.COST_MODEL_MIN_SAMPLES:
+            return
+
+        mean_x, mean_y = self._x / self._w, self._y / self._w
+        var_x = self._xx / self._w - mean_x * mean_x
+        if var_x > 1.0:
+            # Longer prompts never make a reply faster
+            self.per_char = max(0.0, (self._xy / self._w - mean_x * mean_y) / var_x)
+        self.base = max(0.0, mean_y - self.per_char * mean_x)
+
+    @property
+    def mean_abs_error(self) -> float:
+        return self._abs_error / self.samples if self.samples else 0.0
+
+    def describe(self) -> str:
+        return (
+            f"{self.base:.1f}s + {self.per_char * 1000:.2f}s/1k chars "
+            f"({self.samples} samples, mean error {self.mean_abs_error:.1f}s)"
+        )
+
+
+class CostQueue(asyncio.Queue):
+    """
+    Bounded task queue that hands out the most expensive task first.
+
+    Longest-processing-time-first over the queued window: long prompts start
+    early and short ones fill the gaps at the end, instead of a few long ones
+    starting last on one tab while the others sit idle. Hedge twins go ahead
+    of everything; deferred tasks (handed back to reach another tab) go behind
+    everything else, as with a FIFO.
+    """
+
+    def __init__(self, model: CostModel, maxsize: int = 0):
+        self.model = model
+        self.queued_cost = 0.0
+        self._seq = itertools.count()
+        super().__init__(maxsize)
+
+    def _init(self, maxsize):
+        self._queue: List[Tuple[bool, bool, float, int, PromptTask]] = []
+
+    def _put(self, task: PromptTask):
+        task.predicted_cost = self.model.predict(task)
+        self.queued_cost += task.predicted_cost
+        cost = -task.predicted_cost if Config.SCHEDULER_COST_ORDER else 0.0
+        key = (task.deferred, task.race is None, cost, next(self._seq))
+        heapq.heappush(self._queue, (*key, task))
+
+    def _get(self) -> PromptTask:
+        task = heapq.heappop(self._queue)[-1]
+        self.queued_cost = max(0.0, self.queued_cost - task.predicted_cost) if self._queue else 0.0
+        return task
+
+
+class CompletionForecast:
+    """Predicted end of the run from the queued and running work, checked against the actual end."""
+
+    def __init__(self, queue: CostQueue):
+        self.queue = queue
+        self.first: Optional[Tuple[float, float]] = None  # (made at, predicted end), monotonic
+        self._running = {}  # worker id -> (task, started)
+
+    def start(self, worker_id: int, task: PromptTask):
+        self._running[worker_id] = (task, time.monotonic())
+
+    def finish(self, worker_id: int):
+        self._running.pop(worker_id, None)
+
+    def predict(self, workers: int) -> float:
+        """Seconds until the currently known work is done with `workers` tabs."""
+        now = time.monotonic()
+        running = sum(
+            max(0.0, task.predicted_cost - (now - started))
+            for task, started in self._running.values()
+        )
+        return (self.queue.queued_cost + running) / max(1, workers)
+
+    def report(self, workers: int):
+        remaining = self.predict(workers)
+        now = time.monotonic()
+        # Prior-only predictions say little, so the forecast checked at the end is
+        # the first one made with a fitted model
+        if self.first is None and self.queue.model.samples >= Config.COST_MODEL_MIN_SAMPLES:
+            self.first = (now, now + remaining)
+        logger.info(
+            f"[Scheduler] ~{remaining:.0f}s of work left on {workers} tab(s) "
+            f"({self.queue.qsize()} queued, {len(self._running)} running); "
+            f"cost model {self.queue.model.describe()}."
+        )
+
+    def summary(self):
+        if self.first is None:
+            return
+        made_at, predicted_end = self.first
+        now = time.monotonic()
+        predicted, actual = predicted_end - made_at, now - made_at
+        logger.info(
+            f"[Scheduler] Forecast {predicted:.0f}s to finish; "
+            f"took {actual:.0f}s ({actual - predicted:+.0f}s)."
+        )
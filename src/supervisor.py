@@ -0,0 +1,171 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+from playwright.async_api import Page
+
+from src.config import Config
+from src.domain import PromptTask
+from src.metrics import TaskTrace, metrics
+from src.retry import RetryScheduler
+
+
+class WorkerSupervisor:
+    """
+    Owns the worker tasks and keeps the number of live tabs at the target.
+
+    A worker that dies (an exception outside process_prompt, or its tab
+    crashing/closing underneath it) has its in-flight prompt handed to the
+    RetryScheduler and its queue slot released, so queue.join() never hangs;
+    a replacement worker is then spawned after a short backoff.
+    """
+
+    def __init__(
+        self,
+        queue: asyncio.Queue,
+        retry: RetryScheduler,
+        run_worker: Callable[[int], Awaitable[None]],
+    ):
+        self.queue = queue
+        self.retry = retry
+        self._run_worker = run_worker
+        self.target = 0
+        self.workers: Dict[int, asyncio.Task] = {}
+        self.idle: Set[int] = set()
+        self.retiring: Set[int] = set()
+        self.crashes = 0
+        self._next_worker_id = 1
+        self._in_flight: Dict[int, Tuple[PromptTask, TaskTrace]] = {}
+        self._pages: Dict[int, Page] = {}
+        self._lost_pages: Dict[int, str] = {}
+        self._consecutive_crashes = 0
+        self._respawn_handle: Optional[asyncio.TimerHandle] = None
+        self._stopping = False
+
+    # --- Called by workers ---
+
+    def should_run(self, worker_id: int) -> bool:
+        return worker_id not in self.retiring
+
+    def begin(self, worker_id: int, task: PromptTask, trace: TaskTrace):
+        self._in_flight[worker_id] = (task, trace)
+
+    def finish(self, worker_id: int):
+        """Call right before task_done(); the task is no longer ours to requeue."""
+        self._in_flight.pop(worker_id, None)
+        self._consecutive_crashes = 0
+
+    def watch_page(self, worker_id: int, page: Page):
+        self._pages[worker_id] = page
+        page.on("crash", lambda _: self._on_page_lost(worker_id, page, "crashed"))
+        page.on("close", lambda _: self._on_page_lost(worker_id, page, "closed"))
+
+    def release_page(self, worker_id: int):
+        """Call before closing a tab on purpose so it isn't reported as lost."""
+        self._pages.pop(worker_id, None)
+
+    # --- Scaling ---
+
+    def alive(self) -> List[int]:
+        return sorted(
+            wid
+            for wid, task in self.workers.items()
+            if not task.done() and wid not in self.retiring
+        )
+
+    def scale(self, target: int):
+        """Spawns or retires workers until the live count matches the target."""
+        self.target = target
+        if self._stopping:
+            return
+        alive = self.alive()
+
+        for _ in range(target - len(alive)):
+            self._spawn()
+
+        # Retire the newest workers first; idle ones go now, busy ones after their task
+        for worker_id in reversed(alive[target:]):
+            if worker_id in self.idle:
+                self.workers[worker_id].cancel()
+            else:
+                self.retiring.add(worker_id)
+
+    def _spawn(self):
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        task = asyncio.create_task(self._run_worker(worker_id))
+        task.add_done_callback(lambda t: self._on_worker_done(worker_id, t))
+        self.workers[worker_id] = task
+
+    # --- Failure handling ---
+
+    def _on_page_lost(self, worker_id: int, page: Page, reason: str):
+        if self._stopping or self._pages.get(worker_id) is not page:
+            return  # closed by its own worker, or already handled
+        self._pages.pop(worker_id, None)
+        self._lost_pages[worker_id] = reason
+        task = self.workers.get(worker_id)
+        if task is not None and not task.done():
+            # Operations on a dead tab can hang until their timeouts; stop the worker now
+            task.cancel()
+
+    def _on_worker_done(self, worker_id: int, task: asyncio.Task):
+        self.workers.pop(worker_id, None)
+        self.idle.discard(worker_id)
+        self._pages.pop(worker_id, None)
+        retired = worker_id in self.retiring
+        self.retiring.discard(worker_id)
+        lost_page = self._lost_pages.pop(worker_id, None)
+        in_flight = self._in_flight.pop(worker_id, None)
+
+        if self._stopping:
+            return
+        if task.cancelled() and lost_page is None:
+            return  # retired while idle
+        error = None if task.cancelled() else task.exception()
+        if error is None and lost_page is None:
+            return  # finished its last task after being retired
+
+        reason = f"tab {lost_page}" if lost_page else f"{type(error).__name__}: {error}"
+        self.crashes += 1
+        self._consecutive_crashes += 1
+        metrics.inc("scraper_worker_crashes_total")
+        logger.error(f"[Worker {worker_id}] died ({reason}).")
+
+        if in_flight is not None:
+            self._requeue(worker_id, *in_flight, error or RuntimeError(f"Target {lost_page}"))
+        if not retired:
+            self._schedule_respawn()
+
+    def _requeue(self, worker_id: int, task: PromptTask, trace: TaskTrace, error: Exception):
+        metrics.end_task(trace, "crashed")
+        self.retry.handle_loss(task, worker_id, error)
+        self.queue.task_done()
+
+    def _schedule_respawn(self):
+        if self._respawn_handle is not None:
+            return  # one pending respawn fills every missing slot
+        delay = min(
+            Config.WORKER_MAX_RESPAWN_DELAY,
+            Config.WORKER_RESPAWN_DELAY * 2 ** (self._consecutive_crashes - 1),
+        )
+        logger.info(f"Replacing dead worker tabs in {delay:.0f}s.")
+        self._respawn_handle = asyncio.get_running_loop().call_later(delay, self._respawn)
+
+    def _respawn(self):
+        self._respawn_handle = None
+        missing = self.target - len(self.alive())
+        if missing > 0:
+            metrics.inc("scraper_worker_respawns_total", missing)
+        self.scale(self.target)
+
+    async def stop(self):
+        """Cancels every worker; nothing is requeued or respawned from here on."""
+        self._stopping = True
+        if self._respawn_handle is not None:
+            self._respawn_handle.cancel()
+            self._respawn_handle = None
+        workers = list(self.workers.values())
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
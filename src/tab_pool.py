@@ -0,0 +1,135 @@
+import asyncio
+from typing import Optional, Set, Union
+
+from loguru import logger
+from playwright.async_api import Page
+
+from src.browser_core import BrowserCore
+from src.config import Config
+from src.metrics import metrics
+from src.page_handler import GeminiTabHandler
+
+# Worker id shown in the logs of a tab that is still warming up in the pool
+POOL_WORKER_ID = 0
+
+
+class TabPool:
+    """
+    Hands workers tabs that are loaded and set up (menu, temporary chat,
+    thinking mode) before they ask for one.
+
+    `start` connects to Chrome, takes over the app tabs already open there and
+    warms new ones up to the requested size, all concurrently and while the
+    producer is still reading prompts. A tab that fails to warm is handed to
+    the next `acquire` as its exception, so the worker fails like it would on
+    `new_page` and the supervisor's respawn backoff applies.
+    """
+
+    def __init__(self, browser_core: BrowserCore, base_url: Optional[str] = None):
+        self.browser_core = browser_core
+        self.base_url = base_url or Config.BASE_URL
+        self.adopted: Set[Page] = set()
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._warming: Set[asyncio.Task] = set()
+        self._waiting = 0
+        self._started = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+    async def start(self, size: int):
+        """Connects and starts warming `size` tabs in the background; returns once connected."""
+        try:
+            await self.browser_core.connect()
+            adopted = []
+            if Config.TAB_POOL_ADOPT_EXISTING:
+                adopted = self.browser_core.adopt_pages(self.base_url)
+        except BaseException as e:
+            self._error = e
+            raise
+        finally:
+            self._started.set()
+
+        for page in adopted:
+            self.adopted.add(page)
+            self._spawn(page)
+        if adopted:
+            logger.info(f"Taking over {len(adopted)} open tab(s).")
+            metrics.inc("scraper_tabs_adopted_total", len(adopted))
+        for _ in range(size - len(adopted)):
+            self._spawn()
+
+    async def acquire(self, worker_id: int) -> GeminiTabHandler:
+        """Waits for a ready tab; opens one on demand if none is on its way."""
+        await self._started.wait()
+        if self._error is not None:
+            raise RuntimeError(f"Browser connection failed: {self._error}")
+
+        self._waiting += 1
+        try:
+            while True:
+                if self._ready.empty() and len(self._warming) < self._waiting:
+                    self._spawn()
+                with metrics.phase("tab_wait", worker_id):
+                    item: Union[GeminiTabHandler, BaseException] = await self._ready.get()
+                if isinstance(item, BaseException):
+                    raise item
+                if not item.page.is_closed():
+                    break
+        finally:
+            self._waiting -= 1
+
+        item.assign(worker_id)
+        # Keep spares warm for respawns and scale-ups
+        while self._ready.qsize() + len(self._warming) < Config.TAB_POOL_SPARES:
+            self._spawn()
+        return item
+
+    async def release(self, page: Page):
+        """Closes a worker's tab; tabs that were open before the run are left open."""
+        if page in self.adopted or page.is_closed():
+            return
+        try:
+            await page.close()
+        except Exception:
+            pass  # already crashed or closed
+
+    def _spawn(self, page: Optional[Page] = None):
+        if self._closed:
+            return
+        task = asyncio.create_task(self._warm(page))
+        self._warming.add(task)
+        task.add_done_callback(self._warming.discard)
+
+    async def _warm(self, page: Optional[Page]):
+        handler = None
+        try:
+            if page is None:
+                page = await self.browser_core.new_page()
+                handler = GeminiTabHandler(page, POOL_WORKER_ID, self.base_url)
+                await handler.initialize()
+            else:
+                handler = GeminiTabHandler(page, POOL_WORKER_ID, self.base_url)
+                await handler.adopt()
+            await handler.ensure_ready()
+        except asyncio.CancelledError:
+            if handler is not None:
+                await self.release(handler.page)
+            raise
+        except Exception as e:
+            logger.error(f"Failed to warm up a tab: {e}")
+            if handler is not None:
+                await self.release(handler.page)
+            self._ready.put_nowait(e)
+            return
+        self._ready.put_nowait(handler)
+
+    async def close(self):
+        """Stops warming and closes the tabs nobody took."""
+        self._closed = True
+        for task in list(self._warming):
+            task.cancel()
+        await asyncio.gather(*self._warming, return_exceptions=True)
+        while not self._ready.empty():
+            item = self._ready.get_nowait()
+            if isinstance(item, GeminiTabHandler):
+                await self.release(item.page)
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from src import hedging
+from src.config import Config
+from src.domain import HedgeRace, PackMember, PromptTask
+from src.hedging import Hedger
+
+
+@pytest.fixture(autouse=True)
+def hedge_config(monkeypatch):
+    monkeypatch.setattr(Config, "HEDGE_PERCENTILE", 90)
+    monkeypatch.setattr(Config, "HEDGE_MIN_DELAY", 5)
+    monkeypatch.setattr(Config, "HEDGE_MIN_SAMPLES", 10)
+    monkeypatch.setattr(Config, "HEDGE_WINDOW", 10)
+    monkeypatch.setattr(Config, "HEDGE_MAX_EXTRA_LOAD", 0.25)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(hedging.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _hedger(durations=range(1, 11)):
+    hedger = Hedger()
+    for seconds in durations:
+        hedger.record(float(seconds))
+    return hedger
+
+
+def _track(hedger, tasks):
+    """Registers each task on its own worker (1, 2, ...) with a pending generation."""
+    loop = asyncio.get_running_loop()
+    calls = []
+    for worker_id, task in enumerate(tasks, start=1):
+        call = loop.create_future()
+        hedger.track(worker_id, task, call)
+        calls.append(call)
+    return calls
+
+
+def test_threshold_needs_enough_samples():
+    assert _hedger(range(1, 10)).threshold() is None
+    assert _hedger().threshold() == 10.0
+
+
+def test_threshold_is_the_percentile_of_the_recent_window():
+    hedger = _hedger([100.0] * 10 + list(range(11, 21)))
+    assert hedger.threshold() == 20.0
+
+
+def test_threshold_never_below_the_minimum_delay():
+    assert _hedger([1.0] * 10).threshold() == 5
+
+
+def test_stragglers_slowest_first_skipping_raced_and_packed_tasks(clock):
+    async def run():
+        hedger = _hedger()
+        loop = asyncio.get_running_loop()
+        tasks = {
+            1: PromptTask("a", "x"),
+            2: PromptTask("b", "x"),
+            3: PromptTask("fresh", "x"),
+            4: PromptTask("raced", "x", race=HedgeRace(primary=PromptTask("p", "x"))),
+            5: PromptTask("packed", "x", members=[PackMember("m", "x", {})]),
+        }
+        for worker_id in (2, 1, 4, 5):
+            hedger.track(worker_id, tasks[worker_id], loop.create_future())
+            clock[0] += 1
+        clock[0] += 10
+        hedger.track(3, tasks[3], loop.create_future())
+        return [task.unique_id for task in hedger.stragglers()]
+
+    assert asyncio.run(run()) == ["b", "a"]
+
+
+def test_no_stragglers_before_the_threshold_is_known(clock):
+    async def run():
+        hedger = _hedger(range(1, 5))
+        _track(hedger, [PromptTask("a", "x")])
+        clock[0] += 1000
+        return hedger.stragglers()
+
+    assert asyncio.run(run()) == []
+
+
+def test_hedge_budget_follows_prompts_started():
+    async def run():
+        hedger = _hedger()
+        _track(hedger, [PromptTask(str(i), "x") for i in range(4)])
+        budget = [hedger.within_budget()]
+        hedger.hedge(PromptTask("a", "x"))
+        budget.append(hedger.within_budget())
+        return budget
+
+    assert asyncio.run(run()) == [True, False]
+
+
+def test_hedge_links_the_prompt_and_its_twin():
+    task = PromptTask("a", "text", cache_key="k", duplicates=["a2"])
+    twin = _hedger().hedge(task)
+
+    assert twin is not task
+    assert twin.race is task.race
+    assert task.race.primary is task
+    assert (task.race.running, task.race.won) == (2, False)
+    assert (twin.unique_id, twin.text, twin.cache_key, twin.duplicates) == ("a", "text", "k", ["a2"])
+    assert (twin.attempts, twin.deferred) == (0, False)
+
+
+def test_cancel_twin_only_cancels_the_other_attempt():
+    async def run():
+        hedger = _hedger()
+        task = PromptTask("a", "x")
+        twin = hedger.hedge(task)
+        other = PromptTask("b", "x")
+        calls = _track(hedger, [task, twin, other])
+        hedger.cancel_twin(twin)
+        return [call.cancelled() for call in calls]
+
+    assert asyncio.run(run()) == [True, False, False]
+
+
+def test_untracked_prompts_are_no_longer_hedged(clock):
+    async def run():
+        hedger = _hedger()
+        _track(hedger, [PromptTask("a", "x")])
+        clock[0] += 100
+        hedger.untrack(1)
+        return hedger.stragglers()
+
+    assert asyncio.run(run()) == []
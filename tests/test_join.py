@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+from utils import _3map_promptoutput_dataset as join_stage
+
+
+def _row(sample_id):
+    return {
+        "id": sample_id, "preceding": "p", "target": f"t{sample_id}", "following": "f",
+        "A1_Score": 1, "A2_Score": 2, "A3_Score": 3,
+    }
+
+
+def _output(key, principle="P1"):
+    return {"key": key, "value": {"principle_id": principle, "justification_reasoning": "why"}}
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = {
+        "dataset_file": tmp_path / "dataset.jsonl",
+        "outputs_file": tmp_path / "outputs.jsonl",
+        "output_file": tmp_path / "review.jsonl",
+        "index_file": tmp_path / "review.idx.sqlite",
+    }
+    _write_jsonl(paths["dataset_file"], [_row(i) for i in ("A", "B", "C")])
+    return paths
+
+
+def _write_jsonl(path, records):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+
+
+def _join(files, outputs, full=False):
+    _write_jsonl(files["outputs_file"], outputs)
+    return join_stage.join(*(str(files[name]) for name in (
+        "dataset_file", "outputs_file", "output_file", "index_file")), full)
+
+
+def _review(files):
+    return [json.loads(line) for line in files["output_file"].read_text(encoding="utf-8").splitlines()]
+
+
+def test_merges_outputs_in_dataset_order(files):
+    stats = _join(files, [_output("C"), _output("A"), _output("X")])
+
+    review = _review(files)
+    assert [row["id"] for row in review] == ["A", "C"]
+    assert review[0]["target"] == "tA"
+    assert review[0]["principle_id"] == "P1"
+    assert review[0]["llm_justification"] == "why"
+    assert stats["rebuilt"]
+    assert (stats["merged"], stats["unmatched_outputs"], stats["pending_rows"]) == (2, 1, 1)
+    assert stats["unmatched_sample"] == ["X"]
+    assert stats["pending_sample"] == ["B"]
+
+
+def test_later_runs_only_append_new_keys(files):
+    _join(files, [_output("A")])
+    stats = _join(files, [_output("A"), _output("B")])
+
+    assert [row["id"] for row in _review(files)] == ["A", "B"]
+    assert not stats["rebuilt"]
+    assert (stats["merged"], stats["already_merged"], stats["total_merged"]) == (1, 1, 2)
+
+
+def test_changed_output_rewrites_the_review_file(files):
+    _join(files, [_output("A"), _output("B")])
+    stats = _join(files, [_output("A", principle="P2"), _output("B")])
+
+    review = _review(files)
+    assert [(row["id"], row["principle_id"]) for row in review] == [("A", "P2"), ("B", "P1")]
+    assert stats["rebuilt"]
+
+
+def test_changed_dataset_rebuilds_index_and_output(files):
+    _join(files, [_output("A")])
+    _write_jsonl(files["dataset_file"], [_row(i) for i in ("A", "B", "C", "D")])
+    stats = _join(files, [_output("A"), _output("D")])
+
+    assert stats["rebuilt"]
+    assert [row["id"] for row in _review(files)] == ["A", "D"]
+
+
+def test_full_rebuilds_even_when_nothing_changed(files):
+    _join(files, [_output("A")])
+    stats = _join(files, [_output("A")], full=True)
+
+    assert stats["rebuilt"]
+    assert (stats["merged"], stats["already_merged"]) == (1, 0)
+    assert [row["id"] for row in _review(files)] == ["A"]
+
+
+def test_in_memory_outputs_replace_the_outputs_file(files):
+    stats = join_stage.join(
+        str(files["dataset_file"]), str(files["outputs_file"]), str(files["output_file"]),
+        str(files["index_file"]), False, outputs=[_output("B"), {"key": "C"}, "junk"],
+    )
+    assert stats["merged"] == 1
+    assert [row["id"] for row in _review(files)] == ["B"]
+
+
+def test_dataset_without_ids_is_rejected(files):
+    files["dataset_file"].write_text('{"target": "t"}\n', encoding="utf-8")
+    with pytest.raises(SystemExit):
+        _join(files, [_output("A")])
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from src.config import Config
+from src.pacer import TokenBucketPacer
+
+
+@pytest.fixture(autouse=True)
+def short_cooldowns(monkeypatch):
+    monkeypatch.setattr(Config, "PACER_COOLDOWN", 0.05)
+    monkeypatch.setattr(Config, "PACER_MAX_COOLDOWN", 0.2)
+    monkeypatch.setattr(Config, "PACER_BACKOFF_FACTOR", 0.5)
+    monkeypatch.setattr(Config, "PACER_MIN_RATE", 1.0)
+    monkeypatch.setattr(Config, "PACER_RECOVERY_STEP", 0.25)
+
+
+def test_unpaced_until_the_first_throttle():
+    async def run():
+        pacer = TokenBucketPacer(rate_per_minute=None, burst=2)
+        for _ in range(10):
+            await asyncio.wait_for(pacer.acquire(), 0.1)
+        return pacer
+
+    pacer = asyncio.run(run())
+    assert pacer.rate is None
+    assert len(pacer._submits) == 10
+
+
+def test_burst_is_served_then_tokens_run_out():
+    async def run():
+        pacer = TokenBucketPacer(rate_per_minute=60, burst=3)
+        for _ in range(3):
+            await asyncio.wait_for(pacer.acquire(), 0.1)
+        with pytest.raises(asyncio.TimeoutError):
+            # The next token is a second away at 60/min
+            await asyncio.wait_for(pacer.acquire(), 0.1)
+
+    asyncio.run(run())
+
+
+def test_throttle_pauses_the_pool_and_halves_the_observed_rate():
+    async def run():
+        pacer = TokenBucketPacer(rate_per_minute=None, burst=2)
+        for _ in range(8):
+            await pacer.acquire()
+        pacer.report_throttled(worker_id=1)
+        paused = pacer.paused
+        rate = pacer.rate
+        await asyncio.wait_for(pacer.wait_resumed(), 1)
+        return paused, rate, pacer.paused
+
+    paused, rate, paused_after = asyncio.run(run())
+    assert paused
+    assert rate == 4.0
+    assert not paused_after
+
+
+def test_throttles_in_one_pause_count_once():
+    async def run():
+        pacer = TokenBucketPacer(rate_per_minute=40, burst=2)
+        pacer.report_throttled(worker_id=1)
+        pacer.report_throttled(worker_id=2)
+        result = (pacer.consecutive_throttles, pacer.rate)
+        pacer.close()
+        return result
+
+    assert asyncio.run(run()) == (1, 20.0)
+
+
+def test_rate_never_drops_below_the_minimum():
+    async def run():
+        pacer = TokenBucketPacer(rate_per_minute=1.5, burst=1)
+        pacer.report_throttled(worker_id=1)
+        pacer.close()
+        return pacer.rate
+
+    assert asyncio.run(run()) == 1.0
+
+
+def test_successes_recover_the_rate_up_to_the_configured_maximum():
+    async def run():
+        pacer = TokenBucketPacer(rate_per_minute=2, burst=1)
+        pacer.report_throttled(worker_id=1)
+        pacer.close()
+        pacer.report_success()
+        recovered = pacer.rate
+        for _ in range(10):
+            pacer.report_success()
+        return recovered, pacer.rate, pacer.consecutive_throttles
+
+    assert asyncio.run(run()) == (1.25, 2, 0)
+
+
+def test_close_releases_waiting_workers():
+    async def run():
+        pacer = TokenBucketPacer(rate_per_minute=None, burst=1)
+        await pacer.acquire()
+        pacer.report_throttled(worker_id=1)
+        waiter = asyncio.create_task(pacer.wait_resumed())
+        await asyncio.sleep(0)
+        pacer.close()
+        await asyncio.wait_for(waiter, 0.1)
+
+    asyncio.run(run())
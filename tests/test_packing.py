@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from src import packing
+from src.config import Config
+from src.domain import PackMember
+
+
+@pytest.fixture(autouse=True)
+def pack_config(monkeypatch):
+    monkeypatch.setattr(Config, "PACK_ADAPTIVE", True)
+    monkeypatch.setattr(Config, "PACK_SIZE", 4)
+    monkeypatch.setattr(Config, "PACK_MAX_SIZE", 6)
+    monkeypatch.setattr(Config, "PACK_GROW_AFTER", 2)
+    monkeypatch.setattr(Config, "VALIDATE_OUTPUT", True)
+    monkeypatch.setattr(Config, "RESPONSE_EXPECTED_KEYS", ["principle_id"])
+
+
+def test_sizer_grows_after_a_streak():
+    sizer = packing.PackSizer()
+    sizer.record(4, 4)
+    assert sizer.size == 4
+    sizer.record(4, 4)
+    assert sizer.size == 5
+
+
+def test_sizer_never_grows_past_maximum():
+    sizer = packing.PackSizer(6)
+    for _ in range(4):
+        sizer.record(6, 6)
+    assert sizer.size == 6
+
+
+def test_sizer_halves_on_partial_answer_and_resets_streak():
+    sizer = packing.PackSizer()
+    sizer.record(4, 4)
+    sizer.record(4, 3)
+    assert sizer.size == 2
+    sizer.record(2, 2)
+    assert sizer.size == 2
+
+
+def test_sizer_ignores_single_rows_and_fixed_mode(monkeypatch):
+    sizer = packing.PackSizer()
+    sizer.record(1, 0)
+    assert sizer.size == 4
+    monkeypatch.setattr(Config, "PACK_ADAPTIVE", False)
+    sizer.record(4, 0)
+    assert sizer.size == 4
+
+
+def test_split_packed_output_maps_rows_by_id():
+    output = (
+        "Here you go:\n```json\n"
+        '[{"id": "P1", "principle_id": "A"}, {"id": "P2", "principle_id": "B"}]\n```'
+    )
+
+    answers = packing.split_packed_output(output, ["P1", "P2", "P3"])
+
+    assert sorted(answers) == ["P1", "P2"]
+    assert json.loads(answers["P1"]) == {"principle_id": "A"}
+
+
+def test_split_packed_output_skips_unknown_repeated_and_invalid_rows():
+    output = json.dumps([
+        {"id": "P1", "principle_id": "first"},
+        {"id": "P1", "principle_id": "repeat"},
+        {"id": "P9", "principle_id": "unknown"},
+        {"id": "P2", "other": "missing the expected key"},
+    ])
+
+    answers = packing.split_packed_output(output, ["P1", "P2"])
+
+    assert list(answers) == ["P1"]
+    assert json.loads(answers["P1"]) == {"principle_id": "first"}
+
+
+def test_split_packed_output_keeps_rows_before_a_truncated_tail():
+    output = '{"id": "P1", "principle_id": "A"}\n{"id": "P2", "principle_id": "B"}\n{"id": "P3", "princ'
+
+    assert sorted(packing.split_packed_output(output, ["P1", "P2", "P3"])) == ["P1", "P2"]
+
+
+def test_split_packed_output_matches_numeric_ids():
+    answers = packing.split_packed_output('[{"id": 7, "principle_id": "A"}]', ["7"])
+    assert list(answers) == ["7"]
+
+
+def test_split_chunks_members():
+    members = [PackMember(f"P{i}", f"prompt {i}", {}) for i in range(5)]
+    groups = packing.split(members, 2)
+    assert [[m.unique_id for m in g] for g in groups] == [["P0", "P1"], ["P2", "P3"], ["P4"]]
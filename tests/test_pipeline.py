@@ -0,0 +1,158 @@
+import os
+
+import pytest
+
+from src import pipeline
+from src.pipeline import PipelineState, Stage, fingerprint, ordered, run
+
+
+class Chain:
+    """source -> [copy] -> middle -> [upper] -> final, with each stage's runs counted."""
+
+    def __init__(self, tmp_path):
+        self.dir = tmp_path
+        self.runs = []
+        self.source = self.path("source.txt")
+        self.middle = self.path("middle.txt")
+        self.final = self.path("final.txt")
+        self.code = self.path("upper.py")
+        self.write(self.source, "data")
+        self.write(self.code, "# v1")
+        self.state_file = self.path("state.json")
+        self.stages = [
+            Stage("copy", [self.source], [self.middle], self._copy),
+            Stage("upper", [self.middle], [self.final], self._upper, code=[self.code]),
+        ]
+
+    def path(self, name):
+        return str(self.dir / name)
+
+    @staticmethod
+    def write(path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    @staticmethod
+    def read(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _copy(self, ctx):
+        self.runs.append("copy")
+        self.write(self.middle, self.read(self.source))
+        return "copied"
+
+    def _upper(self, ctx):
+        self.runs.append("upper")
+        self.write(self.final, self.read(self.middle).upper())
+        return "uppercased"
+
+    def run(self, **kwargs):
+        self.runs = []
+        ok = run(self.stages, PipelineState(self.state_file), **kwargs)
+        return ok, self.runs
+
+
+@pytest.fixture
+def chain(tmp_path):
+    return Chain(tmp_path)
+
+
+def test_fingerprint_hashes_only_when_the_stat_changed(tmp_path, monkeypatch):
+    path = str(tmp_path / "file.txt")
+    assert fingerprint(path) is None
+    Chain.write(path, "abc")
+    first = fingerprint(path)
+
+    hashed = []
+    monkeypatch.setattr(pipeline, "_file_hash", lambda p: hashed.append(p) or "new-hash")
+    assert fingerprint(path, first) is first
+    assert hashed == []
+
+    os.utime(path, ns=(0, 0))
+    assert fingerprint(path, first)["sha256"] == "new-hash"
+    assert hashed == [path]
+
+
+def test_first_run_runs_everything_then_nothing(chain):
+    assert chain.run() == (True, ["copy", "upper"])
+    assert chain.read(chain.final) == "DATA"
+    assert chain.run() == (True, [])
+
+
+def test_rewritten_but_identical_input_is_skipped(chain):
+    chain.run()
+    chain.write(chain.source, "data")
+    os.utime(chain.source, ns=(1, 1))
+    assert chain.run() == (True, [])
+
+
+def test_changed_input_reruns_the_stage_and_what_depends_on_its_output(chain):
+    chain.run()
+    chain.write(chain.source, "more data")
+    assert chain.run() == (True, ["copy", "upper"])
+    assert chain.read(chain.final) == "MORE DATA"
+
+
+def test_unchanged_output_stops_the_cascade(chain):
+    copy_code = chain.path("copy.py")
+    chain.write(copy_code, "# v1")
+    chain.stages[0].code = [copy_code]
+    chain.run()
+    chain.write(copy_code, "# v2")
+    # copy re-runs but writes the same middle.txt, so upper stays up to date
+    assert chain.run() == (True, ["copy"])
+
+
+def test_changed_code_or_missing_output_reruns_the_stage(chain):
+    chain.run()
+    chain.write(chain.code, "# v2")
+    assert chain.run() == (True, ["upper"])
+    os.remove(chain.final)
+    assert chain.run() == (True, ["upper"])
+
+
+def test_incomplete_stage_is_rerun(chain):
+    chain.run()
+    chain.stages[0].is_complete = lambda: False
+    assert chain.run() == (True, ["copy"])
+
+
+def test_state_survives_a_new_process(chain):
+    chain.run()
+    state = PipelineState(chain.state_file)
+    assert [state.stale_reason(stage) for stage in chain.stages] == [None, None]
+
+
+def test_force_and_dry_run(chain):
+    chain.run()
+    assert chain.run(force={"upper"}) == (True, ["upper"])
+    assert chain.run(force=set()) == (True, ["copy", "upper"])
+    os.remove(chain.final)
+    assert chain.run(dry_run=True) == (True, [])
+    assert not os.path.exists(chain.final)
+
+
+def test_failed_stage_stops_the_run_and_is_not_recorded(chain):
+    def fail(ctx):
+        chain.runs.append("copy")
+        raise RuntimeError("boom")
+
+    chain.stages[0].run = fail
+    assert chain.run() == (False, ["copy"])
+    assert PipelineState(chain.state_file).stale_reason(chain.stages[0]) == "never run"
+
+
+def test_missing_input_keeps_existing_outputs(chain):
+    chain.run()
+    os.remove(chain.source)
+    assert chain.run() == (True, [])
+    os.remove(chain.middle)
+    assert chain.run() == (False, [])
+
+
+def test_ordered_puts_producers_first_and_rejects_cycles(chain):
+    assert [s.name for s in ordered(list(reversed(chain.stages)))] == ["copy", "upper"]
+    loop = Stage("loop", [chain.final], [chain.source], lambda ctx: None)
+    with pytest.raises(ValueError):
+        ordered(chain.stages + [loop])
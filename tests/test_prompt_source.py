@@ -0,0 +1,63 @@
+import io
+import json
+
+import pytest
+
+from src import prompt_source
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Records and scalars straddle the chunk boundaries
+    monkeypatch.setattr(prompt_source, "READ_CHUNK_SIZE", 7)
+
+
+def _records(text):
+    return list(prompt_source._iter_json_array(io.StringIO(text)))
+
+
+def test_streams_records_across_chunks(small_chunks):
+    records = [{"id": f"P{i}", "prompt": "x" * i, "n": [i, {"k": "v, ]"}]} for i in range(20)]
+    assert _records(json.dumps(records, indent=4)) == records
+
+
+def test_scalars_cut_at_a_chunk_boundary(small_chunks):
+    assert _records("[1234567890123, 12.5e3, true, null, \"abcdefghij\"]") == [
+        1234567890123, 12500.0, True, None, "abcdefghij",
+    ]
+
+
+def test_empty_list(small_chunks):
+    assert _records("  [ ]  ") == []
+
+
+def test_rejects_non_list():
+    with pytest.raises(ValueError):
+        _records('{"id": "P1"}')
+
+
+def test_truncated_list_raises(small_chunks):
+    with pytest.raises(json.JSONDecodeError):
+        _records('[{"id": "P1"}, {"id": "P2"')
+
+
+def test_iter_json_records_reads_jsonl(tmp_path):
+    path = tmp_path / "prompts.jsonl"
+    path.write_text('{"id": "P1"}\n\n{"id": "P2"}\n', encoding="utf-8")
+    assert list(prompt_source.iter_json_records(str(path))) == [{"id": "P1"}, {"id": "P2"}]
+
+
+def test_iter_prompts_skips_malformed_rows(tmp_path):
+    path = tmp_path / "prompts.json"
+    path.write_text(
+        json.dumps([{"id": "P1", "prompt": "a"}, {"id": "P2"}, "junk", {"id": "P3", "prompt": "c"}]),
+        encoding="utf-8",
+    )
+    assert [p["id"] for p in prompt_source.iter_prompts(str(path))] == ["P1", "P3"]
+
+
+def test_take_pulls_batches():
+    iterator = iter(range(5))
+    assert prompt_source.take(iterator, 2) == [0, 1]
+    assert prompt_source.take(iterator, 10) == [2, 3, 4]
+    assert prompt_source.take(iterator, 10) == []
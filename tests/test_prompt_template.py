@@ -0,0 +1,89 @@
+import pytest
+
+from src.prompt_template import PromptTemplate
+
+FIELDS = [
+    "preceding", "target", "following",
+    "preceding_context_", "target_sentence_", "following_context_", "expert_ratings_",
+]
+FORMAT_FIELDS = ["preceding", "target", "following"]
+VALUES = {
+    "preceding": "P", "target": "T", "following": "F",
+    "preceding_context_": "P", "target_sentence_": "T", "following_context_": "F",
+    "expert_ratings_": "[1, 2, 3]",
+}
+
+
+def _template(text):
+    return PromptTemplate(text, FIELDS, FORMAT_FIELDS)
+
+
+def _old_render(text):
+    """The str.format-with-fallback rendering the template engine replaced."""
+    try:
+        return text.format(preceding="P", target="T", following="F")
+    except (KeyError, IndexError, ValueError):
+        return (
+            text.replace("{preceding_context_}", "P")
+            .replace("{target_sentence_}", "T")
+            .replace("{following_context_}", "F")
+            .replace("{expert_ratings_}", "[1, 2, 3]")
+        )
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Before {preceding}, then {target}, after {following}.",
+        "Escaped {{braces}} around {target}",
+        "Padded [{target:>3}] and {target!r}",
+        'JSON {"a": 1} with {target_sentence_} and {expert_ratings_}',
+        '{"a": 1} {target_sentence_} {target}',
+        "Unknown {other} with {preceding_context_}",
+        "{following_context_}{following_context_}",
+        "No placeholders at all",
+    ],
+)
+def test_renders_like_the_old_format_with_fallback(text):
+    assert _template(text).render(VALUES) == _old_render(text)
+
+
+def test_fallback_leaves_format_names_literal():
+    template = _template('{"a": 1} {target_sentence_} {target}')
+    assert not template.format_style
+    assert template.render(VALUES) == '{"a": 1} T {target}'
+    assert template.placeholders == ["target_sentence_"]
+
+
+def test_format_style_when_str_format_accepts_it():
+    template = _template("{target} and {{x}}")
+    assert template.format_style
+    assert template.placeholders == ["target"]
+    assert template.render(VALUES) == "T and {x}"
+
+
+def test_without_format_fields_only_placeholders_are_substituted():
+    template = PromptTemplate("{{a}} {target}", ["target"])
+    assert not template.format_style
+    assert template.render({"target": "T"}) == "{{a}} T"
+
+
+def test_fingerprint_follows_text_and_rendering_semantics():
+    plain = _template("{target} here")
+    assert plain.fingerprint == _template("{target} here").fingerprint
+    assert plain.fingerprint != _template("{target} there").fingerprint
+
+    # Same text rendered by different engines gets a different fingerprint
+    text = "{{x}} {target}"
+    assert _template(text).fingerprint != PromptTemplate(text, ["target"]).fingerprint
+
+    # Placeholder templates that keep a str.format name literal are fingerprinted apart
+    literal = '{"a": 1} {target_sentence_} {target}'
+    assert _template(literal).fingerprint != PromptTemplate(literal, FIELDS).fingerprint
+
+
+def test_from_file(tmp_path):
+    path = tmp_path / "prompt.txt"
+    path.write_text("Rate {target}", encoding="utf-8")
+    template = PromptTemplate.from_file(str(path), FIELDS, FORMAT_FIELDS)
+    assert template.render(VALUES) == "Rate T"
@@ -0,0 +1,57 @@
+from collections import OrderedDict
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from src.config import Config  # noqa: E402
+from src.resource_blocker import ResourceBlocker  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(ResourceBlocker, "_cache", OrderedDict())
+    monkeypatch.setattr(ResourceBlocker, "_cache_bytes", 0)
+    monkeypatch.setattr(Config, "RESOURCE_CACHE_MAX_BYTES", 100)
+
+
+def _entry(size):
+    return 200, {}, b"x" * size
+
+
+def test_store_counts_bytes():
+    ResourceBlocker._store("a", _entry(30))
+    ResourceBlocker._store("b", _entry(20))
+    assert ResourceBlocker._cache_bytes == 50
+
+
+def test_restoring_a_cached_url_counts_it_once():
+    for _ in range(12):
+        ResourceBlocker._store("a", _entry(30))
+
+    assert list(ResourceBlocker._cache) == ["a"]
+    assert ResourceBlocker._cache_bytes == 30
+
+
+def test_restored_url_becomes_most_recent():
+    ResourceBlocker._store("a", _entry(40))
+    ResourceBlocker._store("b", _entry(40))
+    ResourceBlocker._store("a", _entry(40))
+    ResourceBlocker._store("c", _entry(40))
+
+    assert list(ResourceBlocker._cache) == ["a", "c"]
+    assert ResourceBlocker._cache_bytes == 80
+
+
+def test_evicts_least_recent_when_full():
+    for url in ("a", "b", "c"):
+        ResourceBlocker._store(url, _entry(40))
+
+    assert list(ResourceBlocker._cache) == ["b", "c"]
+    assert ResourceBlocker._cache_bytes == 80
+
+
+def test_oversized_entries_are_not_cached():
+    ResourceBlocker._store("big", _entry(101))
+    assert not ResourceBlocker._cache
+    assert ResourceBlocker._cache_bytes == 0
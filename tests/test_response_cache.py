@@ -0,0 +1,85 @@
+import pytest
+
+from src import response_cache
+from src.config import Config
+from src.response_cache import ResponseCache, cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_MAX_MB", 100 / (1024 * 1024))  # 100 bytes
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_MAX_AGE_DAYS", 1)
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    cache.open()
+    yield cache
+    cache.close()
+
+
+def test_key_depends_on_mode_and_exact_text(monkeypatch):
+    monkeypatch.setattr(Config, "TEXT_THINKING_MODE_LABEL", "Thinking")
+    assert cache_key("prompt") == cache_key("prompt", "thinking")
+    assert cache_key("prompt", "Fast") != cache_key("prompt", "Thinking")
+    assert cache_key("prompt") != cache_key("prompt ")
+    assert len(cache_key("prompt")) == 64
+
+
+def test_get_many_returns_only_stored_keys(cache):
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get_many(["a", "missing", "b", "a"]) == {"a": "A", "b": "B"}
+
+
+def test_outputs_persist_across_reopen(tmp_path, cache):
+    cache.put("a", "A")
+    cache.close()
+    reopened = ResponseCache(cache.file_path)
+    reopened.open()
+    assert reopened.get_many(["a"]) == {"a": "A"}
+    reopened.close()
+
+
+def test_lookups_beyond_the_parameter_limit(cache):
+    for i in range(1200):
+        cache.put(str(i), "x")
+    assert len(cache.get_many(str(i) for i in range(1500))) == 1200
+
+
+def test_expired_entries_are_dropped(cache, clock):
+    cache.put("old", "x")
+    clock.now += 2 * 86400
+    cache.put("new", "y")
+    cache.evict()
+    assert cache.get_many(["old", "new"]) == {"new": "y"}
+
+
+def test_least_recently_used_entries_go_first_when_over_size(cache, clock):
+    for key in ("a", "b", "c"):
+        cache.put(key, "x" * 40)
+        clock.now += 1
+    cache.get_many(["a"])  # a is now the most recently used
+    cache.evict()
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+
+
+def test_hit_rate(cache):
+    assert cache.hit_rate == 0.0
+    cache.record_lookup(True)
+    cache.record_lookup(True, source="duplicate")
+    cache.record_lookup(False)
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert cache.hit_rate == pytest.approx(2 / 3)
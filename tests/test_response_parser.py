@@ -0,0 +1,67 @@
+import time
+
+from src.response_parser import find_json, iter_json, parse_response
+
+KEYS = ["principle_id", "is_ableist"]
+
+
+def test_iter_json_finds_values_in_noisy_text():
+    text = 'Model\ncode\nJSON\n{"a": 1} and then [1, 2] content_copy'
+    assert list(iter_json(text)) == [{"a": 1}, [1, 2]]
+
+
+def test_iter_json_ignores_brackets_in_strings_and_prose():
+    text = 'It\'s "quoted" {"text": "a } and ] inside", "n": [1]} done'
+    assert list(iter_json(text)) == [{"text": "a } and ] inside", "n": [1]}]
+
+
+def test_iter_json_handles_escaped_quotes():
+    text = r'{"quote": "she said \"hi\" {", "ok": true}'
+    assert list(iter_json(text)) == [{"quote": 'she said "hi" {', "ok": True}]
+
+
+def test_iter_json_finds_values_nested_in_invalid_spans():
+    text = 'x {"a": 1} [see {"b": 2} and [3]] {"c": [1, 2]}'
+    assert list(iter_json(text)) == [{"a": 1}, {"b": 2}, [3], {"c": [1, 2]}]
+
+
+def test_iter_json_yields_each_value_once():
+    text = '{"a": {"b": 1}} [1, [2]]'
+    assert list(iter_json(text)) == [{"a": {"b": 1}}, [1, [2]]]
+
+
+def test_iter_json_skips_mismatched_brackets():
+    assert list(iter_json('{"a": 1] {"b": 2}')) == [{"b": 2}]
+
+
+def test_iter_json_stays_linear_on_unbalanced_brackets():
+    started = time.perf_counter()
+    assert list(iter_json("{[" * 20000)) == []
+    assert time.perf_counter() - started < 0.5
+
+
+def test_find_json_returns_none_without_json():
+    assert find_json("no payload here") is None
+
+
+def test_parse_response_picks_first_valid_object():
+    text = 'Example: {"foo": 1}\nAnswer: {"principle_id": "P3", "is_ableist": false}'
+    parsed = parse_response(text, KEYS)
+    assert parsed.ok
+    assert parsed.value == {"principle_id": "P3", "is_ableist": False}
+
+
+def test_parse_response_unwraps_single_item_array():
+    parsed = parse_response('[{"principle_id": "P1", "is_ableist": true}]', KEYS)
+    assert parsed.ok and parsed.value["principle_id"] == "P1"
+
+
+def test_parse_response_reports_missing_keys():
+    parsed = parse_response('{"principle_id": "P1"}', KEYS)
+    assert not parsed.ok
+    assert "is_ableist" in parsed.error
+
+
+def test_parse_response_rejects_empty_and_jsonless_text():
+    assert parse_response("", KEYS).error == "empty output"
+    assert not parse_response("nothing to see", KEYS).ok
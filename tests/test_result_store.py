@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+import pytest
+
+from src.result_store import ResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(
+        log_file=str(tmp_path / "results.jsonl"),
+        index_file=str(tmp_path / "results.idx"),
+        export_file=str(tmp_path / "results.json"),
+    )
+
+
+def _append(store, entries):
+    async def run():
+        await store.open()
+        added = [await store.append(entry) for entry in entries]
+        await store.close()
+        return added
+
+    return asyncio.run(run())
+
+
+def _read_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f]
+
+
+def test_append_writes_log_and_index(store):
+    added = _append(store, [{"key": "P1", "value": "a"}, {"key": "P2", "value": "b"}])
+
+    assert added == [True, True]
+    assert [json.loads(line) for line in _read_lines(store.log_file)] == [
+        {"key": "P1", "value": "a"},
+        {"key": "P2", "value": "b"},
+    ]
+    assert _read_lines(store.index_file) == ["P1", "P2"]
+
+
+def test_append_skips_recorded_keys(store):
+    _append(store, [{"key": "P1", "value": "a"}])
+
+    reopened = ResultStore(store.log_file, store.index_file, store.export_file)
+    added = _append(reopened, [{"key": "P1", "value": "again"}, {"key": "P2", "value": "b"}])
+
+    assert added == [False, True]
+    assert [e["key"] for e in reopened.iter_entries()] == ["P1", "P2"]
+
+
+def test_open_returns_completed_keys(store):
+    _append(store, [{"key": "P1", "value": "a"}])
+
+    async def reopen():
+        reopened = ResultStore(store.log_file, store.index_file, store.export_file)
+        completed = await reopened.open()
+        await reopened.close()
+        return completed
+
+    assert asyncio.run(reopen()) == {"P1"}
+
+
+def test_missing_index_is_rebuilt_from_log(store, tmp_path):
+    (tmp_path / "results.jsonl").write_text(
+        '{"key": "P1", "value": "a"}\n{"key": "P2", "value": "b"}\n', encoding="utf-8"
+    )
+
+    store._load_index()
+
+    assert store.is_completed("P1") and store.is_completed("P2")
+    assert sorted(_read_lines(store.index_file)) == ["P1", "P2"]
+
+
+def test_torn_trailing_line_is_skipped(store, tmp_path):
+    (tmp_path / "results.jsonl").write_text(
+        '{"key": "P1", "value": "a"}\n{"key": "P2", "val', encoding="utf-8"
+    )
+
+    assert [e["key"] for e in store.iter_entries()] == ["P1"]
+    assert store.export() == 1
+
+
+def test_export_keeps_first_result_per_key(store, tmp_path):
+    (tmp_path / "results.jsonl").write_text(
+        '{"key": "P1", "value": "first"}\n'
+        '{"key": "P2", "value": "b"}\n'
+        '{"key": "P1", "value": "second"}\n',
+        encoding="utf-8",
+    )
+
+    assert store.export() == 2
+    with open(store.export_file, "r", encoding="utf-8") as f:
+        assert json.load(f) == [{"key": "P1", "value": "first"}, {"key": "P2", "value": "b"}]
+
+
+def test_export_of_empty_log(store):
+    assert store.export() == 0
+    with open(store.export_file, "r", encoding="utf-8") as f:
+        assert json.load(f) == []
+
+
+def test_invalidate_drops_results_and_index_entries(store):
+    _append(store, [{"key": k, "value": k.lower()} for k in ("P1", "P2", "P3")])
+
+    assert store.invalidate(["P2", "P9"]) == 1
+
+    assert [e["key"] for e in store.iter_entries()] == ["P1", "P3"]
+    assert sorted(_read_lines(store.index_file)) == ["P1", "P3"]
+    assert not store.is_completed("P2")
+    with open(store.export_file, "r", encoding="utf-8") as f:
+        assert [e["key"] for e in json.load(f)] == ["P1", "P3"]
+
+
+def test_invalidate_without_log(store):
+    assert store.invalidate(["P1"]) == 0
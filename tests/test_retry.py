@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import pytest
+
+from src.config import Config
+from src.domain import PromptTask, ScrapeResult
+from src.retry import FailureKind, RetryScheduler, classify_error, classify_result
+
+
+@pytest.fixture(autouse=True)
+def no_delays(monkeypatch):
+    monkeypatch.setattr(Config, "RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(Config, "RETRY_RATE_LIMIT_DELAY", 0)
+    monkeypatch.setattr(Config, "RETRY_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(Config, "RETRY_MAX_TAB_LOSSES", 2)
+
+
+def _error(task, output, kind=None):
+    return ScrapeResult(task.unique_id, task.text, output, status="error", error_kind=kind)
+
+
+def _fail(tmp_path, task, results):
+    """Feeds the failures to one scheduler in turn; returns (kinds, requeued tasks, dead letters)."""
+    dead_letter_file = tmp_path / "dead.jsonl"
+
+    async def run():
+        queue = asyncio.Queue()
+        retry = RetryScheduler(queue, str(dead_letter_file))
+        kinds = []
+        for result in results:
+            kinds.append(retry.handle_failure(task, result, worker_id=1))
+            await retry.wait_pending()
+        requeued = [queue.get_nowait() for _ in range(queue.qsize())]
+        return kinds, requeued
+
+    kinds, requeued = asyncio.run(run())
+    letters = []
+    if dead_letter_file.exists():
+        letters = [json.loads(line) for line in dead_letter_file.read_text(encoding="utf-8").splitlines()]
+    return kinds, requeued, letters
+
+
+@pytest.mark.parametrize(
+    "message, kind",
+    [
+        ("Generation still running after 120000ms", FailureKind.TIMEOUT),
+        ("You've reached your limit, try again later", FailureKind.RATE_LIMIT),
+        ("Timeout 5000ms exceeded waiting for locator('rich-textarea')", FailureKind.UI_DRIFT),
+        ("Step 'send' not ready after 5000ms", FailureKind.UI_DRIFT),
+        ("Navigation timed out", FailureKind.TIMEOUT),
+        ("Target closed", FailureKind.UNKNOWN),
+    ],
+)
+def test_classify_error(message, kind):
+    assert classify_error(Exception(message)) == kind
+
+
+def test_classify_result_prefers_the_reported_kind():
+    task = PromptTask("P1", "prompt")
+    assert classify_result(_error(task, "timed out", "malformed_output")) == FailureKind.MALFORMED_OUTPUT
+    assert classify_result(_error(task, "timed out")) == FailureKind.TIMEOUT
+
+
+def test_retries_until_the_attempt_budget_then_dead_letters(tmp_path):
+    task = PromptTask("P1", "prompt", duplicates=["P1-copy"])
+    results = [_error(task, "bad json", "malformed_output")] * 3
+
+    kinds, requeued, letters = _fail(tmp_path, task, results)
+
+    assert kinds == [FailureKind.MALFORMED_OUTPUT] * 3
+    assert requeued == [task, task]
+    assert task.attempts == 3
+    assert task.dead_lettered
+    assert [(entry["key"], entry["failure"], entry["attempts"]) for entry in letters] == [
+        ("P1", "malformed_output", 3),
+        ("P1-copy", "malformed_output", 3),
+    ]
+    assert letters[0]["workers"] == [1]
+
+
+def test_non_retryable_failure_is_dead_lettered_at_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "RETRYABLE_FAILURES", ["timeout"])
+    task = PromptTask("P1", "prompt")
+
+    _, requeued, letters = _fail(tmp_path, task, [_error(task, "nothing", "empty_extraction")])
+
+    assert requeued == []
+    assert [entry["key"] for entry in letters] == ["P1"]
+
+
+def test_rate_limits_never_use_attempts(tmp_path):
+    task = PromptTask("P1", "prompt")
+    results = [_error(task, "rate limited", "rate_limit")] * 5
+
+    _, requeued, letters = _fail(tmp_path, task, results)
+
+    assert len(requeued) == 5
+    assert (task.attempts, task.throttles) == (0, 5)
+    assert not task.dead_lettered
+    assert letters == []
+
+
+def test_requeued_task_is_no_longer_deferred(tmp_path):
+    task = PromptTask("P1", "prompt", deferred=True)
+    _, requeued, _ = _fail(tmp_path, task, [_error(task, "timed out")])
+    assert requeued == [task]
+    assert not task.deferred
+
+
+def test_tab_losses_requeue_without_attempts_until_their_own_limit(tmp_path):
+    dead_letter_file = tmp_path / "dead.jsonl"
+    task = PromptTask("P1", "prompt")
+
+    async def run():
+        queue = asyncio.Queue()
+        retry = RetryScheduler(queue, str(dead_letter_file))
+        retry.handle_loss(task, 1, Exception("Target crashed"))
+        await retry.wait_pending()
+        first = queue.qsize()
+        retry.handle_loss(task, 2, Exception("Target crashed"))
+        await retry.wait_pending()
+        return first, queue.qsize() - first
+
+    assert asyncio.run(run()) == (1, 0)
+    assert (task.attempts, task.losses) == (0, 2)
+    assert task.failed_workers == {1, 2}
+    letter = json.loads(dead_letter_file.read_text(encoding="utf-8"))
+    assert letter["error"] == "Worker crashed: Target crashed"
+
+
+def test_backoff_is_capped_and_jittered(monkeypatch):
+    monkeypatch.setattr(Config, "RETRY_BASE_DELAY", 5)
+    monkeypatch.setattr(Config, "RETRY_MAX_DELAY", 30)
+    for attempt, full in ((1, 5), (2, 10), (3, 20), (6, 30)):
+        delay = RetryScheduler.backoff(attempt, FailureKind.TIMEOUT)
+        assert full * 0.5 <= delay <= full
@@ -0,0 +1,86 @@
+import pytest
+
+from src.config import Config
+from src.domain import HedgeRace, PromptTask
+from src.scheduler import CostModel, CostQueue
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    monkeypatch.setattr(Config, "SCHEDULER_COST_ORDER", True)
+    monkeypatch.setattr(Config, "COST_MODEL_PRIOR_BASE", 10.0)
+    monkeypatch.setattr(Config, "COST_MODEL_PRIOR_PER_KCHAR", 1.0)
+    return CostQueue(CostModel())
+
+
+def _task(unique_id, length, **kwargs):
+    return PromptTask(unique_id=unique_id, text="x" * length, **kwargs)
+
+
+def _drain(queue):
+    return [queue.get_nowait().unique_id for _ in range(queue.qsize())]
+
+
+def test_longest_predicted_first(queue):
+    for unique_id, length in [("short", 100), ("long", 5000), ("medium", 1000)]:
+        queue.put_nowait(_task(unique_id, length))
+
+    assert _drain(queue) == ["long", "medium", "short"]
+
+
+def test_equal_costs_keep_fifo_order(queue):
+    for unique_id in ("a", "b", "c"):
+        queue.put_nowait(_task(unique_id, 100))
+
+    assert _drain(queue) == ["a", "b", "c"]
+
+
+def test_deferred_tasks_go_last(queue):
+    queue.put_nowait(_task("deferred", 9000, deferred=True))
+    queue.put_nowait(_task("long", 5000))
+    queue.put_nowait(_task("short", 10))
+
+    assert _drain(queue) == ["long", "short", "deferred"]
+
+
+def test_hedge_twins_go_first_and_deferred_tasks_last(queue):
+    primary = _task("straggler", 10)
+    queue.put_nowait(_task("deferred", 9000, deferred=True))
+    queue.put_nowait(_task("long", 5000))
+    queue.put_nowait(_task("twin", 10, race=HedgeRace(primary=primary)))
+
+    assert _drain(queue) == ["twin", "long", "deferred"]
+
+
+def test_fifo_when_cost_order_is_off(queue, monkeypatch):
+    monkeypatch.setattr(Config, "SCHEDULER_COST_ORDER", False)
+    for unique_id, length in [("short", 100), ("long", 5000)]:
+        queue.put_nowait(_task(unique_id, length))
+
+    assert _drain(queue) == ["short", "long"]
+
+
+def test_queued_cost_tracks_contents(queue):
+    queue.put_nowait(_task("a", 1000))  # 10s + 1s
+    queue.put_nowait(_task("b", 2000))  # 10s + 2s
+
+    assert queue.queued_cost == pytest.approx(23.0)
+    queue.get_nowait()
+    assert queue.queued_cost == pytest.approx(11.0)
+    queue.get_nowait()
+    assert queue.queued_cost == 0.0
+
+
+def test_cost_model_fits_observations(monkeypatch):
+    monkeypatch.setattr(Config, "COST_MODEL_MIN_SAMPLES", 3)
+    monkeypatch.setattr(Config, "COST_MODEL_DECAY", 1.0)
+    model = CostModel()
+    # 5s + 4s per 1000 chars
+    for length in (500, 1000, 2000, 4000):
+        task = _task("t", length)
+        task.predicted_cost = model.predict(task)
+        model.observe(task, 5 + 0.004 * length)
+
+    assert model.base == pytest.approx(5.0)
+    assert model.per_char * 1000 == pytest.approx(4.0)
+    assert model.predict(_task("t", 3000)) == pytest.approx(17.0)
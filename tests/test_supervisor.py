@@ -0,0 +1,178 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from src.config import Config  # noqa: E402
+from src.domain import PromptTask  # noqa: E402
+from src.metrics import TaskTrace  # noqa: E402
+from src.retry import RetryScheduler  # noqa: E402
+from src.supervisor import WorkerSupervisor  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fast_respawn(monkeypatch):
+    monkeypatch.setattr(Config, "WORKER_RESPAWN_DELAY", 0.01)
+    monkeypatch.setattr(Config, "WORKER_MAX_RESPAWN_DELAY", 0.04)
+    monkeypatch.setattr(Config, "RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(Config, "RETRY_MAX_TAB_LOSSES", 10)
+
+
+class FakePage:
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def emit(self, event):
+        self.handlers[event](self)
+
+
+class Harness:
+    """
+    A supervisor whose workers take tasks from the queue, die on the first try of
+    a task in crash_ids and block forever on the first try of one in hang_ids.
+    """
+
+    def __init__(self, tmp_path, crash_ids=(), hang_ids=()):
+        self.queue = asyncio.Queue()
+        self.retry = RetryScheduler(self.queue, str(tmp_path / "dead.jsonl"))
+        self.supervisor = WorkerSupervisor(self.queue, self.retry, self.run_worker)
+        self.crash_ids = set(crash_ids)
+        self.hang_ids = set(hang_ids)
+        self.done = []
+        self.started = []
+        self.pages = {}
+
+    async def run_worker(self, worker_id):
+        self.started.append(worker_id)
+        page = self.pages[worker_id] = FakePage()
+        self.supervisor.watch_page(worker_id, page)
+        while self.supervisor.should_run(worker_id):
+            self.supervisor.idle.add(worker_id)
+            task = await self.queue.get()
+            self.supervisor.idle.discard(worker_id)
+            self.supervisor.begin(worker_id, task, TaskTrace(task.unique_id, worker_id))
+            if task.unique_id in self.crash_ids:
+                self.crash_ids.discard(task.unique_id)
+                raise RuntimeError("tab went away")
+            if task.unique_id in self.hang_ids:
+                self.hang_ids.discard(task.unique_id)
+                await asyncio.Event().wait()
+            self.done.append((worker_id, task.unique_id))
+            self.supervisor.finish(worker_id)
+            self.queue.task_done()
+
+    async def drain(self):
+        while True:
+            await asyncio.wait_for(self.queue.join(), 1)
+            if not self.retry.pending:
+                return
+            await self.retry.wait_pending()
+
+
+def test_crashed_worker_requeues_its_prompt_and_is_replaced(tmp_path):
+    async def run():
+        harness = Harness(tmp_path, crash_ids={"P1"})
+        harness.supervisor.scale(1)
+        task = PromptTask("P1", "prompt")
+        await harness.queue.put(task)
+        await harness.drain()
+        alive = harness.supervisor.alive()
+        await harness.supervisor.stop()
+        return harness, task, alive
+
+    harness, task, alive = asyncio.run(run())
+    assert harness.started == [1, 2]
+    assert harness.done == [(2, "P1")]
+    assert (task.attempts, task.losses) == (0, 1)
+    assert harness.supervisor.crashes == 1
+    assert alive == [2]
+
+
+def test_closed_tab_stops_its_worker_and_requeues_the_prompt(tmp_path):
+    async def run():
+        harness = Harness(tmp_path, hang_ids={"P1"})
+        harness.supervisor.scale(1)
+        task = PromptTask("P1", "prompt")
+        await harness.queue.put(task)
+        while not harness.supervisor._in_flight:
+            await asyncio.sleep(0)
+        harness.pages[1].emit("close")
+        await harness.drain()
+        await harness.supervisor.stop()
+        return harness, task
+
+    harness, task = asyncio.run(run())
+    assert harness.done == [(2, "P1")]
+    assert task.losses == 1
+    assert task.failed_workers == {1}
+
+
+def test_released_page_is_not_reported_as_lost(tmp_path):
+    async def run():
+        harness = Harness(tmp_path)
+        harness.supervisor.scale(1)
+        await asyncio.sleep(0)
+        harness.supervisor.release_page(1)
+        harness.pages[1].emit("close")
+        await asyncio.sleep(0.05)
+        alive = harness.supervisor.alive()
+        await harness.supervisor.stop()
+        return harness, alive
+
+    harness, alive = asyncio.run(run())
+    assert alive == [1]
+    assert harness.supervisor.crashes == 0
+
+
+def test_respawn_delay_doubles_with_consecutive_crashes_up_to_the_cap():
+    async def run():
+        supervisor = WorkerSupervisor(asyncio.Queue(), None, None)
+        loop = asyncio.get_running_loop()
+        delays = []
+        for crashes in (1, 2, 3, 4):
+            supervisor._consecutive_crashes = crashes
+            supervisor._schedule_respawn()
+            delays.append(round(supervisor._respawn_handle.when() - loop.time(), 2))
+            supervisor._respawn_handle.cancel()
+            supervisor._respawn_handle = None
+        return delays
+
+    assert asyncio.run(run()) == [0.01, 0.02, 0.04, 0.04]
+
+
+def test_scaling_down_retires_idle_workers_without_respawning(tmp_path):
+    async def run():
+        harness = Harness(tmp_path)
+        harness.supervisor.scale(3)
+        await asyncio.sleep(0)
+        harness.supervisor.scale(1)
+        await asyncio.sleep(0.05)
+        alive = harness.supervisor.alive()
+        await harness.supervisor.stop()
+        return harness, alive
+
+    harness, alive = asyncio.run(run())
+    assert alive == [1]
+    assert harness.started == [1, 2, 3]
+    assert harness.supervisor.crashes == 0
+
+
+def test_nothing_is_respawned_after_stop(tmp_path):
+    async def run():
+        harness = Harness(tmp_path, crash_ids={"P1"})
+        harness.supervisor.scale(1)
+        await harness.queue.put(PromptTask("P1", "prompt"))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        await harness.supervisor.stop()
+        await asyncio.sleep(0.05)
+        return harness
+
+    harness = asyncio.run(run())
+    assert harness.supervisor.crashes == 1
+    assert harness.started == [1]
+    assert harness.supervisor.workers == {}
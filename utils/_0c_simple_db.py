@@ -1,67 +1,139 @@
-import pandas as pd
-import json
-import numpy as np
+"""
+Dataset preparation: AUTALIC.csv -> filtered dataset for prompt creation.
 
-# 1. Read the dataset
-df = pd.read_csv('utils/AUTALIC.csv')
+The CSV is read in chunks and every step (filtering empty targets, NaN
+normalisation, ID assignment) is a column-wise operation, so memory stays
+bounded by the chunk size. Output is streamed as JSONL (one sample per line,
+what the later stages read) or as Parquet with a fixed schema (needs pyarrow).
 
-# 2. Filter out rows where 'target' is empty
-# This removes NaN values AND empty strings
+    python -m utils._0c_simple_db
+    python -m utils._0c_simple_db --output _0initial_filtered_dataset.parquet
+"""
 
-results = []
-counter = 0
+import argparse
+import re
+import time
+from typing import Dict, Iterator, Optional
 
+import numpy as np
 import pandas as pd
-from typing import Any
-
-def _replace_in_struct(x: Any) -> Any:
-    if isinstance(x, dict):
-        return {k: _replace_in_struct(v) if isinstance(v, (dict, list, tuple)) else ('' if pd.isna(v) else v)
-                for k, v in x.items()}
-
-    if isinstance(x, list):
-        return [_replace_in_struct(v) if isinstance(v, (dict, list, tuple)) else ('' if pd.isna(v) else v)
-                for v in x]
-    if isinstance(x, tuple):
-        return tuple(_replace_in_struct(v) if isinstance(v, (dict, list, tuple)) else ('' if pd.isna(v) else v)
-                     for v in x)
-    return '' if pd.isna(x) else x
-
-def replace_nans_with_empty(p: Any) -> Any:
-    if isinstance(p, pd.DataFrame):
-        return p.fillna('')
-
-    if isinstance(p, pd.Series):
-        if p.apply(lambda x: isinstance(x, (dict, list, tuple))).all():
-            return p.apply(lambda x: _replace_in_struct(x) if pd.notna(x) else '')
-        else:
-            return p.fillna('')
-
-    if isinstance(p, list):
-        return [_replace_in_struct(x) for x in p]
-
-    return '' if pd.isna(p) else p
-
-
-df_clean = df[df['target'].notna() & (df['target'] != "")]
-df_clean = replace_nans_with_empty(df_clean)
-
-selected_rows = df_clean.to_dict(orient='records')
-
-for i in selected_rows:
-    i
-    results.append({
-        "id": f"P{counter}",
-        **i,
-        "principle_id":"",
-        "llm_justification":"",
-        "llm_evidence_quote":"",
-        "expert_opinion":"",
-    })
-    counter+=1
-
-# 5. Save to JSON
-with open('_0initial_filtered_dataset.json', 'w') as f:
-    json.dump(results, f, indent=4)
-
-print("Processing complete. Rows with empty targets were excluded.")
+
+INPUT_FILE = "utils/AUTALIC.csv"
+OUTPUT_FILE = "_0initial_filtered_dataset.jsonl"
+CHUNK_SIZE = 100_000
+
+# Filled in later by the LLM/experts; every row starts with them empty
+ANNOTATION_COLUMNS = ["principle_id", "llm_justification", "llm_evidence_quote", "expert_opinion"]
+# Annotator scores (A1_Score, A2_Score, ...), rendered into the prompts
+SCORE_COLUMN = re.compile(r"^A\d+_Score$")
+
+
+def score_dtypes(input_file: str, chunk_size: int = CHUNK_SIZE) -> Dict[str, str]:
+    """
+    Pins the annotator score columns to the type a whole-file read would infer.
+    pandas infers each chunk's types on its own, so a column with blanks only in
+    later rows would render as 1 in one chunk and 1.0 in another; the prompts
+    must not depend on the chunk size. Reads only those columns.
+    """
+    columns = [c for c in pd.read_csv(input_file, nrows=0).columns if SCORE_COLUMN.match(c)]
+    if not columns:
+        return {}
+    has_blanks = dict.fromkeys(columns, False)
+    numeric = dict.fromkeys(columns, True)
+    for chunk in pd.read_csv(input_file, usecols=columns, chunksize=chunk_size):
+        for column in columns:
+            has_blanks[column] = has_blanks[column] or bool(chunk[column].isna().any())
+            numeric[column] = numeric[column] and pd.api.types.is_numeric_dtype(chunk[column])
+    # A whole-file read turns a numeric column with any blank into floats
+    return {c: "float64" for c in columns if has_blanks[c] and numeric[c]}
+
+
+def prepare_chunks(input_file: str, chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Yields cleaned chunks with rows whose 'target' is empty removed and IDs P0, P1, ... assigned."""
+    next_id = 0
+    dtype = score_dtypes(input_file, chunk_size)
+    for chunk in pd.read_csv(input_file, chunksize=chunk_size, dtype=dtype):
+        # Removes NaN values AND empty strings
+        chunk = chunk[chunk["target"].notna() & (chunk["target"] != "")].copy()
+        if chunk.empty:
+            continue
+
+        numbers = pd.Series(np.arange(next_id, next_id + len(chunk)), index=chunk.index)
+        ids = "P" + numbers.astype(str)
+        next_id += len(chunk)
+        chunk.insert(0, "id", ids)
+        for column in ANNOTATION_COLUMNS:
+            chunk[column] = ""
+        yield chunk
+
+
+def _jsonl_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    # Same values as before: any missing cell becomes ""
+    return chunk.astype(object).where(chunk.notna(), "")
+
+
+def _parquet_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    # Stable column types across chunks: numbers as float64 (nulls kept), everything else text
+    numeric = chunk.select_dtypes("number").columns
+    other = chunk.columns.difference(numeric)
+    chunk = chunk.copy()
+    chunk[numeric] = chunk[numeric].astype("float64")
+    chunk[other] = chunk[other].fillna("").astype(str)
+    return chunk
+
+
+def write_jsonl(chunks: Iterator[pd.DataFrame], output_file: str) -> int:
+    rows = 0
+    with open(output_file, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            text = _jsonl_chunk(chunk).to_json(orient="records", lines=True, force_ascii=False)
+            # Older pandas versions don't end the last line
+            f.write(text if text.endswith("\n") else text + "\n")
+            rows += len(chunk)
+    return rows
+
+
+def write_parquet(chunks: Iterator[pd.DataFrame], output_file: str) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+
+    rows = 0
+    writer: Optional[pq.ParquetWriter] = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(_parquet_chunk(chunk), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_file, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--output", default=OUTPUT_FILE, help="*.jsonl or *.parquet")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    chunks = prepare_chunks(args.input, args.chunk_size)
+    if args.output.endswith(".parquet"):
+        rows = write_parquet(chunks, args.output)
+    else:
+        rows = write_jsonl(chunks, args.output)
+
+    print(
+        f"Processing complete. {rows} rows written to {args.output} in "
+        f"{time.perf_counter() - started:.1f}s. Rows with empty targets were excluded."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,271 @@
+"""
+Prompt creation: filtered dataset + prompt template -> _1prompts.jsonl.
+
+The template is parsed once (src.prompt_template) and every sample is rendered
+in a single pass, across a process pool for large datasets, and streamed to
+the output. A manifest stores a hash of (template, sample fields) per ID with
+the row's byte offset and a hash of the line, so on a re-run only rows whose
+template or data changed are re-rendered; the others are copied from the
+previous output, unless their bytes there no longer match. Results
+already scraped for changed rows are dropped from the result log so the
+scraper redoes exactly those.
+
+    python -m utils._1create_prompts [--workers 8] [--full]
+"""
+
+import argparse
+import hashlib
 import json
-from typing import List, Dict, Any
-
-# result list required by your spec
-prompts: List[Dict[str, Any]] = []
-
-# read initial prompt (plain text)
-with open('_0initial_prompt_type_2.txt', 'r', encoding='utf-8') as f:
-    initial_prompt: str = f.read()
-
-# load the complex json and flatten its list values into filtered_samples
-with open('_0initial_filtered_dataset.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
-
-filtered_samples = data
-# if isinstance(data, dict):
-#     for v in data.values():
-#         if isinstance(v, list):
-#             filtered_samples.extend(v)
-#         else:
-#             # if some value is a single sample (not list), handle gracefully
-#             filtered_samples.append(v)
-# else:
-#     raise ValueError("initial_filtered_dataset.json must contain a top-level dictionary")
-
-# create prompts for each sample
-for sample in filtered_samples:
-    # ensure sample is a dict
-    if not isinstance(sample, dict):
-        continue
-
-    sample_id = sample.get('id')
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from src.prompt_source import iter_json_records
+from src.prompt_template import PromptTemplate
+from src.result_store import ResultStore
+
+TEMPLATE_FILE = '_0initial_prompt_type_2.txt'
+# Written by utils/_0c_simple_db.py (JSONL); a JSON list works too
+DATASET_FILE = '_0initial_filtered_dataset.jsonl'
+OUTPUT_FILE = '_1prompts.jsonl'
+MANIFEST_FILE = '_1prompts.manifest.jsonl'
+BATCH_SIZE = 1000
+
+# Both placeholder styles found in our templates
+PLACEHOLDERS = [
+    'preceding', 'target', 'following',
+    'preceding_context_', 'target_sentence_', 'following_context_', 'expert_ratings_',
+]
+# Templates that str.format accepts with these are rendered with its semantics ({{ -> {)
+FORMAT_PLACEHOLDERS = ['preceding', 'target', 'following']
+
+# id -> (hash, offset, length, line hash) of its line in the previous output
+Manifest = Dict[str, Tuple[str, int, int, Optional[str]]]
+
+
+def sample_values(sample: Dict[str, Any]) -> Dict[str, str]:
     preceding = sample.get('preceding', '') or ''
     target = sample.get('target', '') or ''
     following = sample.get('following', '') or ''
-    A1_Score = sample.get('A1_Score')
-    A2_Score = sample.get('A2_Score')
-    A3_Score = sample.get('A3_Score')
-    A_scores = f"[{A1_Score}, {A2_Score}, {A3_Score}]"
+    A_scores = f"[{sample.get('A1_Score')}, {sample.get('A2_Score')}, {sample.get('A3_Score')}]"
+    return {
+        'preceding': preceding,
+        'target': target,
+        'following': following,
+        'preceding_context_': preceding,
+        'target_sentence_': target,
+        'following_context_': following,
+        'expert_ratings_': A_scores,
+    }
 
-    # Try using str.format first (works if initial_prompt uses {preceding}, {target}, {following})
-    try:
-        prompt_text = initial_prompt.format(
-            preceding=preceding,
-            target=target,
-            following=following
-        )
-    except Exception:
-        # fallback to safe manual replacement if formatting fails (e.g., braces or other placeholders exist)
-        prompt_text = (initial_prompt
-                       .replace('{preceding_context_}', preceding)
-                       .replace('{target_sentence_}', target)
-                       .replace('{following_context_}', following)
-                       .replace('{expert_ratings_}', A_scores)
-                       )
 
+def row_hash(template: PromptTemplate, values: Dict[str, str]) -> str:
+    digest = hashlib.sha256(template.fingerprint.encode('utf-8'))
+    digest.update(json.dumps(values, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def render_line(template: PromptTemplate, sample_id: Any, values: Dict[str, str]) -> bytes:
     entry = {
         'id': sample_id,
-        'prompt': prompt_text
+        'prompt': template.render(values),
+        # raw fields, used when the scraper packs several samples into one prompt (Config.PACK_PROMPTS)
+        'sample': {
+            'preceding_context': values['preceding'],
+            'target_sentence': values['target'],
+            'following_context': values['following'],
+            'expert_ratings': values['expert_ratings_'],
+        },
+    }
+    return (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+# --- Process pool ---
+
+_worker_template: Optional[PromptTemplate] = None
+
+
+def _init_worker(template_text: str):
+    global _worker_template
+    _worker_template = PromptTemplate(template_text, PLACEHOLDERS, FORMAT_PLACEHOLDERS)
+
+
+def _render_batch(rows: List[Tuple[Any, Dict[str, str]]]) -> List[bytes]:
+    return [render_line(_worker_template, sample_id, values) for sample_id, values in rows]
+
+
+# --- Incremental generation ---
+
+def load_manifest(path: str) -> Manifest:
+    manifest: Manifest = {}
+    if not os.path.exists(path):
+        return manifest
+    for row in iter_json_records(path):
+        manifest[row['id']] = (row['hash'], row['offset'], row['length'], row.get('line_hash'))
+    return manifest
+
+
+def line_hash(line: bytes) -> str:
+    return hashlib.sha256(line).hexdigest()[:16]
+
+
+def iter_batches(samples: Iterator[Any], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for sample in samples:
+        # ensure sample is a dict
+        if not isinstance(sample, dict):
+            continue
+        batch.append(sample)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate(
+    template: PromptTemplate,
+    dataset_file: str,
+    output_file: str,
+    manifest_file: str,
+    workers: int,
+    full: bool = False,
+) -> Dict[str, Any]:
+    # The old manifest is still read with --full, to know which prompts changed
+    old_manifest = load_manifest(manifest_file) if os.path.exists(output_file) else {}
+    old_output = open(output_file, 'rb') if old_manifest and not full else None
+    stats = {
+        'samples': 0, 'rendered': 0, 'reused': 0, 'repaired': 0, 'changed_ids': [], 'example': None,
     }
-    prompts.append(entry)
-
-# Optional: write resulting prompts to a JSON file for inspection (comment out if you don't want this)
-with open('_1prompts.json', 'w', encoding='utf-8') as out_f:
-    json.dump(prompts, out_f, ensure_ascii=False, indent=2)
-
-# summary output
-print(f"Loaded initial_prompt (length={len(initial_prompt)}).")
-print(f"Found {len(filtered_samples)} filtered samples -> created {len(prompts)} prompts.")
-if prompts:
-    print("Example (first 1):")
-    print(json.dumps(prompts[0], ensure_ascii=False, indent=2))
+
+    tmp_output, tmp_manifest = output_file + '.tmp', manifest_file + '.tmp'
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(template.text,))
+
+    try:
+        with open(tmp_output, 'wb') as out, open(tmp_manifest, 'w', encoding='utf-8') as manifest:
+            # Bounded window of batches in flight; output order is preserved
+            in_flight: Deque[Tuple[List[Tuple[Any, str, Dict[str, str], Optional[Tuple]]], Any]] = deque()
+
+            def flush_one():
+                plan, rendered = in_flight.popleft()
+                if isinstance(rendered, Future):
+                    rendered = rendered.result()
+                rendered = iter(rendered)
+                for sample_id, digest, values, old in plan:
+                    if old is None:
+                        line = next(rendered)
+                        stats['rendered'] += 1
+                    else:
+                        old_output.seek(old[1])
+                        line = old_output.read(old[2])
+                        if line_hash(line) == old[3]:
+                            stats['reused'] += 1
+                        else:
+                            # The old output was edited or truncated since the manifest
+                            # was written (or the manifest predates line hashes)
+                            line = render_line(template, sample_id, values)
+                            stats['repaired'] += 1
+                    if stats['example'] is None:
+                        stats['example'] = line
+                    offset = out.tell()
+                    out.write(line)
+                    manifest.write(json.dumps(
+                        {
+                            'id': sample_id, 'hash': digest, 'offset': offset,
+                            'length': len(line), 'line_hash': line_hash(line),
+                        },
+                        ensure_ascii=False,
+                    ) + '\n')
+
+            for batch in iter_batches(iter_json_records(dataset_file), BATCH_SIZE):
+                plan, to_render = [], []
+                for sample in batch:
+                    stats['samples'] += 1
+                    sample_id = sample.get('id')
+                    values = sample_values(sample)
+                    digest = row_hash(template, values)
+                    old = old_manifest.get(sample_id)
+                    if old is not None and old[0] == digest and old_output is not None:
+                        plan.append((sample_id, digest, values, old))
+                        continue
+                    if old is not None and old[0] != digest:
+                        stats['changed_ids'].append(sample_id)
+                    plan.append((sample_id, digest, values, None))
+                    to_render.append((sample_id, values))
+
+                if pool is not None and to_render:
+                    rendered = pool.submit(_render_batch, to_render)
+                else:
+                    rendered = [render_line(template, sid, values) for sid, values in to_render]
+                in_flight.append((plan, rendered))
+                if len(in_flight) > 2 * max(1, workers):
+                    flush_one()
+
+            while in_flight:
+                flush_one()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if old_output is not None:
+            old_output.close()
+
+    os.replace(tmp_output, output_file)
+    os.replace(tmp_manifest, manifest_file)
+    return stats
+
+
+def create_prompts(
+    template_file: str = TEMPLATE_FILE,
+    dataset_file: str = DATASET_FILE,
+    output_file: str = OUTPUT_FILE,
+    manifest_file: str = MANIFEST_FILE,
+    workers: int = os.cpu_count() or 1,
+    full: bool = False,
+    keep_results: bool = False,
+) -> Tuple[PromptTemplate, Dict[str, Any]]:
+    # read initial prompt (plain text), parsed once
+    template = PromptTemplate.from_file(template_file, PLACEHOLDERS, FORMAT_PLACEHOLDERS)
+    stats = generate(template, dataset_file, output_file, manifest_file, workers, full)
+    if stats['changed_ids'] and not keep_results:
+        ResultStore().invalidate(stats['changed_ids'])
+    return template, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--template', default=TEMPLATE_FILE)
+    parser.add_argument('--dataset', default=DATASET_FILE)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--manifest', default=MANIFEST_FILE)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--full', action='store_true', help='re-render every row')
+    parser.add_argument(
+        '--keep-results', action='store_true',
+        help="don't drop scraped results of rows whose prompt changed",
+    )
+    args = parser.parse_args()
+
+    template, stats = create_prompts(
+        args.template, args.dataset, args.output, args.manifest,
+        args.workers, args.full, args.keep_results,
+    )
+    changed = stats['changed_ids']
+
+    # summary output
+    print(f"Loaded initial_prompt (length={len(template.text)}, "
+          f"placeholders={sorted(set(template.placeholders))}).")
+    print(f"Found {stats['samples']} filtered samples -> {stats['rendered']} rendered, "
+          f"{stats['reused']} unchanged; {len(changed)} existing prompts changed.")
+    if stats['repaired']:
+        print(f"{stats['repaired']} unchanged rows no longer matched the previous output "
+              f"and were re-rendered.")
+    if stats['example']:
+        print("Example (first 1):")
+        print(json.dumps(json.loads(stats['example']), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,114 +1,160 @@
-import json
-
+"""
+Response parsing: scraped outputs -> _3ready_prompts_outputs.json.
 
-def parse_nested_json(file_path):
-    """
-    Loads a JSON file containing a list of objects, where the 'value'
-    field is a JSON string. It parses this string into a dictionary for each item.
+Each raw 'value' is reduced to the first JSON object in it that carries the
+expected keys (src.response_parser: one linear scan, so UI text such as
+"Model / code / JSON / content_copy" around the payload doesn't matter).
+Rows that don't parse go to _3bad_prompt_outputs.json with the reason. The
+input is streamed, parsed in batches across a process pool, and written out
+incrementally in the original order.
 
-    Args:
-        file_path (str): The path to the input JSON file.
-
-    Returns:
-        list: The transformed list of dictionaries, or None if an error occurs.
-    """
-    print(f"--- Loading data from {file_path} ---")
-
-    try:
-        # 1. Load the main JSON file
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: The file '{file_path}' was not found.")
-        return None
-    except json.JSONDecodeError as e:
-        print(f"Error decoding main JSON structure: {e}")
-        return None
-
-    # 2. Iterate and parse the nested JSON string
-    transformed_data = []
-    bad_data = []
-    for key, item in enumerate(data):
-        value_string = item.get("value")
-        if value_string.startswith(
-            "Model\ncode\nJSON\ndownload\ncontent_copy\nexpand_less\n"
-        ):
-            value_string = value_string[
-                len("Model\ncode\nJSON\ndownload\ncontent_copy\nexpand_less\n") :
-            ]
-        if value_string.startswith("Model\n\n"):
-            value_string = value_string[len("Model\n\n")]
-        if value_string.startswith("JSON\n"):
-            value_string = value_string[len("JSON\n")]
-        if value_string.endswith("\n"):
-            value_string = value_string[: len("\n")]
-
-        if value_string is None:
-            print(f"Warning: Item {i} is missing the 'value' field. Skipping.")
-            transformed_data.append(item)
-            continue
+    python -m utils._2convert_output [--workers 8]
+"""
 
+import argparse
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.config import Config
+from src.prompt_source import iter_json_records
+from src.response_parser import parse_response, validate
+
+INPUT_FILE = Config.OUTPUT_FILE  # "_2initial_prompts_outputs.json", exported by the scraper
+OUTPUT_FILE = "_3ready_prompts_outputs.json"
+BAD_OUTPUT_FILE = "_3bad_prompt_outputs.json"
+BATCH_SIZE = 500
+
+
+class JsonListWriter:
+    """Writes a JSON list one item at a time, in the indent=4 layout of the old json.dump."""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.count = 0
+        self._f = open(file_path + ".tmp", "w", encoding="utf-8")
+        self._f.write("[")
+
+    def write(self, item: Dict[str, Any]):
+        body = json.dumps(item, indent=4)
+        body = "\n".join("    " + line for line in body.split("\n"))
+        self._f.write(("\n" if not self.count else ",\n") + body)
+        self.count += 1
+
+    def close(self):
+        self._f.write("\n]" if self.count else "]")
+        self._f.close()
+        os.replace(self.file_path + ".tmp", self.file_path)
+
+    def discard(self):
+        """Drops the partial output; the previous file stays as it was."""
+        self._f.close()
         try:
-            # Convert the JSON string into a Python dictionary
-            parsed_output = json.loads(value_string)
+            os.remove(self.file_path + ".tmp")
+        except OSError:
+            pass
 
-            # Replace the string value with the actual dictionary
-            item["value"] = parsed_output
 
-            transformed_data.append(item)
+def parse_item(item: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+    """Returns (ok, row): the item with 'value' parsed, or the item plus an 'error'."""
+    value = item.get("value")
+    if value is None:
+        return False, {**item, "error": "missing 'value'"}
+    parsed = validate(value) if isinstance(value, (dict, list)) else parse_response(value)
+    if not parsed.ok:
+        return False, {**item, "error": parsed.error}
+    return True, {**item, "value": parsed.value}
 
-        except json.JSONDecodeError as e:
-            print(
-                f"Error decoding nested JSON in item {key} (Prompt ID: {item.get('key', 'N/A')}): {e}"
-            )
-            print(
-                f"Problematic string segment: {value_string[:100]}..."
-            )  # Print first 100 chars for context
-            bad_data.append(item)
 
-    print("\n--- Transformation Complete ---")
-    return transformed_data, bad_data
+def parse_batch(items: List[Dict[str, Any]]) -> List[Tuple[bool, Dict[str, Any]]]:
+    return [parse_item(item) for item in items]
 
 
-def save_json_data(data, file_path):
+def iter_batches(items: Iterable[Any], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def convert(
+    input_file: str,
+    output_file: str,
+    bad_file: str,
+    workers: int,
+    items: Optional[Iterable[Dict[str, Any]]] = None,
+    keep: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[int, int]:
     """
-    Saves the given Python list/dictionary to a JSON file.
-
-    Args:
-        data (list or dict): The data structure to save.
-        file_path (str): The path to the output JSON file.
+    `items` replaces reading `input_file` (the pipeline streams the result log
+    directly); parsed rows are also appended to `keep` when given.
     """
-    print(f"--- Saving data to {file_path} ---")
+    if items is None:
+        print(f"--- Loading data from {input_file} ---")
+        items = iter_json_records(input_file)
+    good, bad = JsonListWriter(output_file), JsonListWriter(bad_file)
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    # Bounded window of batches in flight; output order is preserved
+    in_flight: Deque[Any] = deque()
+
+    def flush_one():
+        rows = in_flight.popleft()
+        if isinstance(rows, Future):
+            rows = rows.result()
+        for ok, row in rows:
+            if ok:
+                good.write(row)
+                if keep is not None:
+                    keep.append(row)
+            else:
+                print(f"Could not parse output for {row.get('key', 'N/A')}: {row['error']}")
+                bad.write(row)
+
     try:
-        # Use indent=4 for pretty-printing the output file
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
-        print(f"Successfully saved {len(data)} items to {file_path}")
-    except IOError as e:
-        print(f"Error saving file '{file_path}': {e}")
-
-
-# Define the file paths
-input_file_name = "_2initial_prompts_outputs.json"
-output_file_name = "_3ready_prompts_outputs.json"
-
-# Execute the parsing function
-final_data, bad_data = parse_nested_json(input_file_name)
-
-if final_data:
-    # Save the transformed data to the new file
-    save_json_data(final_data, output_file_name)
-    save_json_data(bad_data, "_3bad_prompt_outputs.json")
-
-    # Print the structure of the first item to show the change
-    print("\n--- Transformed Data Structure (First Item) ---")
-    # Use json.dumps to pretty-print the Python dictionary for clarity
-    print(json.dumps(final_data[0], indent=4))
-
-    # Verify the type of the nested field
-    print(f"\nType of 'value' in the first item: {type(final_data[0]['value'])}")
-
-    # Show that you can now access nested fields directly
-    print(
-        f"Accessing nested field 'is_ableist': {final_data[0]['value']['is_ableist']}"
-    )
+        for batch in iter_batches(items, BATCH_SIZE):
+            in_flight.append(pool.submit(parse_batch, batch) if pool else parse_batch(batch))
+            if len(in_flight) > 2 * max(1, workers):
+                flush_one()
+        while in_flight:
+            flush_one()
+    except BaseException:
+        # Never replace a good output with a partial one
+        good.discard()
+        bad.discard()
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    good.close()
+    bad.close()
+    return good.count, bad.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default=INPUT_FILE, help="JSON list or JSONL of {key, value}")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--bad-output", default=BAD_OUTPUT_FILE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Error: The file '{args.input}' was not found.")
+        return
+    good, bad = convert(args.input, args.output, args.bad_output, args.workers)
+
+    print("\n--- Transformation Complete ---")
+    print(f"Successfully saved {good} items to {args.output}")
+    print(f"Saved {bad} unparseable items to {args.bad_output}")
+
+
+if __name__ == "__main__":
+    main()
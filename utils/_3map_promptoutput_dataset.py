@@ -1,48 +1,225 @@
+"""
+Join stage: filtered dataset + parsed outputs -> review dataset (JSONL).
+
+The dataset (JSONL from utils/_0c_simple_db.py) gets an on-disk SQLite index
+of id -> byte offset, plus a flag per row once it has been merged. Parsed
+outputs are streamed against that index in batches and each match is appended
+to the review dataset, so neither side is held in memory. By default only keys
+that were not merged before are added (incremental); the index and output are
+rebuilt when the dataset file changes or with --full.
+
+    python -m utils._3map_promptoutput_dataset [--full]
+"""
+
+import argparse
+import hashlib
 import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.prompt_source import iter_json_records
+
+DATASET_FILE = "_0initial_filtered_dataset.jsonl"
+OUTPUTS_FILE = "_3ready_prompts_outputs.json"
+OUTPUT_FILE = "_3review_dataset.jsonl"
+INDEX_FILE = "_3review_dataset.idx.sqlite"
+BATCH_SIZE = 1000
+SUMMARY_SAMPLE = 20  # unmatched keys listed in the summary
+
+
+def _fingerprint(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def open_index(index_file: str, dataset_file: str, full: bool) -> Tuple[sqlite3.Connection, bool]:
+    """Returns the index and whether it was (re)built, in which case the output must be too."""
+    db = sqlite3.connect(index_file)
+    db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS rows ("
+        " id TEXT PRIMARY KEY, offset INTEGER, length INTEGER, merged INTEGER DEFAULT 0,"
+        " value_hash TEXT)"
+    )
+    row = db.execute("SELECT value FROM meta WHERE name = 'dataset'").fetchone()
+    fingerprint = _fingerprint(dataset_file)
+    if not full and row is not None and row[0] == fingerprint:
+        return db, False
+
+    print(f"--- Indexing {dataset_file} ---")
+    db.execute("DELETE FROM rows")
+    batch = []
+    with open(dataset_file, "rb") as f:
+        offset = 0
+        for line in f:
+            if line.strip():
+                try:
+                    batch.append((str(json.loads(line)["id"]), offset, len(line)))
+                except (ValueError, KeyError, TypeError):
+                    raise SystemExit(
+                        f"{dataset_file} must be JSONL with an 'id' per line "
+                        f"(re-run utils._0c_simple_db). Bad line at byte {offset}."
+                    )
+            offset += len(line)
+            if len(batch) >= BATCH_SIZE:
+                _insert_rows(db, batch)
+                batch = []
+    _insert_rows(db, batch)
+    db.execute("INSERT OR REPLACE INTO meta VALUES ('dataset', ?)", (fingerprint,))
+    db.commit()
+    return db, True
+
+
+def _insert_rows(db: sqlite3.Connection, rows: List[Tuple[str, int, int]]):
+    db.executemany("INSERT OR IGNORE INTO rows (id, offset, length) VALUES (?, ?, ?)", rows)
+
+
+def _value_hash(value: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def merge_row(
+    sample_id: str, dataset_value: Dict[str, Any], llm_value: Dict[str, Any]
+) -> Dict[str, Any]:
+    return {
+        "id": sample_id,
+        "preceding": dataset_value["preceding"],
+        "target": dataset_value["target"],
+        "following": dataset_value["following"],
+        "A1_Score": dataset_value["A1_Score"],
+        "A2_Score": dataset_value["A2_Score"],
+        "A3_Score": dataset_value["A3_Score"],
+        "principle_id": llm_value.get("principle_id", ""),
+        "llm_justification": llm_value.get("justification_reasoning", ""),
+        "llm_evidence_quote": llm_value.get("evidence_quote", ""),
+        "expert_opinion": "",
+        "isRevised": False,
+        "reviserName": "",
+        "revisionTimestamp": None,
+    }
+
 
-id_dataset = {}
-with open("_0initial_filtered_dataset.json", "r") as fp:
-    temp = json.load(fp)
-    for t in temp:
-        id_dataset[t["id"]] = {
-            "preceding": t["preceding"],
-            "target": t["target"],
-            "following": t["following"],
-            "A1_Score": t["A1_Score"],
-            "A2_Score": t["A2_Score"],
-            "A3_Score": t["A3_Score"],
-            "principle_id": t["principle_id"],
-            "llm_justification": t["llm_justification"],
-            "llm_evidence_quote": t["llm_evidence_quote"],
-            "expert_opinion": t["expert_opinion"],
-        }
-
-key_ready_prompts_outputs = {}
-with open("_3ready_prompts_outputs.json", "r") as fp:
-    temp = json.load(fp)
-    for t in temp:
-        key_ready_prompts_outputs[t["key"]] = t["value"]
-finall_output = []
-for id, dataset_value in id_dataset.items():
-    if id in key_ready_prompts_outputs:
-        llm_value = key_ready_prompts_outputs[id]
-        finall_output.append(
-            {
-                "id": id,
-                "preceding": dataset_value["preceding"],
-                "target": dataset_value["target"],
-                "following": dataset_value["following"],
-                "A1_Score": dataset_value["A1_Score"],
-                "A2_Score": dataset_value["A2_Score"],
-                "A3_Score": dataset_value["A3_Score"],
-                "principle_id": llm_value["principle_id"],
-                "llm_justification": llm_value["justification_reasoning"],
-                "llm_evidence_quote": llm_value["evidence_quote"],
-                "expert_opinion": "",
-                "isRevised": False,
-                "reviserName": "",
-                "revisionTimestamp": None,
-            }
+def iter_output_batches(outputs: Iterable[Any]) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for item in outputs:
+        if isinstance(item, dict) and "key" in item and isinstance(item.get("value"), dict):
+            batch.append(item)
+            if len(batch) >= BATCH_SIZE:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def join(
+    dataset_file: str,
+    outputs_file: str,
+    output_file: str,
+    index_file: str,
+    full: bool,
+    rewrite: bool = False,
+    outputs: Optional[Iterable[Dict[str, Any]]] = None,
+) -> Dict:
+    """`outputs` replaces reading `outputs_file`; it must be re-iterable (e.g. a list)."""
+    db, rebuilt = open_index(index_file, dataset_file, full)
+    unmatched: List[str] = []
+    stats = {"merged": 0, "already_merged": 0, "unmatched_outputs": 0, "changed": 0}
+
+    rebuilt = rebuilt or rewrite
+    mode = "wb" if rebuilt or not os.path.exists(output_file) else "ab"
+    if mode == "wb":
+        db.execute("UPDATE rows SET merged = 0")
+        db.commit()
+
+    with open(dataset_file, "rb") as dataset, open(output_file, mode) as out:
+        records = outputs if outputs is not None else iter_json_records(outputs_file)
+        for batch in iter_output_batches(records):
+            keys = [str(item["key"]) for item in batch]
+            placeholders = ",".join("?" * len(keys))
+            query = (
+                "SELECT id, offset, length, merged, value_hash FROM rows"
+                f" WHERE id IN ({placeholders})"
+            )
+            found = {row[0]: row[1:] for row in db.execute(query, keys)}
+
+            todo = []
+            for key, item in zip(keys, batch):
+                location = found.get(key)
+                if location is None:
+                    stats["unmatched_outputs"] += 1
+                    if len(unmatched) < SUMMARY_SAMPLE:
+                        unmatched.append(key)
+                    continue
+                offset, length, merged, merged_hash = location
+                value_hash = _value_hash(item["value"])
+                if not merged:
+                    todo.append((offset, length, key, item["value"], value_hash))
+                elif merged_hash == value_hash:
+                    stats["already_merged"] += 1
+                else:
+                    stats["changed"] += 1  # re-scraped since it was merged
+
+            # Read dataset rows in file order
+            merged_keys = []
+            for offset, length, key, llm_value, value_hash in sorted(todo, key=lambda t: t[0]):
+                dataset.seek(offset)
+                dataset_value = json.loads(dataset.read(length))
+                record = merge_row(key, dataset_value, llm_value)
+                out.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+                merged_keys.append((value_hash, key))
+
+            # Output first, then the flags: a crash can only cause a re-merge, never a lost row
+            out.flush()
+            os.fsync(out.fileno())
+            db.executemany("UPDATE rows SET merged = 1, value_hash = ? WHERE id = ?", merged_keys)
+            db.commit()
+            stats["merged"] += len(merged_keys)
+
+    stats["total_merged"] = db.execute("SELECT COUNT(*) FROM rows WHERE merged = 1").fetchone()[0]
+    stats["pending_rows"] = db.execute("SELECT COUNT(*) FROM rows WHERE merged = 0").fetchone()[0]
+    stats["pending_sample"] = [
+        row[0]
+        for row in db.execute(
+            "SELECT id FROM rows WHERE merged = 0 ORDER BY offset LIMIT ?", (SUMMARY_SAMPLE,)
         )
-    else:
-        print(id)
+    ]
+    stats["unmatched_sample"] = unmatched
+    stats["rebuilt"] = rebuilt
+    db.close()
+
+    if stats["changed"] and not rebuilt:
+        # Rows can't be replaced in place in an append-only file; rewrite it once
+        print(f"{stats['changed']} merged rows have a new output. Rewriting {output_file}.")
+        return join(
+            dataset_file, outputs_file, output_file, index_file, False, rewrite=True, outputs=outputs
+        )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dataset", default=DATASET_FILE)
+    parser.add_argument(
+        "--outputs", default=OUTPUTS_FILE, help="parsed outputs (JSON list or JSONL)"
+    )
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--index", default=INDEX_FILE)
+    parser.add_argument("--full", action="store_true", help="rebuild the index and the output")
+    args = parser.parse_args()
+
+    stats = join(args.dataset, args.outputs, args.output, args.index, args.full)
+
+    print(f"\n--- Join {'rebuilt' if stats['rebuilt'] else 'updated'}: {args.output} ---")
+    print(f"Merged {stats['merged']} new rows ({stats['total_merged']} in total, "
+          f"{stats['already_merged']} outputs already merged).")
+    if stats["unmatched_outputs"]:
+        print(f"{stats['unmatched_outputs']} outputs have no dataset row, e.g. "
+              f"{', '.join(stats['unmatched_sample'])}")
+    if stats["pending_rows"]:
+        print(f"{stats['pending_rows']} dataset rows have no output yet, e.g. "
+              f"{', '.join(stats['pending_sample'])}")
+
+
+if __name__ == "__main__":
+    main()